@@ -1,12 +1,16 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from ..database import get_db
+from ..database import get_async_db
 from ..crud import user as crud_user
 from ..schemas.user import UserCreate, UserResponse, Token, PasswordChange
-from ..auth.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, verify_token
+from ..auth.security import create_user_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, verify_token
+from ..auth.cache import principal_cache, token_versions
+from ..auth.principal import Principal
+from ..auth.lockout import login_attempts
 
 router = APIRouter()
 
@@ -24,80 +28,170 @@ class LoginResponse(BaseModel):
     force_password_change: bool
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+async def _token_state(db: AsyncSession, user_id: int, token_version: Optional[int] = None):
+    """``(token_version, is_active)`` of ``user_id``, from the version map when fresh.
+
+    A token newer than the mapped version was issued after another worker
+    bumped it, so the map entry is stale and the state is read again.
+    """
+    state = token_versions.get(user_id)
+    if state is None or (token_version is not None and token_version > state[0]):
+        state = await crud_user.get_user_token_state_async(db, user_id)
+        if state is None:
+            return None
+        token_versions.set(user_id, *state)
+    return state
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     token_data = verify_token(token)
     if token_data is None or token_data.username is None:
-        raise credentials_exception
+        raise _credentials_exception()
+
+    user = principal_cache.get(token_data.username)
+    if user is not None:
+        # Each worker caches its own copy; one that disagrees with the
+        # version map was changed (or revoked) on another worker
+        state = await _token_state(db, user.id, token_data.token_version)
+        if state != (user.token_version or 0, bool(user.is_active)):
+            principal_cache.invalidate(token_data.username)
+            user = None
 
-    user = crud_user.get_user_by_username(db, username=token_data.username)
     if user is None:
-        raise credentials_exception
+        user = await crud_user.get_user_by_username_async(
+            db, username=token_data.username)
+        if user is None:
+            raise _credentials_exception()
+
+        # Detach so the cached instance can outlive this request's session
+        db.expunge(user)
+        principal_cache.set(token_data.username, user)
+        token_versions.set(user.id, user.token_version or 0, user.is_active)
+
+    # Tokens issued before versions were embedded carry no ``ver`` and
+    # survive a version bump, so deactivation is checked directly too
+    if not user.is_active:
+        raise _credentials_exception()
+    if token_data.token_version is not None and token_data.token_version != (user.token_version or 0):
+        raise _credentials_exception()
+
+    return user
+
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """Authorize from token claims alone.
+
+    Only the token version is checked against the in-memory version map, so
+    the users table is read at most once per user per cache TTL (or when a
+    token newer than the map shows up).
+    """
+    token_data = verify_token(token)
+    if token_data is None or token_data.username is None:
+        raise _credentials_exception()
+
+    if token_data.user_id is None or token_data.token_version is None:
+        # Tokens issued before claims were embedded only carry the subject
+        user = await get_current_user(token=token, db=db)
+        return Principal.from_user(user)
+
+    # A token issued by another worker after a password or role change is
+    # newer than this worker's map entry; that re-reads the state instead
+    # of rejecting the token
+    state = await _token_state(db, token_data.user_id, token_data.token_version)
+    if state is None:
+        raise _credentials_exception()
+
+    token_version, is_active = state
+    if not is_active or token_version != token_data.token_version:
+        raise _credentials_exception()
+
+    return Principal(
+        id=token_data.user_id,
+        username=token_data.username,
+        role=token_data.role,
+        permissions=token_data.permissions,
+        token_version=token_data.token_version,
+    )
+
+
+async def authenticate_with_lockout(request: Request, db: AsyncSession, username: str, password: str):
+    client_ip = request.client.host if request.client else "unknown"
+
+    # Reject locked-out pairs before spending a query or a bcrypt hash
+    retry_after = await login_attempts.retry_after(username, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    user = await crud_user.authenticate_user_async(db, username, password)
+    if not user:
+        await login_attempts.record_failure(username, client_ip)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
+    await login_attempts.reset(username, client_ip)
     return user
 
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user already exists
-    db_user = crud_user.get_user_by_username(db, username=user.username)
+    db_user = await crud_user.get_user_by_username_async(db, username=user.username)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Username already registered"
         )
 
-    db_user = crud_user.get_user_by_email(db, email=user.email)
+    db_user = await crud_user.get_user_by_email_async(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Email already registered"
         )
 
-    return crud_user.create_user(db=db, user=user)
+    return await crud_user.create_user_async(db=db, user=user)
 
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = crud_user.authenticate_user(
-        db, form_data.username, form_data.password)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user = await authenticate_with_lockout(
+        request, db, form_data.username, form_data.password)
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+    access_token = create_user_access_token(
+        user, expires_delta=access_token_expires
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    user = crud_user.authenticate_user(
-        db, login_data.username, login_data.password)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+async def login(request: Request, login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_with_lockout(
+        request, db, login_data.username, login_data.password)
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+    access_token = create_user_access_token(
+        user, expires_delta=access_token_expires
     )
 
     return {
@@ -116,21 +210,30 @@ async def read_users_me(current_user=Depends(get_current_user)):
 async def change_password(
     password_data: PasswordChange,
     current_user=Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Verify current password
-    if not crud_user.verify_user_password(password_data.current_password, current_user.hashed_password):
+    if not await crud_user.verify_user_password_async(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
 
     # Update password and clear force_password_change flag
-    crud_user.update_user_password(
+    db_user = await crud_user.update_user_password_async(
         db,
         user_id=current_user.id,
         new_password=password_data.new_password,
         clear_force_change=True
     )
 
-    return {"message": "Password changed successfully"}
+    # The password change revoked every earlier token, including this one
+    access_token = create_user_access_token(
+        db_user, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+    return {
+        "message": "Password changed successfully",
+        "access_token": access_token,
+        "token_type": "bearer"
+    }
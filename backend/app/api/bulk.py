@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, List, Tuple, Type
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from config import get_config
+
+config = get_config()
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson")
+
+
+class _InvalidLine:
+    """Stands in for an NDJSON line that is not valid JSON"""
+
+
+def check_batch_size(count: int):
+    if count > config.api_bulk_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {config.api_bulk_max_items} items per request")
+
+
+async def read_rows(request: Request) -> List[Dict[str, Any]]:
+    """Rows of a bulk request body.
+
+    Accepts a JSON array of objects, or CSV with a header row when sent as
+    ``text/csv``. Empty CSV cells count as absent, so column defaults apply.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        try:
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            rows = [{key: value for key, value in row.items() if key and value}
+                    for row in reader]
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+    else:
+        try:
+            rows = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array")
+    check_batch_size(len(rows))
+    return rows
+
+
+async def row_batches(request: Request, size: int) -> AsyncIterator[List[Tuple[int, Any]]]:
+    """Batches of ``(index, row)`` pairs from a bulk request body.
+
+    NDJSON bodies are parsed as they arrive and yielded ``size`` lines at a
+    time, so an import of any size is never held in memory; ``index`` is
+    the 0-based line number. JSON and CSV bodies (see ``read_rows``) come
+    as a single batch.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in NDJSON_TYPES:
+        yield list(enumerate(await read_rows(request)))
+        return
+
+    batch, index, pending = [], 0, b""
+    async for chunk in request.stream():
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            if line.strip():
+                try:
+                    batch.append((index, json.loads(line)))
+                except ValueError:
+                    batch.append((index, _InvalidLine()))
+            index += 1
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    if pending.strip():
+        try:
+            batch.append((index, json.loads(pending)))
+        except ValueError:
+            batch.append((index, _InvalidLine()))
+    if batch:
+        yield batch
+
+
+def validate_rows(rows: Iterable[Tuple[int, Any]], schema: Type[BaseModel]) -> Tuple[list, list]:
+    """Validate each ``(index, row)`` on its own so one bad row does not fail the batch.
+
+    Returns ``(valid, errors)``: ``(index, model)`` pairs and error results.
+    """
+    valid, errors = [], []
+    for index, row in rows:
+        try:
+            if isinstance(row, _InvalidLine):
+                raise TypeError("Invalid JSON")
+            if not isinstance(row, dict):
+                raise TypeError("Expected an object")
+            valid.append((index, schema(**row)))
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            errors.append({"index": index, "status": "error",
+                           "detail": f"{location}: {error['msg']}" if location else error["msg"]})
+        except TypeError as e:
+            errors.append({"index": index, "status": "error", "detail": str(e)})
+    return valid, errors
+
+
+def bulk_result(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    results = sorted(results, key=lambda result: result["index"])
+    succeeded = sum(result["status"] in ("created", "deleted") for result in results)
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
@@ -0,0 +1,86 @@
+import hashlib
+import re
+from typing import List, Optional
+from fastapi import HTTPException, Request, Response
+
+# ETags are "<kind><id>-<version>", e.g. "t12-7" for revision 7 of template
+# 12. Representations embedding a related row add its version ("t12-7.3"),
+# and sparse fieldset responses append a hash of the field list
+_ETAG = re.compile(r'^"([a-z])(\d+)-(\d+)(?:\.\d+)?"$')
+
+
+def _fieldset_suffix(fields: Optional[List[str]]) -> str:
+    # Sparse responses are different representations and need their own tags
+    if not fields:
+        return ""
+    return "-" + hashlib.sha1(",".join(fields).encode()).hexdigest()[:8]
+
+
+def make_etag(kind: str, resource_id: int, version: int,
+              fields: Optional[List[str]] = None, related: Optional[int] = None) -> str:
+    related = "" if related is None else f".{related}"
+    return f'"{kind}{resource_id}-{version or 0}{related}{_fieldset_suffix(fields)}"'
+
+
+def template_etag(template, fields: Optional[List[str]] = None) -> str:
+    """Strong ETag from the template's id and revision.
+
+    Every saved change bumps the revision, and both are plain columns, so
+    the tag is known without loading elements. Representations embedding
+    the owner also carry the owner's version: editing the owner changes
+    them without touching the template.
+    """
+    owner = None
+    if fields is None or "user" in fields:
+        owner = template.user.version if template.user is not None else 0
+    return make_etag("t", template.id, template.revision, fields, owner)
+
+
+def user_etag(user, fields: Optional[List[str]] = None) -> str:
+    return make_etag("u", user.id, user.version, fields)
+
+
+def _matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        # If-None-Match uses weak comparison
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: str, headers: Optional[dict] = None) -> Optional[Response]:
+    """A 304 response if ``If-None-Match`` already names ``etag``.
+
+    ``headers`` (e.g. ``Cache-Control``) are repeated on the 304, as the
+    200 would have carried them.
+    """
+    header = request.headers.get("if-none-match")
+    if header and _matches(header, etag):
+        return Response(status_code=304, headers=dict(headers or {}, ETag=etag))
+    return None
+
+
+def if_match_version(request: Request, kind: str, resource_id: int) -> Optional[int]:
+    """The version named by ``If-Match``, or None when the header is absent or ``*``.
+
+    Only strong full-representation tags of this resource can match, so
+    anything else fails the precondition with 412 straight away.
+    """
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return None
+    for candidate in header.split(","):
+        match = _ETAG.match(candidate.strip())
+        if match and match.group(1) == kind and int(match.group(2)) == resource_id:
+            return int(match.group(3))
+    raise HTTPException(status_code=412, detail="Precondition failed: resource has changed")
+
+
+def conflict_status(request: Request) -> int:
+    """412 when the stale version came from If-Match, 409 when from the body"""
+    return 412 if request.headers.get("if-match") else 409
@@ -0,0 +1,29 @@
+from typing import Iterable, List, Optional
+from fastapi import HTTPException, Query
+
+
+def fields_param(allowed: Iterable[str]):
+    """Build a dependency that parses ``?fields=a,b,c`` against ``allowed``.
+
+    Resolves to None when the parameter is absent so callers keep their
+    full response shape; unknown names are rejected with a 400.
+    """
+    allowed = frozenset(allowed)
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None, description=f"Comma-separated subset of: {', '.join(sorted(allowed))}")
+    ) -> Optional[List[str]]:
+        if fields is None:
+            return None
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = sorted(set(requested) - allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        return requested or None
+
+    return dependency
+
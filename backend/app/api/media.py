@@ -0,0 +1,439 @@
+import os
+import stat as stat_module
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from ..database import get_async_db
+from ..repositories import TemplateRepository
+from ..crud import media as crud_media
+from ..crud.exceptions import PermissionDenied
+from ..crud.pagination import decode_key_cursor, encode_key_cursor
+from ..media import clean_media_path, media_file, restore_media, trash_media
+from ..media import derivatives, serving, uploads
+from ..media.catalog import catalog_service
+from ..media.gc import collect_garbage
+from ..schemas.media import (MediaAsset, MediaCollection, MediaFile, MediaScan, MediaUsages,
+                             UploadCreate, UploadSession)
+from ..schemas.template import TemplateSummary
+from ..api.auth import get_current_principal
+from ..api.conditional import not_modified
+from ..api.pagination import NEXT_CURSOR_HEADER
+from ..api.responses import FastJSONResponse, serialize_orm
+from ..api.templates import template_repository
+from ..api.users import require_admin
+from config import get_config
+
+config = get_config()
+
+router = APIRouter()
+
+
+# Status codes for rejected uploads; anything else is a 400
+UPLOAD_ERROR_STATUS = (
+    (uploads.MediaTooLarge, 413),
+    (uploads.MediaExists, 409),
+    (uploads.UploadOffsetMismatch, 409),
+    (uploads.UploadInProgress, 409),
+    (uploads.ChecksumMismatch, 422),
+)
+
+
+def upload_error(e: uploads.MediaUploadError) -> HTTPException:
+    status_code = next((code for kind, code in UPLOAD_ERROR_STATUS if isinstance(e, kind)), 400)
+    headers = None
+    if isinstance(e, uploads.UploadOffsetMismatch):
+        headers = {"Upload-Offset": str(e.offset)}
+    return HTTPException(status_code=status_code, detail=str(e), headers=headers)
+
+
+def content_length(request: Request) -> Optional[int]:
+    value = request.headers.get("content-length")
+    return int(value) if value and value.isdigit() else None
+
+
+async def require_uploader(current_user=Depends(get_current_principal)):
+    if not config.feature_media_upload:
+        raise HTTPException(status_code=403, detail="Media upload is disabled")
+    if not current_user.has_permission("can_create_content"):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return current_user
+
+
+def owned_session(upload_id: str, current_user) -> dict:
+    session = uploads.load_session(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if session["created_by"] != current_user.id and not current_user.is_admin:
+        raise PermissionDenied()
+    return session
+
+
+def session_response(session: dict, status_code: int = 200) -> FastJSONResponse:
+    headers = {"Upload-Offset": str(session["offset"]), "Upload-Length": str(session["size"]),
+               "Location": f"/api/media/uploads/{session['id']}"}
+    return FastJSONResponse(
+        {name: session.get(name) for name in UploadSession.model_fields},
+        status_code=status_code, headers=headers)
+
+
+def media_path(path: str) -> str:
+    """The ``{path}`` parameter relative to the media root, e.g. ``images/logo.png``"""
+    cleaned = clean_media_path(path)
+    if cleaned is None:
+        raise HTTPException(status_code=400, detail="Invalid media path")
+    return cleaned
+
+
+def asset_response(asset) -> dict:
+    return {
+        "path": asset.path,
+        "url": f"/media/{asset.path}",
+        "type": asset.type,
+        "sha256": asset.sha256,
+        "size": asset.size,
+        "mime": asset.mime,
+        "width": asset.width,
+        "height": asset.height,
+        "duration": asset.duration,
+        "modified_at": datetime.fromtimestamp(asset.mtime_ns / 1e9, timezone.utc),
+        "thumbnail_url": (f"/api/media/thumbnails/{asset.path}?v={asset.sha256[:16]}"
+                          if derivatives.has_derivatives(asset.path) else None),
+    }
+
+
+@router.get("/", response_model=List[MediaAsset])
+async def list_media(
+    media_type: Optional[Literal["images", "videos", "files"]] = Query(None, alias="type"),
+    mime: Optional[str] = Query(None, max_length=255),
+    q: Optional[str] = Query(None, max_length=255),
+    sort: Literal["path", "size", "modified"] = "path",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_principal)
+):
+    """List catalogued media with size, type, dimensions and duration.
+
+    Filter by ``type``, ``mime`` (``image/png`` or ``image/*``) and ``q``
+    (part of the path), and sort by ``path``, ``size`` or ``modified``.
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` for the
+    next page. The catalog is kept current by a background scanner, so
+    listing never touches the media directories.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_key_cursor(cursor, 1 if sort == "path" else 2)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not isinstance(after[-1], str) or (sort != "path" and not isinstance(after[0], int)):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    assets = await crud_media.list_media_assets_async(
+        db, media_type=media_type, mime=mime, q=q, sort=sort, descending=order == "desc",
+        limit=limit, after=after)
+    headers = {}
+    if len(assets) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_key_cursor(
+            crud_media.asset_sort_key(assets[-1], sort))
+    return FastJSONResponse([asset_response(asset) for asset in assets], headers=headers)
+
+
+@router.post("/scan", response_model=MediaScan)
+async def scan_media(
+    full: bool = False,
+    current_user=Depends(require_admin)
+):
+    """Bring the media catalog up to date now (Admin only).
+
+    Only files whose inode, size or mtime changed are read again; with
+    ``full`` every file is re-hashed and re-probed.
+    """
+    return await catalog_service.scan(full)
+
+
+@router.post("/", response_model=MediaFile, status_code=201)
+async def upload_media(
+    request: Request,
+    filename: str = Query(..., max_length=255),
+    current_user=Depends(require_uploader)
+):
+    """Upload a file; the request body is the raw file content.
+
+    The body is streamed to disk while it is hashed, never buffered
+    whole, and rejected with 413 as soon as it passes ``[media]
+    max_file_size``. The file appears under ``images/``, ``videos/`` or
+    ``files/`` by extension only once complete; an existing name returns
+    409. Use ``POST /api/media/uploads`` for large files on unreliable
+    links.
+    """
+    try:
+        media = await uploads.save_upload(filename, request.stream(), content_length(request))
+    except uploads.MediaUploadError as e:
+        raise upload_error(e)
+    await catalog_service.refresh([media["path"]], {media["path"]: media["sha256"]})
+    return FastJSONResponse(media, status_code=201, headers={"Location": media["url"]})
+
+
+@router.post("/uploads", response_model=UploadSession, status_code=201)
+async def create_upload(
+    upload: UploadCreate,
+    current_user=Depends(require_uploader)
+):
+    """Start a resumable upload of ``size`` bytes.
+
+    Send the content with ``PATCH /api/media/uploads/{id}`` in one or
+    more chunks, each with an ``Upload-Offset`` header equal to the bytes
+    received so far. After a dropped connection, ``HEAD`` the upload to
+    read its ``Upload-Offset`` and continue from there.
+    """
+    try:
+        session = uploads.create_session(
+            upload.filename, upload.size, current_user.id, upload.sha256)
+    except uploads.MediaUploadError as e:
+        raise upload_error(e)
+    return session_response(session, status_code=201)
+
+
+@router.api_route("/uploads/{upload_id}", methods=["GET", "HEAD"], response_model=UploadSession)
+async def get_upload(upload_id: str, current_user=Depends(require_uploader)):
+    """Where an upload stands; ``Upload-Offset`` is where the next chunk starts"""
+    return session_response(owned_session(upload_id, current_user))
+
+
+@router.patch("/uploads/{upload_id}", response_model=UploadSession)
+async def append_upload(
+    request: Request,
+    upload_id: str,
+    upload_offset: int = Header(...),
+    current_user=Depends(require_uploader)
+):
+    """Append the request body at ``Upload-Offset``.
+
+    A mismatched offset returns 409 with the current ``Upload-Offset``. The
+    chunk that completes the upload publishes the file and the response
+    carries it as ``media``; a declared ``sha256`` that does not match
+    returns 422 and discards the upload.
+    """
+    session = owned_session(upload_id, current_user)
+    try:
+        session = await uploads.append_chunk(
+            session, upload_offset, request.stream(), content_length(request))
+    except uploads.MediaUploadError as e:
+        raise upload_error(e)
+    if "media" in session:
+        media = session["media"]
+        await catalog_service.refresh([media["path"]], {media["path"]: media["sha256"]})
+    return session_response(session)
+
+
+@router.delete("/uploads/{upload_id}")
+async def cancel_upload(upload_id: str, current_user=Depends(require_uploader)):
+    """Abandon a resumable upload and delete what was received"""
+    owned_session(upload_id, current_user)
+    uploads.discard_session(upload_id)
+    return {"message": "Upload cancelled"}
+
+
+async def media_stat(path: str):
+    """``(file, stat)`` of a media file, or 404"""
+    file = media_file(path)
+    if any(part.startswith(".") for part in path.split("/")):
+        # Partial uploads and caches are not media
+        raise HTTPException(status_code=404, detail="Media not found")
+    try:
+        stat = await run_in_threadpool(os.stat, file)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="Media not found")
+    if not stat_module.S_ISREG(stat.st_mode):
+        raise HTTPException(status_code=404, detail="Media not found")
+    return file, stat
+
+
+@router.api_route("/serve/{path:path}", methods=["GET", "HEAD"], response_class=FileResponse)
+async def serve_media(
+    request: Request,
+    path: str = Depends(media_path),
+    v: Optional[str] = None
+):
+    """Serve a media file, e.g. ``/api/media/serve/videos/intro.mp4``.
+
+    The file is sent from disk in chunks (or handed to the server with
+    ``pathsend`` where supported), never read into memory, and honours
+    ``Range`` with 206 so players can seek. Responses carry a strong
+    ``ETag`` and ``Last-Modified`` for 304 revalidation. With ``v`` set
+    to a prefix (8+ hex digits) of the file's SHA-256, as returned by the
+    upload endpoints, the response is cacheable for a year as immutable.
+    """
+    file, stat = await media_stat(path)
+    immutable = v is not None and await run_in_threadpool(serving.version_matches, v, file, stat)
+    etag = serving.file_etag(stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": serving.last_modified(stat),
+        "Cache-Control": serving.IMMUTABLE if immutable else serving.REVALIDATE,
+        "X-Content-Type-Options": "nosniff",
+    }
+    cached = not_modified(request, etag, headers)
+    if cached is not None:
+        return cached
+    if ("if-none-match" not in request.headers
+            and not serving.modified_since(request.headers.get("if-modified-since"), stat)):
+        return Response(status_code=304, headers=headers)
+    return serving.MediaFileResponse(file, headers=headers, media_type=serving.media_type(file),
+                                     stat_result=stat)
+
+
+async def derivative_response(request: Request, path: str, transform: derivatives.Transform,
+                              v: Optional[str], db: AsyncSession):
+    file, stat = await media_stat(path)
+    if not derivatives.has_derivatives(path):
+        raise HTTPException(status_code=415, detail="No thumbnails for this type of file")
+    asset = await crud_media.get_media_asset_async(db, path)
+    if asset is not None and (asset.inode, asset.size, asset.mtime_ns) == (
+            stat.st_ino, stat.st_size, stat.st_mtime_ns):
+        sha256 = asset.sha256
+        transform = transform.clamped(asset.width, asset.height)
+    else:
+        # Not catalogued yet; hashed once per version of the file
+        sha256 = await run_in_threadpool(serving.content_digest, file, stat)
+
+    # The key names the source content and the transform, so it is a
+    # strong ETag checked without rendering or reading anything
+    etag = f'"{transform.key(sha256)}"'
+    immutable = (v is not None and len(v) >= serving.MIN_VERSION_LENGTH
+                 and sha256.startswith(v.lower()))
+    headers = {
+        "ETag": etag,
+        "Cache-Control": serving.IMMUTABLE if immutable else serving.REVALIDATE,
+        "X-Content-Type-Options": "nosniff",
+    }
+    cached = not_modified(request, etag, headers)
+    if cached is not None:
+        return cached
+    try:
+        target = await derivatives.derivative_service.get(
+            file, uploads.media_type_for(file.name), sha256, transform)
+    except derivatives.DerivativesUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except derivatives.DerivativeError as e:
+        raise HTTPException(status_code=422, detail=f"Cannot make a thumbnail: {e}")
+    except derivatives.DerivativeServiceBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, please retry shortly",
+                            headers={"Retry-After": "1"})
+    return FileResponse(target, headers=headers,
+                        media_type=derivatives.FORMATS[transform.format][1])
+
+
+@router.get("/thumbnails/{path:path}", response_class=FileResponse)
+async def get_thumbnail(
+    request: Request,
+    path: str = Depends(media_path),
+    v: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """WebP thumbnail of an image (or, with ffmpeg installed, a video).
+
+    Fits ``[media] thumbnail_size`` at ``compression_quality``. Rendered on
+    first request and cached; ``v`` works as for ``/serve``, and the
+    catalog's ``thumbnail_url`` includes it.
+    """
+    return await derivative_response(request, path, derivatives.thumbnail_transform(), v, db)
+
+
+@router.get("/derivatives/{path:path}", response_class=FileResponse)
+async def get_derivative(
+    request: Request,
+    path: str = Depends(media_path),
+    width: int = Query(..., ge=1, le=derivatives.MAX_DIMENSION),
+    height: int = Query(..., ge=1, le=derivatives.MAX_DIMENSION),
+    image_format: Literal["webp", "jpeg"] = Query("webp", alias="format"),
+    v: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """The image resized to fit ``width`` x ``height``, as WebP or JPEG.
+
+    Never upscales. ``width`` and ``height`` must each be one of
+    ``[media] variant_sizes`` and the quality is ``compression_quality``,
+    so anonymous clients cannot make the server render, and cache, an
+    unbounded number of variants. Derivatives are rendered in a process
+    pool on first request and cached on disk by source content hash and
+    parameters; concurrent requests for one that is rendering share that
+    render.
+    """
+    sizes = config.media_variant_sizes
+    if width not in sizes or height not in sizes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"width and height must each be one of {', '.join(map(str, sizes))}")
+    transform = derivatives.Transform(width, height, image_format,
+                                      config.media_compression_quality)
+    return await derivative_response(request, path, transform, v, db)
+
+
+@router.post("/gc", response_model=MediaCollection)
+async def collect_media_garbage(
+    dry_run: bool = True,
+    current_user=Depends(require_admin)
+):
+    """Delete media files that no template uses (Admin only).
+
+    Defaults to a dry run that only reports them. Files modified within
+    ``[media] gc_grace_period`` seconds are kept; abandoned resumable
+    uploads older than ``[media] upload_expiry`` are removed too.
+    """
+    return await run_in_threadpool(collect_garbage, config.media_gc_grace_period, dry_run,
+                                   config.media_upload_expiry)
+
+
+@router.get("/{path:path}/usages", response_model=MediaUsages)
+async def get_media_usages(
+    path: str = Depends(media_path),
+    templates: TemplateRepository = Depends(template_repository)
+):
+    """Templates using a media file, e.g. ``/api/media/images/logo.png/usages``.
+
+    ``usage_count`` covers every template; the listed templates are the
+    caller's own (all of them for admins).
+    """
+    usage_count, using = await templates.using_media(path)
+    return FastJSONResponse({
+        "path": path,
+        "usage_count": usage_count,
+        "templates": [serialize_orm(t, TemplateSummary) for t in using],
+    })
+
+
+@router.delete("/{path:path}")
+async def delete_media(
+    path: str = Depends(media_path),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(require_admin)
+):
+    """Delete a media file (Admin only); refused with 409 while templates use it"""
+    def in_use(usage_count: int) -> HTTPException:
+        return HTTPException(
+            status_code=409,
+            detail=f"Media is used by {usage_count} template(s)")
+
+    usage_count = await crud_media.count_media_usages_async(db, path)
+    if usage_count:
+        raise in_use(usage_count)
+    try:
+        trashed = await run_in_threadpool(trash_media, path)
+    except (FileNotFoundError, IsADirectoryError):
+        raise HTTPException(status_code=404, detail="Media not found")
+    # A template saved between the count and the move would be left
+    # pointing at nothing, so count again with the file out of reach and
+    # put it back if one was
+    usage_count = await crud_media.count_media_usages_async(db, path)
+    if usage_count:
+        await run_in_threadpool(restore_media, trashed, path)
+        raise in_use(usage_count)
+    await run_in_threadpool(trashed.unlink)
+    await catalog_service.refresh([path])
+    return {"message": "Media deleted successfully"}
@@ -0,0 +1,24 @@
+from typing import Optional
+from fastapi import HTTPException, Query, Response
+from ..crud.pagination import decode_cursor, next_cursor
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def cursor_param(
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header of the previous page")
+) -> Optional[int]:
+    """Decode the ``cursor`` query parameter into the last id already seen"""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, items, limit: int):
+    cursor = next_cursor(items, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,74 @@
+import json
+import typing
+from datetime import date, datetime
+from typing import Any, AsyncIterable, Iterable, Optional, Type
+
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"),
+                      default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed.
+
+    Content is expected to be plain dicts/lists (see ``serialize_orm``), so
+    stored element lists go straight to the encoder without passing through
+    pydantic validation or ``jsonable_encoder``.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def ndjson_response(records: AsyncIterable[dict], filename: str) -> StreamingResponse:
+    """Stream ``records`` as NDJSON, one line per record as it is produced"""
+    async def lines():
+        async for record in records:
+            yield dump_json(record) + b"\n"
+
+    return StreamingResponse(
+        lines(), media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+def _nested_model(annotation) -> Optional[Type[BaseModel]]:
+    for candidate in (annotation, *typing.get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def serialize_orm(obj, schema: Type[BaseModel], fields: Optional[Iterable[str]] = None) -> dict:
+    """Build the response dict for ``schema`` straight from ORM attributes.
+
+    Only the attributes named by ``fields`` (default: every schema field)
+    are read, so columns left out of a sparse query are never touched.
+    Nested models are serialized the same way; values are not validated,
+    the database is already the source of truth for their shape.
+    """
+    data = {}
+    for name in (schema.model_fields if fields is None else fields):
+        value = getattr(obj, name)
+        field = schema.model_fields.get(name)
+        nested = _nested_model(field.annotation) if field else None
+        if nested is not None and value is not None:
+            value = serialize_orm(value, nested)
+        data[name] = value
+    return data
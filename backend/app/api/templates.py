@@ -1,88 +1,362 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from ..crud import template as crud_template
-from ..schemas.template import TemplateCreate, TemplateUpdate, TemplateResponse
-from ..api.auth import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from ..database import AsyncSessionLocal, get_async_db
+from ..repositories import TemplateRepository
+from ..schemas.bulk import BatchDelete, BulkResult
+from ..schemas.template import (TemplateCreate, TemplateImport, TemplateUpdate, TemplateResponse, TemplateSummary,
+                                TemplateSearchResult, TemplatePatchOperation, TemplateRevisionInfo,
+                                TemplateRevisionDocument)
+from ..crud.json_patch import JsonPatchConflict, JsonPatchError
+from ..api.auth import get_current_principal
+from ..api.pagination import cursor_param, set_next_cursor
+from ..api.fieldsets import fields_param
+from ..api.responses import FastJSONResponse, ndjson_response, serialize_orm
+from ..api.bulk import bulk_result, check_batch_size, read_rows, row_batches, validate_rows
+from ..api.conditional import if_match_version, not_modified, template_etag
+from ..crud import media as crud_media
+from ..crud.media import media_paths
+from ..media import variants
+from config import get_config
+
+config = get_config()
 
 router = APIRouter()
 
+# Names accepted by ?fields=; the summary columns are selectable too
+TEMPLATE_FIELDS = set(TemplateResponse.model_fields) | set(
+    TemplateSummary.model_fields)
+template_fields = fields_param(TEMPLATE_FIELDS)
+# Enough to compute a template's ETag without loading elements; the owner
+# is joined for its version
+ETAG_FIELDS = ("revision", "user")
+# One NDJSON export line; the owner is added by username
+EXPORT_FIELDS = ("id", "name", "description", "elements", "revision",
+                 "created_at", "updated_at")
+
+
+# Template reads return FastJSONResponse built by serialize_orm: the stored
+# element lists can hold hundreds of dicts, and validating them through
+# TemplateResponse on every response dominated request time. The
+# response_model declarations below are kept for the OpenAPI schema.
+
+
+def template_response(template, fields: Optional[List[str]] = None) -> FastJSONResponse:
+    return FastJSONResponse(serialize_orm(template, TemplateResponse, fields),
+                            headers={"ETag": template_etag(template, fields)})
+
+
+async def template_repository(
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_principal)
+) -> TemplateRepository:
+    return TemplateRepository(db, current_user)
+
+
+def found(template):
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return template
+
+
+def templates_response(templates, limit: int,
+                       fields: Optional[List[str]] = None) -> FastJSONResponse:
+    payload = FastJSONResponse(
+        [serialize_orm(t, TemplateResponse, fields) for t in templates])
+    set_next_cursor(payload, templates, limit)
+    return payload
+
 
 @router.get("/", response_model=List[TemplateResponse])
-def get_templates(
+async def get_templates(
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_param),
+    fields: Optional[List[str]] = Depends(template_fields),
+    element_type: Optional[str] = None,
+    source: Optional[str] = None,
+    templates: TemplateRepository = Depends(template_repository)
+):
+    """Get all templates for the current user.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch
+    the next page; ``skip`` still works for offset-based clients. Use
+    ``fields`` (e.g. ``fields=id,name,user``) to select only some columns;
+    the owner is only joined when ``user`` is requested. ``element_type``
+    (e.g. ``Video``) and ``source`` (e.g. ``/media/images/logo.png``) keep
+    only templates with a matching element.
+    """
+    page = await templates.list(skip=skip, limit=limit, after_id=after_id, fields=fields,
+                                element_type=element_type, source=source)
+    return templates_response(page, limit, fields)
+
+
+@router.get("/summary", response_model=List[TemplateSummary])
+async def get_template_summaries(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    after_id: Optional[int] = Depends(cursor_param),
+    element_type: Optional[str] = None,
+    source: Optional[str] = None,
+    templates: TemplateRepository = Depends(template_repository)
+):
+    """List the current user's templates without their elements.
+
+    Returns the element count and a content hash instead of the canvas
+    data; fetch ``GET /api/templates/{id}`` for the full payload. Takes
+    the same ``element_type`` and ``source`` filters as the full listing.
+    """
+    page = await templates.summaries(skip=skip, limit=limit, after_id=after_id,
+                                     element_type=element_type, source=source)
+    set_next_cursor(response, page, limit)
+    return page
+
+
+@router.get("/search", response_model=List[TemplateSearchResult])
+async def search_templates(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    templates: TemplateRepository = Depends(template_repository)
+):
+    """Full-text search over template names, descriptions and element text.
+
+    Every word must match, as a prefix (``lob men`` finds "Lobby menu").
+    Results are ranked, name matches first, and each carries a
+    ``snippet`` of the matching text. Admins search every template,
+    everyone else their own.
+    """
+    hits = await templates.search(q, skip=skip, limit=limit)
+    results = []
+    for template, snippet in hits:
+        result = serialize_orm(template, TemplateSummary)
+        result["snippet"] = snippet
+        results.append(result)
+    return FastJSONResponse(results)
+
+
+@router.get("/export")
+async def export_templates(current_user=Depends(get_current_principal)):
+    """Stream templates as NDJSON, one per line, with the owner's username.
+
+    Admins get every template, everyone else their own. Rows are read
+    through a server-side cursor, so memory use does not grow with the
+    library. ``POST /api/templates/import`` reads the same format.
+    """
+    async def records():
+        # The body outlives the request's dependencies, so it gets its own session
+        async with AsyncSessionLocal() as db:
+            templates = TemplateRepository(db, current_user)
+            async for template, owner in templates.stream(config.api_stream_batch_size):
+                record = serialize_orm(template, TemplateResponse, EXPORT_FIELDS)
+                record["owner"] = owner
+                yield record
+
+    return ndjson_response(records(), "templates.ndjson")
+
+
+@router.post("/import", response_model=BulkResult)
+async def import_templates(
+    request: Request,
+    templates: TemplateRepository = Depends(template_repository)
 ):
-    """Get all templates for the current user"""
-    templates = crud_template.get_templates_by_user(
-        db, user_id=current_user.id, skip=skip, limit=limit)
-    return templates
+    """Create templates from an NDJSON export (``application/x-ndjson``).
+
+    The body is read as it arrives and committed every
+    ``stream_batch_size`` lines; result indexes are line numbers. Ids are
+    not kept. Admin imports keep each template's ``owner`` when that user
+    exists. A JSON array body is accepted as well.
+    """
+    results = []
+    async for batch in row_batches(request, config.api_stream_batch_size):
+        valid, errors = validate_rows(batch, TemplateImport)
+        results.extend(errors)
+        results.extend(await templates.import_many(valid))
+    return bulk_result(results)
 
 
 @router.get("/{template_id}", response_model=TemplateResponse)
-def get_template(
+async def get_template(
+    request: Request,
     template_id: int,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    fields: Optional[List[str]] = Depends(template_fields),
+    templates: TemplateRepository = Depends(template_repository)
 ):
-    """Get a specific template by ID"""
-    template = crud_template.get_template(db, template_id=template_id)
-    if template is None:
-        raise HTTPException(status_code=404, detail="Template not found")
+    """Get a specific template by ID, optionally limited to ``fields``.
 
-    # Check if user owns the template or is admin
-    if template.created_by != current_user.id and current_user.role != "Admin":
-        raise HTTPException(status_code=403, detail="Not enough permissions")
+    Responses carry a strong ``ETag``; send it back in ``If-None-Match`` to
+    get a 304 without the template being loaded or serialized.
+    """
+    if "if-none-match" in request.headers:
+        current = found(await templates.get(template_id, ETAG_FIELDS))
+        cached = not_modified(request, template_etag(current, fields))
+        if cached is not None:
+            return cached
 
-    return template
+    template = found(await templates.get(template_id, fields))
+    return template_response(template, fields)
+
+
+@router.get("/{template_id}/player", response_model=TemplateResponse)
+async def get_template_for_player(
+    template_id: int,
+    screen_width: int = Query(..., ge=1, le=16384),
+    screen_height: int = Query(..., ge=1, le=16384),
+    canvas_width: Optional[int] = Query(None, ge=1, le=16384),
+    canvas_height: Optional[int] = Query(None, ge=1, le=16384),
+    image_format: Literal["webp", "jpeg"] = Query("webp", alias="format"),
+    db: AsyncSession = Depends(get_async_db),
+    templates: TemplateRepository = Depends(template_repository)
+):
+    """A template as a player with a ``screen_width`` x ``screen_height`` screen shows it.
+
+    Image elements showing catalogued media get a ``src`` for a resized
+    rendition just large enough for the element's box on that screen,
+    scaled from the canvas (default ``[templates] canvas_size``), so small
+    screens download and decode far fewer pixels. The original URL stays
+    in ``properties.originalSrc``. Use ``format=jpeg`` for players without
+    WebP support.
+    """
+    template = found(await templates.get(template_id))
+    default_width, default_height = variants.parse_size(config.template_canvas_size)
+    canvas = (canvas_width or default_width, canvas_height or default_height)
+    assets = await crud_media.get_media_assets_async(db, media_paths(template.elements))
+    payload = serialize_orm(template, TemplateResponse)
+    payload["elements"] = variants.player_elements(
+        template.elements, assets, (screen_width, screen_height), canvas, image_format)
+    return FastJSONResponse(payload)
 
 
 @router.post("/", response_model=TemplateResponse)
-def create_template(
+async def create_template(
     template: TemplateCreate,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    templates: TemplateRepository = Depends(template_repository)
 ):
     """Create a new template"""
-    return crud_template.create_template(db=db, template=template, user_id=current_user.id)
+    db_template = await templates.create(template)
+    return template_response(db_template)
+
+
+@router.post("/batch", response_model=BulkResult)
+async def create_templates(
+    request: Request,
+    templates: TemplateRepository = Depends(template_repository)
+):
+    """Create many templates in one transaction.
+
+    The body is a JSON array of templates. Invalid items are reported per
+    item; the others are created.
+    """
+    valid, errors = validate_rows(enumerate(await read_rows(request)), TemplateCreate)
+    ids = await templates.create_many([template for _, template in valid])
+    return bulk_result(errors + [
+        {"index": index, "status": "created", "id": template_id}
+        for (index, _), template_id in zip(valid, ids)
+    ])
+
+
+@router.post("/batch/delete", response_model=BulkResult)
+async def delete_templates(
+    batch: BatchDelete,
+    templates: TemplateRepository = Depends(template_repository)
+):
+    """Delete many templates in one transaction.
+
+    Each id is reported as ``deleted``, ``not_found`` or ``forbidden``;
+    templates that can be deleted are deleted even if others cannot.
+    """
+    check_batch_size(len(batch.ids))
+    outcomes = await templates.delete_many(batch.ids)
+    return bulk_result([
+        {"index": index, "status": outcomes[template_id], "id": template_id}
+        for index, template_id in enumerate(batch.ids)
+    ])
 
 
 @router.put("/{template_id}", response_model=TemplateResponse)
-def update_template(
+async def update_template(
+    request: Request,
     template_id: int,
     template: TemplateUpdate,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    templates: TemplateRepository = Depends(template_repository)
 ):
-    """Update a template"""
-    db_template = crud_template.get_template(db, template_id=template_id)
-    if db_template is None:
-        raise HTTPException(status_code=404, detail="Template not found")
+    """Update a template.
 
-    # Check if user owns the template or is admin
-    if db_template.created_by != current_user.id and current_user.role != "Admin":
-        raise HTTPException(status_code=403, detail="Not enough permissions")
+    A stale ``If-Match`` returns 412; a stale ``revision`` in the body
+    returns 409. Either way nothing is written. The response's ``ETag``
+    can go straight back in ``If-Match``.
+    """
+    db_template = found(await templates.update(
+        template_id, template, expected_revision=if_match_version(request, "t", template_id)))
+    return template_response(db_template)
 
-    return crud_template.update_template(db=db, template_id=template_id, template=template)
 
+@router.patch("/{template_id}", response_model=TemplateSummary)
+async def patch_template(
+    request: Request,
+    template_id: int,
+    operations: List[TemplatePatchOperation],
+    templates: TemplateRepository = Depends(template_repository)
+):
+    """Apply RFC 6902 JSON Patch operations to a template.
 
-@router.delete("/{template_id}")
-def delete_template(
+    Paths address ``/name``, ``/description`` and ``/elements``, e.g.
+    ``[{"op": "replace", "path": "/elements/3/x", "value": 120}]``. Returns
+    the template summary (with the new ``revision``) instead of echoing the
+    elements back. A failed ``test`` operation returns 409; a patch that
+    does not apply returns 422, and a stale ``If-Match`` returns 412. A
+    concurrent save between reading and writing the template returns 409.
+    """
+    try:
+        db_template = found(await templates.patch(
+            template_id,
+            [op.model_dump(exclude_unset=True, by_alias=True) for op in operations],
+            expected_revision=if_match_version(request, "t", template_id)))
+    except JsonPatchConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JsonPatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return FastJSONResponse(serialize_orm(db_template, TemplateSummary),
+                            headers={"ETag": template_etag(db_template)})
+
+
+@router.get("/{template_id}/revisions", response_model=List[TemplateRevisionInfo])
+async def get_template_revisions(
+    response: Response,
+    template_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_param),
+    templates: TemplateRepository = Depends(template_repository)
+):
+    """List a template's revisions, oldest first"""
+    revisions = found(await templates.revisions(
+        template_id, skip=skip, limit=limit, after_id=after_id))
+    set_next_cursor(response, revisions, limit)
+    return revisions
+
+
+@router.get("/{template_id}/revisions/{revision}", response_model=TemplateRevisionDocument)
+async def get_template_revision(
     template_id: int,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    revision: int,
+    templates: TemplateRepository = Depends(template_repository)
 ):
-    """Delete a template"""
-    db_template = crud_template.get_template(db, template_id=template_id)
-    if db_template is None:
-        raise HTTPException(status_code=404, detail="Template not found")
+    """Rebuild a template as it was at ``revision``"""
+    document = await templates.revision(template_id, revision)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return FastJSONResponse(document)
 
-    # Check if user owns the template or is admin
-    if db_template.created_by != current_user.id and current_user.role != "Admin":
-        raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    crud_template.delete_template(db=db, template_id=template_id)
+@router.delete("/{template_id}")
+async def delete_template(
+    request: Request,
+    template_id: int,
+    templates: TemplateRepository = Depends(template_repository)
+):
+    """Delete a template; honours ``If-Match`` with 412 on a stale ETag"""
+    found(await templates.delete(
+        template_id, expected_revision=if_match_version(request, "t", template_id)))
     return {"message": "Template deleted successfully"}
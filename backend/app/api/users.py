@@ -1,16 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ..database import AsyncSessionLocal, get_async_db
 from ..crud import user as crud_user
-from ..schemas.user import UserCreate, UserResponse, UserUpdate
-from ..api.auth import get_current_user
+from sqlalchemy.exc import IntegrityError
+from ..schemas.user import UserCreate, UserImport, UserResponse, UserUpdate
+from ..schemas.bulk import BulkResult
+from ..api.auth import get_current_principal
+from ..api.pagination import cursor_param, set_next_cursor
+from ..api.fieldsets import fields_param
+from ..api.responses import FastJSONResponse, ndjson_response, serialize_orm
+from ..api.bulk import bulk_result, row_batches, validate_rows
+from ..api.conditional import if_match_version, not_modified, user_etag
+from config import get_config
+
+config = get_config()
 
 router = APIRouter()
 
+user_fields = fields_param(UserResponse.model_fields)
+EXPORT_FIELDS = tuple(name for name in UserResponse.model_fields if name != "version")
 
-def require_admin(current_user=Depends(get_current_user)):
-    if current_user.role != "Admin":
+
+async def require_admin(current_user=Depends(get_current_principal)):
+    if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
@@ -19,124 +32,222 @@ def require_admin(current_user=Depends(get_current_user)):
 
 
 @router.get("/", response_model=List[UserResponse])
-def get_users(
+async def get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    after_id: Optional[int] = Depends(cursor_param),
+    fields: Optional[List[str]] = Depends(user_fields),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(require_admin)
 ):
-    """Get all users (Admin only)"""
-    users = crud_user.get_users(db, skip=skip, limit=limit)
+    """Get all users (Admin only), paginated by cursor or offset"""
+    users = await crud_user.get_users_async(
+        db, skip=skip, limit=limit, after_id=after_id, fields=fields)
+    if fields:
+        sparse = FastJSONResponse(
+            [serialize_orm(u, UserResponse, fields) for u in users])
+        set_next_cursor(sparse, users, limit)
+        return sparse
+    set_next_cursor(response, users, limit)
     return users
 
 
 @router.get("/active", response_model=List[UserResponse])
-def get_active_users(
-    db: Session = Depends(get_db),
+async def get_active_users(
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(require_admin)
 ):
     """Get all active users (Admin only)"""
-    users = crud_user.get_active_users(db)
+    users = await crud_user.get_active_users_async(db)
     return users
 
 
 @router.get("/role/{role}", response_model=List[UserResponse])
-def get_users_by_role(
+async def get_users_by_role(
     role: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(require_admin)
 ):
     """Get users by role (Admin only)"""
-    users = crud_user.get_users_by_role(db, role=role)
+    users = await crud_user.get_users_by_role_async(db, role=role)
     return users
 
 
 @router.post("/", response_model=UserResponse)
-def create_user(
+async def create_user(
     user: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(require_admin)
 ):
     """Create a new user (Admin only)"""
     # Check if user already exists
-    db_user = crud_user.get_user_by_username(db, username=user.username)
+    db_user = await crud_user.get_user_by_username_async(db, username=user.username)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Username already registered"
         )
 
-    db_user = crud_user.get_user_by_email(db, email=user.email)
+    db_user = await crud_user.get_user_by_email_async(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Email already registered"
         )
 
-    return crud_user.create_user(db=db, user=user)
+    return await crud_user.create_user_async(db=db, user=user)
+
+
+@router.post("/import", response_model=BulkResult)
+async def import_users(
+    request: Request,
+    reset_passwords: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(require_admin)
+):
+    """Create many users (Admin only).
+
+    The body is a JSON array of users or, with ``Content-Type: text/csv``,
+    CSV with a header row (``username,email,password,role,...``); either
+    is created in one transaction. NDJSON (``application/x-ndjson``, as
+    written by ``GET /api/users/export``) is streamed and committed every
+    ``stream_batch_size`` lines. Each row takes ``password`` or an
+    existing bcrypt ``hashed_password``; rows with neither (such as an
+    export without password hashes) fail unless ``reset_passwords`` is
+    set, which gives them a random password and ``force_password_change``.
+    Invalid and duplicate rows are reported per row; the others are created.
+    """
+    results = []
+    async for batch in row_batches(request, config.api_stream_batch_size):
+        valid, errors = validate_rows(batch, UserImport)
+        results.extend(errors)
+        results.extend(await import_batch(db, valid, reset_passwords))
+    return bulk_result(results)
+
+
+async def import_batch(db: AsyncSession, rows, reset_passwords: bool = False) -> List[dict]:
+    """Results of importing one batch; earlier batches are already committed.
+
+    A user registered concurrently fails the batch's INSERT; it is rolled
+    back and planned again once, which reports that row as a duplicate.
+    If it conflicts again, every row of the batch is reported failed.
+    """
+    for _ in range(2):
+        try:
+            return await crud_user.import_users_async(db, rows, reset_passwords)
+        except IntegrityError:
+            await db.rollback()
+    return [{"index": index, "status": "error",
+             "detail": "A user was registered concurrently; retry this row"}
+            for index, _ in rows]
+
+
+@router.get("/export")
+async def export_users(
+    include_password_hashes: bool = False,
+    current_user=Depends(require_admin)
+):
+    """Stream every user as NDJSON (Admin only).
+
+    Rows are read through a server-side cursor, so memory use does not
+    grow with the table. Password hashes are left out unless
+    ``include_password_hashes`` is set. ``POST /api/users/import`` takes an
+    export with hashes as is; one without them needs ``reset_passwords``.
+    """
+    fields = EXPORT_FIELDS + (("hashed_password",) if include_password_hashes else ())
+
+    async def records():
+        # The body outlives the request's dependencies, so it gets its own session
+        async with AsyncSessionLocal() as db:
+            async for db_user in crud_user.stream_users_async(db, config.api_stream_batch_size):
+                yield serialize_orm(db_user, UserResponse, fields)
+
+    return ndjson_response(records(), "users.ndjson")
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(
+async def get_user(
+    request: Request,
     user_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[List[str]] = Depends(user_fields),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(require_admin)
 ):
-    """Get a specific user (Admin only)"""
-    user = crud_user.get_user(db, user_id=user_id)
+    """Get a specific user (Admin only), optionally limited to ``fields``.
+
+    Honours ``If-None-Match`` with 304 against the returned ``ETag``.
+    """
+    user = await crud_user.get_user_async(db, user_id=user_id, fields=fields)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+
+    etag = user_etag(user, fields)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    return FastJSONResponse(serialize_orm(user, UserResponse, fields),
+                            headers={"ETag": etag})
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(
+async def update_user(
+    request: Request,
     user_id: int,
     user: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(require_admin)
 ):
-    """Update a user (Admin only)"""
-    db_user = crud_user.update_user(db, user_id=user_id, user=user)
+    """Update a user (Admin only).
+
+    A stale ``If-Match`` returns 412; a stale ``version`` in the body
+    returns 409.
+    """
+    db_user = await crud_user.update_user_async(
+        db, user_id=user_id, user=user,
+        expected_version=if_match_version(request, "u", user_id))
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return db_user
+    return FastJSONResponse(serialize_orm(db_user, UserResponse),
+                            headers={"ETag": user_etag(db_user)})
 
 
 @router.delete("/{user_id}")
-def delete_user(
+async def delete_user(
+    request: Request,
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(require_admin)
 ):
-    """Delete a user (Admin only)"""
-    db_user = crud_user.delete_user(db, user_id=user_id)
+    """Delete a user (Admin only); honours ``If-Match`` with 412"""
+    db_user = await crud_user.delete_user_async(
+        db, user_id=user_id, expected_version=if_match_version(request, "u", user_id))
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted successfully"}
 
 
 @router.post("/{user_id}/deactivate")
-def deactivate_user(
+async def deactivate_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(require_admin)
 ):
     """Deactivate a user (Admin only)"""
-    db_user = crud_user.deactivate_user(db, user_id=user_id)
+    db_user = await crud_user.deactivate_user_async(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deactivated successfully"}
 
 
 @router.post("/{user_id}/activate")
-def activate_user(
+async def activate_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(require_admin)
 ):
     """Activate a user (Admin only)"""
-    db_user = crud_user.activate_user(db, user_id=user_id)
+    db_user = await crud_user.activate_user_async(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User activated successfully"}
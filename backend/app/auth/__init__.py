@@ -1,4 +1,12 @@
-from .security import verify_password, get_password_hash, create_access_token, verify_token
+from .security import (
+    verify_password, get_password_hash, verify_password_async,
+    get_password_hash_async, create_access_token, create_user_access_token,
+    verify_token
+)
+from .principal import Principal
+from .hashing import hashing_service, HashingServiceBusy
 
-__all__ = ["verify_password", "get_password_hash",
-           "create_access_token", "verify_token"]
+__all__ = ["verify_password", "get_password_hash", "verify_password_async",
+           "get_password_hash_async", "create_access_token",
+           "create_user_access_token", "verify_token", "hashing_service",
+           "HashingServiceBusy", "Principal"]
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import get_config
+
+config = get_config()
+
+
+class PrincipalCache:
+    """Bounded, TTL-based in-process cache of authenticated users.
+
+    Entries are keyed by the token subject (the username) and hold detached
+    ``User`` instances. Writers in ``crud.user`` call ``invalidate`` so that
+    role, activation and password changes are visible on the next request.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: int = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[str]):
+        if key is None:
+            return
+
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_user(self, user_id: int):
+        """Drop every entry holding ``user_id``, whatever username it is under"""
+        with self._lock:
+            stale = [key for key, (_, value) in self._entries.items()
+                     if getattr(value, "id", None) == user_id]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class TokenVersionCache:
+    """Small map of user id to the current ``(token_version, is_active)``.
+
+    Access tokens carry the version they were issued with; a token is only
+    honoured while it matches this map. Local writers update the map as soon
+    as they bump a version, and the TTL bounds how long another worker can
+    keep accepting a token that was revoked elsewhere.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: int = 30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[Tuple[int, bool]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id: int, token_version: int, is_active: bool):
+        with self._lock:
+            self._entries[user_id] = (
+                time.monotonic() + self.ttl, (token_version, bool(is_active)))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_size=config.principal_cache_size,
+    ttl=config.principal_cache_ttl,
+)
+
+token_versions = TokenVersionCache(
+    max_size=config.token_version_cache_size,
+    ttl=config.token_version_cache_ttl,
+)
@@ -0,0 +1,140 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from passlib.context import CryptContext
+
+from config import get_config
+
+config = get_config()
+
+# Each worker process builds its own context on first use
+_worker_context: Optional[CryptContext] = None
+
+
+def _get_worker_context() -> CryptContext:
+    global _worker_context
+    if _worker_context is None:
+        _worker_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _worker_context
+
+
+def _hash_in_worker(password: str) -> str:
+    return _get_worker_context().hash(password)
+
+
+def _hash_batch_in_worker(passwords: List[str]) -> List[str]:
+    context = _get_worker_context()
+    return [context.hash(password) for password in passwords]
+
+
+def _verify_in_worker(plain_password: str, hashed_password: str) -> bool:
+    return _get_worker_context().verify(plain_password, hashed_password)
+
+
+class HashingServiceBusy(Exception):
+    """Raised when the hashing queue is full and the request should be shed."""
+
+
+class HashingService:
+    """Runs bcrypt hashing and verification in a dedicated process pool.
+
+    bcrypt is deliberately slow, so calling it on the event loop stalls every
+    other request on the worker. The service keeps at most ``workers`` jobs
+    running plus ``queue_size`` jobs waiting; anything beyond that is rejected
+    immediately with ``HashingServiceBusy`` instead of queueing unboundedly.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn avoids forking a server process that owns threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise HashingServiceBusy("Password hashing queue is full")
+            self._in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def _submit(self, fn, *args):
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash_in_worker, password)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """Hash a batch of passwords across every worker, keeping their order.
+
+        The batch is split into a few chunks per worker and counts as a
+        single job against the queue limit, so a bulk import is never shed
+        half-way. Logins still queue behind it while it runs.
+        """
+        if not passwords:
+            return []
+        self._acquire()
+        try:
+            executor = self._get_executor()
+            size = -(-len(passwords) // (self.workers * 4))
+            chunks = await asyncio.gather(*(
+                asyncio.wrap_future(executor.submit(
+                    _hash_batch_in_worker, passwords[start:start + size]))
+                for start in range(0, len(passwords), size)
+            ))
+        finally:
+            self._release()
+        return [hashed for chunk in chunks for hashed in chunk]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(_verify_in_worker, plain_password, hashed_password)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "rejected": self.rejected,
+            }
+
+
+hashing_service = HashingService(
+    workers=config.hash_workers or os.cpu_count() or 1,
+    queue_size=config.hash_queue_size,
+)
@@ -0,0 +1,227 @@
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from anyio import to_thread
+
+from config import get_config
+
+config = get_config()
+
+# The SQLite store purges expired failures of every key, and enforces
+# its row cap, once per this many recorded failures
+PURGE_INTERVAL = 100
+
+
+def _attempt_key(username: str, client_ip: str) -> str:
+    return f"{username.lower()}|{client_ip}"
+
+
+class MemoryAttemptStore:
+    """Sliding-window failed-login tracker kept in process memory.
+
+    Each key maps to a small ring of the last ``max_attempts`` failure
+    timestamps, so per-key state never grows past ``max_attempts`` floats.
+    Keys are kept in LRU order and the least recently used are evicted once
+    ``max_entries`` is reached.
+    """
+
+    # Calls only take a lock and touch a dict, so they run on the event loop
+    blocking = False
+
+    def __init__(self, max_attempts: int, window: int, max_entries: int = 10000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_entries = max_entries
+        self._failures: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def retry_after(self, key: str, now: float) -> int:
+        with self._lock:
+            failures = self._failures.get(key)
+            if failures is None or len(failures) < self.max_attempts:
+                return 0
+
+            unlock_at = failures[0] + self.window
+            if unlock_at <= now:
+                del self._failures[key]
+                return 0
+            return int(unlock_at - now) + 1
+
+    def record_failure(self, key: str, now: float):
+        with self._lock:
+            failures = self._failures.get(key)
+            if failures is None:
+                failures = self._failures[key] = array("d")
+            else:
+                self._failures.move_to_end(key)
+
+            # Drop failures that have slid out of the window
+            while failures and failures[0] + self.window <= now:
+                failures.pop(0)
+            failures.append(now)
+            if len(failures) > self.max_attempts:
+                failures.pop(0)
+
+            while len(self._failures) > self.max_entries:
+                self._failures.popitem(last=False)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+class SqliteAttemptStore:
+    """Failed-login tracker persisted in a small SQLite file.
+
+    Lockouts survive restarts and are shared by every worker process that
+    points at the same file. A key's expired failures are dropped when it
+    fails again; every ``PURGE_INTERVAL`` failures the expired rows of all
+    keys go too, and the oldest beyond ``max_entries`` keys' worth of rows
+    are evicted, so keys that never return cannot grow the file.
+    Calls wait on SQLite locks held by other workers, so the tracker runs
+    them in a worker thread.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_attempts: int, window: int, max_entries: int = 10000):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_rows = max_entries * max(1, max_attempts)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS login_failures (
+                    key TEXT NOT NULL,
+                    failed_at REAL NOT NULL
+                )
+            """)
+            connection.execute("""
+                CREATE INDEX IF NOT EXISTS ix_login_failures_key
+                ON login_failures (key, failed_at)
+            """)
+            connection.execute("""
+                CREATE INDEX IF NOT EXISTS ix_login_failures_failed_at
+                ON login_failures (failed_at)
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def retry_after(self, key: str, now: float) -> int:
+        rows = self._connection().execute("""
+            SELECT failed_at FROM login_failures
+            WHERE key = ? AND failed_at > ?
+            ORDER BY failed_at DESC LIMIT ?
+        """, (key, now - self.window, self.max_attempts)).fetchall()
+        if len(rows) < self.max_attempts:
+            return 0
+        return int(rows[-1][0] + self.window - now) + 1
+
+    def record_failure(self, key: str, now: float):
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM login_failures WHERE key = ? AND failed_at <= ?",
+                (key, now - self.window))
+            connection.execute(
+                "INSERT INTO login_failures (key, failed_at) VALUES (?, ?)",
+                (key, now))
+        with self._lock:
+            self._writes += 1
+            due = self._writes % PURGE_INTERVAL == 0
+        if due:
+            self.purge(now)
+
+    def purge(self, now: float):
+        """Delete expired failures of every key, then the oldest over the row cap"""
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM login_failures WHERE failed_at <= ?", (now - self.window,))
+            (rows,) = connection.execute("SELECT COUNT(*) FROM login_failures").fetchone()
+            if rows > self.max_rows:
+                connection.execute("""
+                    DELETE FROM login_failures WHERE rowid IN (
+                        SELECT rowid FROM login_failures ORDER BY failed_at LIMIT ?)
+                """, (rows - self.max_rows,))
+
+    def reset(self, key: str):
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM login_failures WHERE key = ?", (key,))
+
+
+class LoginAttemptTracker:
+    """Rejects logins for a username/client IP pair after repeated failures.
+
+    ``retry_after`` is checked before any database query or bcrypt work, so
+    a locked-out attacker costs a lookup instead of a hash. Stores that
+    block (SQLite) are called from a worker thread so a busy lockout file
+    never stalls the event loop.
+    """
+
+    def __init__(self, store, enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+        self.rejected = 0
+
+    async def _call(self, method, *args):
+        if self.store.blocking:
+            return await to_thread.run_sync(method, *args)
+        return method(*args)
+
+    async def retry_after(self, username: str, client_ip: str) -> int:
+        if not self.enabled:
+            return 0
+        seconds = await self._call(
+            self.store.retry_after, _attempt_key(username, client_ip), time.time())
+        if seconds:
+            self.rejected += 1
+        return seconds
+
+    async def record_failure(self, username: str, client_ip: str):
+        if self.enabled:
+            await self._call(
+                self.store.record_failure, _attempt_key(username, client_ip), time.time())
+
+    async def reset(self, username: str, client_ip: str):
+        if self.enabled:
+            await self._call(self.store.reset, _attempt_key(username, client_ip))
+
+
+def _build_store():
+    if config.lockout_store == "sqlite":
+        return SqliteAttemptStore(
+            str(config.resolve_path(config.lockout_store_path)),
+            max_attempts=config.max_login_attempts,
+            window=config.lockout_duration,
+            max_entries=config.lockout_max_entries,
+        )
+    return MemoryAttemptStore(
+        max_attempts=config.max_login_attempts,
+        window=config.lockout_duration,
+        max_entries=config.lockout_max_entries,
+    )
+
+
+login_attempts = LoginAttemptTracker(
+    _build_store(),
+    enabled=config.max_login_attempts > 0 and config.lockout_duration > 0,
+)
@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Optional
+
+from config import get_config
+
+config = get_config()
+
+# Bit positions are part of the token format; only ever append to this list
+PERMISSION_BITS: List[str] = [
+    "can_create_content",
+    "can_edit_content",
+    "can_publish_content",
+    "can_schedule_content",
+    "can_manage_users",
+    "can_manage_screens",
+    "can_view_analytics",
+    "can_manage_settings",
+]
+
+ROLE_PERMISSIONS = {
+    "Admin": lambda: config.admin_permissions,
+    "Editor": lambda: config.editor_permissions,
+    "Viewer": lambda: config.viewer_permissions,
+    "Client": lambda: config.client_permissions,
+}
+
+
+def permissions_to_mask(role: Optional[str], permissions: Optional[Dict[str, Any]]) -> int:
+    """Pack the role defaults plus explicitly granted permissions into a bitmask"""
+    granted = set(ROLE_PERMISSIONS.get(role, list)())
+    granted.update(name for name, value in (permissions or {}).items() if value)
+
+    mask = 0
+    for bit, name in enumerate(PERMISSION_BITS):
+        if name in granted:
+            mask |= 1 << bit
+    return mask
+
+
+def mask_to_permissions(mask: int) -> Dict[str, bool]:
+    return {name: bool(mask & (1 << bit)) for bit, name in enumerate(PERMISSION_BITS)}
+
+
+class Principal:
+    """The authenticated caller as described by its access token claims"""
+
+    __slots__ = ("id", "username", "role", "permissions", "token_version")
+
+    def __init__(self, id: int, username: str, role: str, permissions: int = 0, token_version: int = 0):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.permissions = permissions
+        self.token_version = token_version
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            permissions=permissions_to_mask(user.role, user.permissions),
+            token_version=user.token_version or 0,
+        )
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "Admin"
+
+    def has_permission(self, name: str) -> bool:
+        return bool(self.permissions & (1 << PERMISSION_BITS.index(name)))
@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from ..schemas.user import TokenData
+from .hashing import hashing_service
+from .principal import permissions_to_mask
 
 # Configuration
 SECRET_KEY = "your-secret-key-here-change-in-production"
@@ -20,6 +22,18 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_service.verify(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await hashing_service.hash(password)
+
+
+async def get_password_hashes_async(passwords: List[str]) -> List[str]:
+    return await hashing_service.hash_many(passwords)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -31,13 +45,35 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def create_user_access_token(user, expires_delta: Optional[timedelta] = None):
+    """Issue a token carrying everything needed to authorize the user
+    without reloading their row: id, role, a permission bitmask and the
+    token version used for revocation."""
+    return create_access_token(
+        data={
+            "sub": user.username,
+            "uid": user.id,
+            "role": user.role,
+            "perms": permissions_to_mask(user.role, user.permissions),
+            "ver": user.token_version or 0,
+        },
+        expires_delta=expires_delta,
+    )
+
+
 def verify_token(token: str) -> Optional[TokenData]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: Optional[str] = payload.get("sub")
         if username is None:
             return None
-        token_data = TokenData(username=username)
+        token_data = TokenData(
+            username=username,
+            user_id=payload.get("uid"),
+            role=payload.get("role"),
+            permissions=payload.get("perms", 0),
+            token_version=payload.get("ver"),
+        )
         return token_data
     except JWTError:
         return None
@@ -1,9 +1,15 @@
 from .user import (
     get_user, get_user_by_username, get_user_by_email, get_users,
-    create_user, update_user, delete_user, authenticate_user
+    create_user, update_user, delete_user, authenticate_user,
+    get_user_async, get_user_by_username_async, get_user_by_email_async,
+    get_users_async, create_user_async, update_user_async, delete_user_async,
+    authenticate_user_async
 )
 
 __all__ = [
     "get_user", "get_user_by_username", "get_user_by_email", "get_users",
-    "create_user", "update_user", "delete_user", "authenticate_user"
+    "create_user", "update_user", "delete_user", "authenticate_user",
+    "get_user_async", "get_user_by_username_async", "get_user_by_email_async",
+    "get_users_async", "create_user_async", "update_user_async",
+    "delete_user_async", "authenticate_user_async"
 ]
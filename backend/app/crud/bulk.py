@@ -0,0 +1,12 @@
+from typing import Iterator, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Ids or values per IN (...) list. SQLite caps bound parameters per
+# statement (999 before 3.32), so large sets are looked up in chunks.
+IN_CHUNK_SIZE = 500
+
+
+def chunked(items: Sequence[T], size: int = IN_CHUNK_SIZE) -> Iterator[List[T]]:
+    for start in range(0, len(items), size):
+        yield list(items[start:start + size])
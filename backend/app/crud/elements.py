@@ -0,0 +1,90 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from ..models.template import Template, TemplateElement
+from .bulk import chunked
+
+# Element-level index over templates. template_elements holds one row per
+# element with its type, the media or feed it shows and its bounding box,
+# rewritten by the CRUD layer whenever a template's elements are saved.
+# Filters on type and source are then indexed lookups.
+
+# Element properties naming what the element displays, in priority order:
+# Image and Video src, Webpage url, RSS feed url
+SOURCE_PROPERTIES = ("src", "url", "feedUrl")
+
+# Longer sources (pasted data: URIs and the like) are not indexed
+MAX_SOURCE_LENGTH = 2048
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def element_source(element: Dict[str, Any]) -> Optional[str]:
+    properties = element.get("properties")
+    if not isinstance(properties, dict):
+        return None
+    for name in SOURCE_PROPERTIES:
+        value = properties.get(name)
+        if (isinstance(value, str) and value and len(value) <= MAX_SOURCE_LENGTH
+                and not value.startswith("data:")):
+            return value
+    return None
+
+
+def element_rows(template_id: int, elements: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """The template_elements rows for one template's elements"""
+    rows = []
+    for position, element in enumerate(elements or ()):
+        if not isinstance(element, dict):
+            continue
+        element_type = element.get("type")
+        rows.append({
+            "template_id": template_id,
+            "position": position,
+            "type": element_type if isinstance(element_type, str) else None,
+            "source": element_source(element),
+            "x": _number(element.get("x")),
+            "y": _number(element.get("y")),
+            "width": _number(element.get("width")),
+            "height": _number(element.get("height")),
+        })
+    return rows
+
+
+def unindex_elements(db: Session, template_ids: Sequence[int]):
+    for chunk in chunked(list(template_ids)):
+        db.execute(delete(TemplateElement).where(TemplateElement.template_id.in_(chunk)))
+
+
+def index_elements(db: Session, rows: Iterable[Tuple[int, Any]], replace: bool = True):
+    """Rewrite the element rows of ``(template id, elements)`` pairs.
+
+    Runs in the caller's transaction. ``replace=False`` skips clearing old
+    rows, for templates that were just created.
+    """
+    rows = list(rows)
+    if replace:
+        unindex_elements(db, [template_id for template_id, _ in rows])
+    params = [row for template_id, elements in rows
+              for row in element_rows(template_id, elements)]
+    if params:
+        db.execute(insert(TemplateElement), params)
+
+
+def with_elements(query, element_type: Optional[str] = None, source: Optional[str] = None):
+    """Limit a template query to templates having an element that matches.
+
+    Both filters must hold for the same element.
+    """
+    if element_type is None and source is None:
+        return query
+    matching = select(TemplateElement.template_id)
+    if element_type is not None:
+        matching = matching.where(TemplateElement.type == element_type)
+    if source is not None:
+        matching = matching.where(TemplateElement.source == source)
+    return query.filter(Template.id.in_(matching))
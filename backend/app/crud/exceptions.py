@@ -0,0 +1,11 @@
+class VersionConflict(Exception):
+    """The row changed since the version the caller based its write on"""
+
+    def __init__(self, current_version: int):
+        super().__init__(
+            f"Version conflict: the current version is {current_version}")
+        self.current_version = current_version
+
+
+class PermissionDenied(Exception):
+    """The row exists but the caller is not allowed to change it"""
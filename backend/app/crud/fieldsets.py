@@ -0,0 +1,25 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+from sqlalchemy.orm import joinedload, load_only, noload
+
+
+def fieldset_options(model, fields: Optional[Sequence[str]], relationships: Dict[str, object],
+                     required: Iterable[str] = ("id",)) -> List:
+    """Loader options that fetch only the requested columns and relationships.
+
+    ``fields=None`` keeps the full default shape: every column plus every
+    relationship in ``relationships`` eagerly joined. Otherwise only the
+    requested columns (plus ``required`` ones the caller needs internally)
+    are selected, and relationships that were not asked for are never
+    loaded at all.
+    """
+    if fields is None:
+        return [joinedload(attribute) for attribute in relationships.values()]
+
+    wanted = set(fields) | set(required)
+    columns = [getattr(model, name) for name in wanted
+               if name not in relationships]
+    options = [load_only(*columns)]
+    for name, attribute in relationships.items():
+        options.append(joinedload(attribute) if name in wanted
+                       else noload(attribute))
+    return options
@@ -0,0 +1,123 @@
+import copy
+from typing import Any, Dict, List, Tuple
+
+# RFC 6902 JSON Patch and RFC 6901 JSON Pointer, limited to what template
+# documents need: plain dicts, lists and JSON scalars.
+
+OPERATIONS = ("add", "remove", "replace", "move", "copy", "test")
+
+
+class JsonPatchError(ValueError):
+    """The patch is malformed or does not apply to the document"""
+
+
+class JsonPatchConflict(JsonPatchError):
+    """A ``test`` operation did not match the current document"""
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~")
+            for token in pointer[1:].split("/")]
+
+
+def _list_index(container: list, token: str, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _resolve(document: Any, tokens: List[str]) -> Any:
+    value = document
+    for token in tokens:
+        if isinstance(value, dict):
+            if token not in value:
+                raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+            value = value[token]
+        elif isinstance(value, list):
+            value = value[_list_index(value, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return value
+
+
+def _parent(document: Any, tokens: List[str]) -> Tuple[Any, str]:
+    if not tokens:
+        raise JsonPatchError("Operation cannot target the document root")
+    return _resolve(document, tokens[:-1]), tokens[-1]
+
+
+def _add(document: Any, tokens: List[str], value: Any):
+    container, key = _parent(document, tokens)
+    if isinstance(container, dict):
+        container[key] = value
+    elif isinstance(container, list):
+        container.insert(_list_index(container, key, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to /{'/'.join(tokens)}")
+
+
+def _remove(document: Any, tokens: List[str]) -> Any:
+    container, key = _parent(document, tokens)
+    if isinstance(container, dict):
+        if key not in container:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+        return container.pop(key)
+    if isinstance(container, list):
+        return container.pop(_list_index(container, key, allow_end=False))
+    raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def _apply_operation(document: Any, operation: Dict[str, Any]):
+    op = operation.get("op")
+    if op not in OPERATIONS:
+        raise JsonPatchError(f"Unsupported operation: {op!r}")
+    if "path" not in operation:
+        raise JsonPatchError(f"'{op}' operation is missing 'path'")
+    tokens = parse_pointer(operation["path"])
+
+    if op in ("add", "replace", "test") and "value" not in operation:
+        raise JsonPatchError(f"'{op}' operation is missing 'value'")
+
+    if op == "add":
+        _add(document, tokens, copy.deepcopy(operation["value"]))
+    elif op == "remove":
+        _remove(document, tokens)
+    elif op == "replace":
+        _remove(document, tokens)
+        _add(document, tokens, copy.deepcopy(operation["value"]))
+    elif op == "test":
+        if _resolve(document, tokens) != operation["value"]:
+            raise JsonPatchConflict(
+                f"Test failed at {operation['path']}")
+    else:
+        if "from" not in operation:
+            raise JsonPatchError(f"'{op}' operation is missing 'from'")
+        source = parse_pointer(operation["from"])
+        if op == "move":
+            if tokens[:len(source)] == source and tokens != source:
+                raise JsonPatchError("Cannot move a value into one of its children")
+            _add(document, tokens, _remove(document, source))
+        else:
+            _add(document, tokens, copy.deepcopy(_resolve(document, source)))
+
+
+def apply_patch(document: Any, operations: List[Dict[str, Any]]) -> Any:
+    """Apply ``operations`` to a copy of ``document`` and return the copy.
+
+    Either every operation applies or a ``JsonPatchError`` is raised and the
+    original document is left untouched.
+    """
+    patched = copy.deepcopy(document)
+    for operation in operations:
+        _apply_operation(patched, operation)
+    return patched
+
@@ -0,0 +1,169 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models.media import MediaAsset, MediaReference
+from ..media.storage import media_reference
+from .bulk import chunked
+
+# media_references maps each file under the media root to the templates
+# using it. The CRUD layer keeps it in step with template saves: new
+# templates insert their paths, edits apply only the difference between
+# the stored and the new set, deletes drop the template's rows.
+
+
+def media_paths(elements: Optional[List[Dict[str, Any]]]) -> Set[str]:
+    """Every media path referenced anywhere in a template's elements"""
+    paths = set()
+    pending = list(elements or ())
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+        else:
+            path = media_reference(value)
+            if path is not None:
+                paths.add(path)
+    return paths
+
+
+def _stored_paths(db: Session, template_ids: Sequence[int]) -> Dict[int, Set[str]]:
+    stored = {template_id: set() for template_id in template_ids}
+    for chunk in chunked(list(template_ids)):
+        for path, template_id in db.execute(
+                select(MediaReference.path, MediaReference.template_id)
+                .where(MediaReference.template_id.in_(chunk))):
+            stored[template_id].add(path)
+    return stored
+
+
+def index_media_references(db: Session, rows: Iterable[Tuple[int, Any]], replace: bool = True):
+    """Record the media used by ``(template id, elements)`` pairs.
+
+    Runs in the caller's transaction. Existing templates only have the
+    paths that were added or removed written; ``replace=False`` skips
+    reading the stored set, for templates that were just created.
+    """
+    rows = list(rows)
+    stored = _stored_paths(db, [template_id for template_id, _ in rows]) if replace else {}
+    added, removed = [], []
+    for template_id, elements in rows:
+        current = media_paths(elements)
+        previous = stored.get(template_id, set())
+        added.extend({"path": path, "template_id": template_id}
+                     for path in current - previous)
+        removed.extend((template_id, path) for path in previous - current)
+
+    if added:
+        db.execute(insert(MediaReference), added)
+    for template_id, path in removed:
+        db.execute(delete(MediaReference).where(
+            MediaReference.template_id == template_id, MediaReference.path == path))
+
+
+def unindex_media_references(db: Session, template_ids: Sequence[int]):
+    for chunk in chunked(list(template_ids)):
+        db.execute(delete(MediaReference).where(MediaReference.template_id.in_(chunk)))
+
+
+def count_media_usages(db: Session, path: str) -> int:
+    return db.scalar(select(func.count()).select_from(MediaReference)
+                     .where(MediaReference.path == path))
+
+
+def referenced_paths(db: Session, paths: Sequence[str]) -> Set[str]:
+    """The subset of ``paths`` used by at least one template"""
+    found = set()
+    for chunk in chunked(list(paths)):
+        found.update(db.scalars(select(MediaReference.path).distinct()
+                                .where(MediaReference.path.in_(chunk))))
+    return found
+
+
+# Orders GET /api/media can list the catalog in; each has an index led
+# by the column (after type), with path breaking ties
+ASSET_SORT_COLUMNS = {
+    "path": MediaAsset.path,
+    "size": MediaAsset.size,
+    "modified": MediaAsset.mtime_ns,
+}
+
+
+def asset_sort_key(asset: MediaAsset, sort: str) -> list:
+    """Keyset cursor key of ``asset`` in the ``sort`` order"""
+    if sort == "path":
+        return [asset.path]
+    return [getattr(asset, ASSET_SORT_COLUMNS[sort].key), asset.path]
+
+
+def list_media_assets(
+    db: Session,
+    media_type: Optional[str] = None,
+    mime: Optional[str] = None,
+    q: Optional[str] = None,
+    sort: str = "path",
+    descending: bool = False,
+    limit: int = 100,
+    after: Optional[list] = None
+) -> List[MediaAsset]:
+    """A page of the media catalog.
+
+    ``mime`` is a full type or a ``image/*`` style prefix; ``q`` matches
+    anywhere in the path. ``after`` is the sort key of the last row of
+    the previous page (see ``asset_sort_key``): pages are read by keyset
+    from the sort index, so deep pages cost the same as the first.
+    """
+    query = select(MediaAsset)
+    if media_type:
+        query = query.where(MediaAsset.type == media_type)
+    if mime:
+        if mime.endswith("/*"):
+            query = query.where(MediaAsset.mime.startswith(mime[:-1], autoescape=True))
+        else:
+            query = query.where(MediaAsset.mime == mime)
+    if q:
+        query = query.where(MediaAsset.path.icontains(q, autoescape=True))
+
+    column = ASSET_SORT_COLUMNS[sort]
+    key = (MediaAsset.path,) if sort == "path" else (column, MediaAsset.path)
+    if after is not None:
+        position = tuple_(*key) if len(key) > 1 else key[0]
+        value = tuple_(*after) if len(key) > 1 else after[0]
+        query = query.where(position < value if descending else position > value)
+    order = [part.desc() for part in key] if descending else list(key)
+    return list(db.scalars(query.order_by(*order).limit(limit)))
+
+
+def get_media_asset(db: Session, path: str) -> Optional[MediaAsset]:
+    return db.get(MediaAsset, path)
+
+
+def get_media_assets(db: Session, paths: Iterable[str]) -> Dict[str, MediaAsset]:
+    """Catalog rows of ``paths`` that are catalogued, by path"""
+    assets = {}
+    for chunk in chunked(sorted(set(paths))):
+        for asset in db.scalars(select(MediaAsset).where(MediaAsset.path.in_(chunk))):
+            assets[asset.path] = asset
+    return assets
+
+
+async def get_media_asset_async(db: AsyncSession, path: str):
+    return await db.run_sync(get_media_asset, path)
+
+
+async def get_media_assets_async(db: AsyncSession, paths: Iterable[str]):
+    return await db.run_sync(get_media_assets, paths)
+
+
+async def list_media_assets_async(db: AsyncSession, media_type: Optional[str] = None,
+                                  mime: Optional[str] = None, q: Optional[str] = None,
+                                  sort: str = "path", descending: bool = False, limit: int = 100,
+                                  after: Optional[list] = None):
+    return await db.run_sync(list_media_assets, media_type, mime, q, sort, descending, limit,
+                             after)
+
+
+async def count_media_usages_async(db: AsyncSession, path: str):
+    return await db.run_sync(count_media_usages, path)
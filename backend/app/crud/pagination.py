@@ -0,0 +1,46 @@
+import base64
+import json
+from typing import Optional
+
+
+def encode_cursor(last_id: int) -> str:
+    """Build an opaque cursor pointing just past ``last_id``"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Return the id encoded in a cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return last_id
+
+
+def next_cursor(items, limit: int) -> Optional[str]:
+    """Cursor for the page after ``items``, or None when this was the last page"""
+    if limit <= 0 or len(items) < limit:
+        return None
+    return encode_cursor(items[-1].id)
+
+
+def encode_key_cursor(key: list) -> str:
+    """Cursor pointing just past the row whose sort key is ``key``"""
+    raw = json.dumps({"key": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_key_cursor(cursor: str, length: int) -> list:
+    """Return the ``length``-item sort key in a cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded))["key"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list) or len(key) != length:
+        raise ValueError("Invalid cursor")
+    return key
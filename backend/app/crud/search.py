@@ -0,0 +1,109 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import column, func, inspect, literal_column, select, table, text
+from sqlalchemy.orm import Session
+from ..models.template import TEMPLATE_SEARCH_TABLE, Template
+from .bulk import chunked
+
+# Full-text search over templates. On SQLite the template_search FTS5
+# table (rowid = template id) indexes the name, the description and the
+# text shown by the template's elements. The CRUD layer keeps it in step
+# with every write: elements may be stored compressed, so triggers cannot
+# read them. Other databases fall back to unranked substring matching.
+
+template_search = table(TEMPLATE_SEARCH_TABLE, column("rowid"), column("name"),
+                        column("description"), column("body"))
+
+# Element properties holding text a viewer would search for: Text and
+# Marquee content, feed and widget titles, the weather location...
+TEXT_PROPERTIES = ("content", "text", "title", "label", "caption", "location", "feedUrl")
+
+# bm25 weights for name, description and element text
+RANK_WEIGHTS = (10.0, 5.0, 1.0)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Engines whose database has the FTS5 table, checked once per engine
+_enabled: Dict[Any, bool] = {}
+
+
+def search_enabled(db: Session) -> bool:
+    engine = db.get_bind()
+    if engine not in _enabled:
+        _enabled[engine] = engine.dialect.name == "sqlite" and inspect(
+            engine).has_table(TEMPLATE_SEARCH_TABLE)
+    return _enabled[engine]
+
+
+def extract_text(elements: Optional[List[Dict[str, Any]]]) -> str:
+    """The searchable text of a template's elements, one value per line"""
+    values = []
+    for element in elements or ():
+        properties = element.get("properties") if isinstance(element, dict) else None
+        if not isinstance(properties, dict):
+            continue
+        for name in TEXT_PROPERTIES:
+            value = properties.get(name)
+            if isinstance(value, str) and value.strip():
+                values.append(value)
+    return "\n".join(values)
+
+
+def index_templates(db: Session, rows: Iterable[Tuple[int, str, Optional[str], Any]]):
+    """(Re)index ``(id, name, description, elements)`` rows in the caller's transaction"""
+    if not search_enabled(db):
+        return
+    params = [{"id": template_id, "name": name, "description": description or "",
+               "body": extract_text(elements)}
+              for template_id, name, description, elements in rows]
+    if params:
+        db.execute(text(
+            f"INSERT OR REPLACE INTO {TEMPLATE_SEARCH_TABLE} (rowid, name, description, body) "
+            "VALUES (:id, :name, :description, :body)"), params)
+
+
+def index_template(db: Session, db_template: Template):
+    index_templates(db, [(db_template.id, db_template.name,
+                          db_template.description, db_template.elements)])
+
+
+def unindex_templates(db: Session, template_ids: Sequence[int]):
+    if not search_enabled(db):
+        return
+    for chunk in chunked(list(template_ids)):
+        db.execute(template_search.delete().where(template_search.c.rowid.in_(chunk)))
+
+
+def match_expression(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation in user input are
+    searched for literally instead of being interpreted.
+    """
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_statement(db: Session, query: str):
+    """SELECT of ``(Template, snippet)`` rows matching ``query``, best first.
+
+    Returns None when the query has no searchable words.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return None
+
+    if not search_enabled(db):
+        pattern = f"%{query.strip()}%"
+        return select(Template, literal_column("NULL")).where(
+            Template.name.ilike(pattern) | Template.description.ilike(pattern)
+        ).order_by(Template.id)
+
+    fts = literal_column(TEMPLATE_SEARCH_TABLE)
+    return select(
+        Template, func.snippet(fts, -1, "[", "]", "…", 12),
+    ).join(template_search, template_search.c.rowid == Template.id).where(
+        fts.op("MATCH")(expression)
+    ).order_by(func.bm25(fts, *RANK_WEIGHTS), Template.id)
@@ -1,52 +1,634 @@
-from sqlalchemy.orm import Session, joinedload
-from ..models.template import Template
+from sqlalchemy.ext.asyncio import AsyncSession
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, inspect, select, update
+from sqlalchemy.orm import Session, load_only, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from ..models.media import MediaReference
+from ..models.template import Template, TemplateRevision
+from ..models.user import User
+from .exceptions import PermissionDenied, VersionConflict
+from .bulk import chunked
+from .fieldsets import fieldset_options
+from .json_patch import JsonPatchError, apply_patch
+from .search import index_template, index_templates, search_statement, unindex_templates
+from .elements import index_elements, unindex_elements, with_elements
+from .media import count_media_usages, index_media_references, unindex_media_references
 from ..schemas.template import TemplateCreate, TemplateUpdate
+from config import get_config
 
+config = get_config()
 
-def get_template(db: Session, template_id: int):
-    return db.query(Template).options(joinedload(Template.user)).filter(Template.id == template_id).first()
 
+# Columns needed for listings; elements is deliberately left out
+SUMMARY_COLUMNS = (
+    Template.id, Template.name, Template.description, Template.element_count,
+    Template.content_hash, Template.revision, Template.created_by,
+    Template.created_at, Template.updated_at,
+)
 
-def get_templates_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(Template).options(joinedload(Template.user)).filter(Template.created_by == user_id).offset(skip).limit(limit).all()
+# Relationships a sparse fieldset may ask for by name
+RELATIONSHIPS = {"user": Template.user}
+# Columns every fieldset loads: the routers need created_by for ownership
+# checks and revision for ETags
+REQUIRED_FIELDS = ("id", "created_by", "revision")
+# The owner's columns as correlated subqueries, so a write's RETURNING
+# brings the owner back too (SQLite cannot return columns of a joined table)
+OWNER_ATTRIBUTES = tuple(inspect(User).column_attrs)
+OWNER_COLUMNS = tuple(
+    select(attribute.columns[0]).where(User.id == Template.created_by)
+    .scalar_subquery().label(f"owner_{attribute.key}")
+    for attribute in OWNER_ATTRIBUTES
+)
 
 
-def get_all_templates(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Template).options(joinedload(Template.user)).offset(skip).limit(limit).all()
+def _load_options(fields: Optional[Sequence[str]]):
+    return fieldset_options(Template, fields, RELATIONSHIPS, REQUIRED_FIELDS)
+
+
+def elements_digest(elements: List[Dict[str, Any]]) -> str:
+    """SHA-256 of the canonical JSON form of a template's elements"""
+    canonical = json.dumps(elements, sort_keys=True,
+                           separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _set_elements(db_template: Template, elements: List[Dict[str, Any]]):
+    db_template.elements = elements
+    db_template.element_count = len(elements)
+    db_template.content_hash = elements_digest(elements)
+
+
+def _document(db_template: Template) -> Dict[str, Any]:
+    """The patchable part of a template, as stored in revisions"""
+    return {
+        "name": db_template.name,
+        "description": db_template.description,
+        "elements": db_template.elements,
+    }
+
+
+def _index_elements(db: Session, rows: List[Tuple[int, Any]], replace: bool = True):
+    """Rewrite the tables derived from ``(template id, elements)`` pairs"""
+    index_elements(db, rows, replace)
+    index_media_references(db, rows, replace)
+
+
+def _unindex(db: Session, template_ids: Sequence[int]):
+    unindex_templates(db, template_ids)
+    unindex_elements(db, template_ids)
+    unindex_media_references(db, template_ids)
+
+
+def _record_revision(db: Session, db_template: Template, user_id: Optional[int],
+                     operations: Optional[List[Dict[str, Any]]] = None):
+    """Add the revision row for ``db_template``'s current, already bumped revision.
+
+    Stores ``operations`` as a delta unless this revision is due for a
+    snapshot (the first one, every ``revision_snapshot_interval`` after it,
+    or when no delta is available).
+    """
+    revision = db_template.revision
+    snapshot = (operations is None or
+                (revision - 1) % config.template_revision_snapshot_interval == 0)
+    db.add(TemplateRevision(
+        template_id=db_template.id,
+        revision=revision,
+        kind="snapshot" if snapshot else "delta",
+        payload=_document(db_template) if snapshot else operations,
+        created_by=user_id,
+    ))
+
+
+def _returning_owner(db: Session, row) -> Optional[Template]:
+    """The template of a ``RETURNING Template, *OWNER_COLUMNS`` row, owner attached"""
+    if row is None:
+        return None
+    db_template, *values = row
+    owner = User(**{attribute.key: value for attribute, value in zip(OWNER_ATTRIBUTES, values)})
+    make_transient_to_detached(owner)
+    set_committed_value(db_template, "user", db.merge(owner, load=False))
+    return db_template
+
+
+def _conditional(statement, template_id: int, owner_id: Optional[int],
+                 expected_revision: Optional[int]):
+    """Restrict a statement to one template, its owner and a revision"""
+    statement = statement.where(Template.id == template_id)
+    if owner_id is not None:
+        statement = statement.where(Template.created_by == owner_id)
+    if expected_revision is not None:
+        statement = statement.where(Template.revision == expected_revision)
+    return statement
+
+
+def _check_access(db: Session, template_id: int, owner_id: Optional[int]) -> Optional[int]:
+    """Classify a statement that matched no template row.
+
+    Only runs after a miss, so the common path stays a single statement.
+    Returns None if the template does not exist, raises ``PermissionDenied``
+    if it belongs to someone other than ``owner_id``, and otherwise
+    returns its current revision.
+    """
+    row = db.query(Template.created_by, Template.revision).filter(
+        Template.id == template_id).first()
+    if row is None:
+        return None
+    if owner_id is not None and row.created_by != owner_id:
+        raise PermissionDenied()
+    return row.revision
+
+
+def _explain_write_miss(db: Session, template_id: int, owner_id: Optional[int]):
+    """Raise why a conditional write matched nothing; returns if the template is gone"""
+    current = _check_access(db, template_id, owner_id)
+    if current is not None:
+        raise VersionConflict(current)
+
+
+def _owned_by(query, owner_id: Optional[int]):
+    """Join a revision query to its template, limited to ``owner_id``'s"""
+    if owner_id is None:
+        return query
+    return query.join(Template, Template.id == TemplateRevision.template_id).filter(
+        Template.created_by == owner_id)
+
+
+def get_template(db: Session, template_id: int, fields: Optional[Sequence[str]] = None,
+                 owner_id: Optional[int] = None):
+    """Load one template, optionally only if ``owner_id`` created it.
+
+    Raises ``PermissionDenied`` if the template exists but belongs to
+    someone else; returns None if it does not exist.
+    """
+    # The row may already be in the session from a sparser load (e.g. an
+    # ETag check); populate_existing fills in what that load skipped
+    query = db.query(Template).options(*_load_options(fields)).populate_existing().filter(
+        Template.id == template_id)
+    if owner_id is not None:
+        query = query.filter(Template.created_by == owner_id)
+    db_template = query.first()
+    if db_template is None:
+        _check_access(db, template_id, owner_id)
+    return db_template
+
+
+def _paginate(query, skip: int, limit: int, after_id: Optional[int]):
+    """Order by id and page either by keyset (``after_id``) or by offset.
+
+    Keyset pages seek straight to ``id > after_id`` through the index, so
+    late pages cost the same as the first one; offset mode is kept for
+    existing clients.
+    """
+    query = query.order_by(Template.id)
+    if after_id is not None:
+        query = query.filter(Template.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+
+def get_templates_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                          after_id: Optional[int] = None, fields: Optional[Sequence[str]] = None,
+                          element_type: Optional[str] = None, source: Optional[str] = None):
+    """List a user's templates, optionally only those with an element of
+    ``element_type`` and/or showing ``source``"""
+    query = db.query(Template).options(
+        *_load_options(fields)).filter(Template.created_by == user_id)
+    query = with_elements(query, element_type, source)
+    return _paginate(query, skip, limit, after_id)
+
+
+def get_all_templates(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+                      fields: Optional[Sequence[str]] = None, element_type: Optional[str] = None,
+                      source: Optional[str] = None):
+    query = with_elements(db.query(Template).options(*_load_options(fields)),
+                          element_type, source)
+    return _paginate(query, skip, limit, after_id)
+
+
+def get_template_summaries_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                                   after_id: Optional[int] = None, element_type: Optional[str] = None,
+                                   source: Optional[str] = None):
+    """List templates without loading the elements blob or the owner"""
+    query = db.query(Template).options(load_only(
+        *SUMMARY_COLUMNS)).filter(Template.created_by == user_id)
+    query = with_elements(query, element_type, source)
+    return _paginate(query, skip, limit, after_id)
 
 
 def create_template(db: Session, template: TemplateCreate, user_id: int):
     db_template = Template(
         name=template.name,
         description=template.description,
-        elements=template.elements,
-        created_by=user_id
+        created_by=user_id,
+        revision=1
     )
+    _set_elements(db_template, template.elements)
     db.add(db_template)
+    db.flush()
+    _record_revision(db, db_template, user_id)
+    index_template(db, db_template)
+    _index_elements(db, [(db_template.id, db_template.elements)], replace=False)
     db.commit()
     db.refresh(db_template)
+    # Load the owner now so serializing the response never lazy-loads
+    db.refresh(db_template, ["user"])
     return db_template
 
 
-def update_template(db: Session, template_id: int, template: TemplateUpdate):
-    db_template = get_template(db, template_id)
-    if not db_template:
-        return None
+def update_template(db: Session, template_id: int, template: TemplateUpdate,
+                    user_id: Optional[int] = None, owner_id: Optional[int] = None,
+                    expected_revision: Optional[int] = None):
+    """Apply ``template`` with a single ``UPDATE ... RETURNING`` statement.
 
+    ``owner_id`` limits the update to that user's templates (None for
+    admins). With ``expected_revision`` (or ``template.revision``) only
+    that revision matches, so a concurrent save raises ``VersionConflict``
+    instead of being overwritten. The owner comes back from the same
+    statement. Returns None if the template does not exist.
+    """
     update_data = template.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_template, field, value)
+    body_revision = update_data.pop("revision", None)
+    if expected_revision is None:
+        expected_revision = body_revision
+    if update_data.get("elements", ()) is None:
+        del update_data["elements"]
+
+    if not update_data:
+        # Nothing to write, but the caller still expects the checks
+        matched = db.execute(
+            _conditional(select(Template.id), template_id, owner_id, expected_revision)
+        ).scalar()
+        if matched is None:
+            _explain_write_miss(db, template_id, owner_id)
+            return None
+        return get_template(db, template_id)
+
+    values = dict(update_data, revision=Template.revision + 1)
+    if "elements" in update_data:
+        values["element_count"] = len(update_data["elements"])
+        values["content_hash"] = elements_digest(update_data["elements"])
 
+    db_template = _returning_owner(db, db.execute(
+        _conditional(update(Template), template_id, owner_id, expected_revision)
+        .values(**values).returning(Template, *OWNER_COLUMNS),
+        execution_options={"populate_existing": True},
+    ).first())
+    if db_template is None:
+        _explain_write_miss(db, template_id, owner_id)
+        return None
+
+    # The statement already holds the new values, so the delta is just
+    # the fields that were sent
+    _record_revision(db, db_template, user_id, [
+        {"op": "replace", "path": f"/{field}", "value": value}
+        for field, value in update_data.items()
+    ])
+    index_template(db, db_template)
+    if "elements" in update_data:
+        _index_elements(db, [(db_template.id, db_template.elements)])
     db.commit()
-    db.refresh(db_template)
     return db_template
 
 
-def delete_template(db: Session, template_id: int):
-    db_template = get_template(db, template_id)
-    if not db_template:
+def patch_template(db: Session, template_id: int, operations: List[Dict[str, Any]],
+                   user_id: Optional[int] = None, owner_id: Optional[int] = None,
+                   expected_revision: Optional[int] = None):
+    """Apply RFC 6902 operations to a template's name, description and elements.
+
+    The write only matches the revision the patch was applied to, so a
+    save that lands in between raises ``VersionConflict``. Raises
+    ``JsonPatchError`` if the patch does not apply or leaves an invalid
+    template; nothing is written in that case.
+    """
+    current = db.execute(
+        _conditional(select(Template), template_id, owner_id, expected_revision)
+        .options(load_only(Template.id, Template.name, Template.description,
+                           Template.elements, Template.revision)),
+        execution_options={"populate_existing": True},
+    ).scalars().first()
+    if current is None:
+        _explain_write_miss(db, template_id, owner_id)
+        return None
+
+    document = apply_patch(_document(current), operations)
+    if set(document) != {"name", "description", "elements"}:
+        raise JsonPatchError(
+            "Only /name, /description and /elements can be patched")
+    try:
+        patched = TemplateCreate(**document)
+    except ValidationError as e:
+        raise JsonPatchError(f"Patched template is invalid: {e.errors()[0]['msg']}")
+
+    values = {"name": patched.name, "description": patched.description,
+              "revision": Template.revision + 1}
+    if patched.elements != current.elements:
+        values.update(elements=patched.elements, element_count=len(patched.elements),
+                      content_hash=elements_digest(patched.elements))
+
+    db_template = _returning_owner(db, db.execute(
+        _conditional(update(Template), template_id, None, current.revision)
+        .values(**values).returning(Template, *OWNER_COLUMNS),
+        execution_options={"populate_existing": True},
+    ).first())
+    if db_template is None:
+        # Someone else saved between the read and the write
+        _explain_write_miss(db, template_id, owner_id)
         return None
 
-    db.delete(db_template)
+    _record_revision(db, db_template, user_id, operations)
+    index_template(db, db_template)
+    if "elements" in values:
+        _index_elements(db, [(db_template.id, db_template.elements)])
     db.commit()
     return db_template
+
+
+def delete_template(db: Session, template_id: int, owner_id: Optional[int] = None,
+                    expected_revision: Optional[int] = None):
+    """Delete a template and its history with one conditional DELETE.
+
+    Returns the deleted id, or None if the template does not exist.
+    """
+    # Child rows go first so the parent DELETE never violates their
+    # foreign keys; a miss rolls all of it back
+    db.query(TemplateRevision).filter(
+        TemplateRevision.template_id == template_id).delete(synchronize_session=False)
+    _unindex(db, [template_id])
+    deleted = db.execute(
+        _conditional(delete(Template), template_id, owner_id, expected_revision)
+        .returning(Template.id)
+    ).scalar()
+    if deleted is None:
+        db.rollback()
+        _explain_write_miss(db, template_id, owner_id)
+        return None
+
+    db.commit()
+    return deleted
+
+
+def bulk_create_templates(db: Session, templates: Sequence[TemplateCreate], user_id: int,
+                          owner_ids: Optional[Sequence[int]] = None) -> List[int]:
+    """Create templates and their first revisions in one transaction.
+
+    Uses one executemany INSERT for the templates and one for their
+    revision snapshots. ``owner_ids`` gives each template's owner when it
+    is not ``user_id`` (imports). Returns the new ids in input order.
+    """
+    if not templates:
+        return []
+    ids = db.scalars(insert(Template).returning(Template.id, sort_by_parameter_order=True), [{
+        "name": template.name,
+        "description": template.description,
+        "elements": template.elements,
+        "element_count": len(template.elements),
+        "content_hash": elements_digest(template.elements),
+        "revision": 1,
+        "created_by": owner_id,
+    } for template, owner_id in zip(templates, owner_ids or [user_id] * len(templates))]).all()
+    db.execute(insert(TemplateRevision), [{
+        "template_id": template_id,
+        "revision": 1,
+        "kind": "snapshot",
+        "payload": {"name": template.name, "description": template.description,
+                    "elements": template.elements},
+        "created_by": user_id,
+    } for template_id, template in zip(ids, templates)])
+    index_templates(db, [(template_id, template.name, template.description, template.elements)
+                         for template_id, template in zip(ids, templates)])
+    _index_elements(db, [(template_id, template.elements)
+                         for template_id, template in zip(ids, templates)], replace=False)
+    db.commit()
+    return list(ids)
+
+
+def bulk_delete_templates(db: Session, template_ids: Sequence[int],
+                          owner_id: Optional[int] = None) -> Dict[int, str]:
+    """Delete templates and their history in one transaction.
+
+    Ownership is checked for the whole set with IN queries. Returns each
+    id's outcome: ``deleted``, ``not_found`` or ``forbidden``.
+    """
+    unique_ids = list(dict.fromkeys(template_ids))
+    owners = {}
+    for chunk in chunked(unique_ids):
+        owners.update(db.query(Template.id, Template.created_by).filter(
+            Template.id.in_(chunk)).all())
+
+    outcomes = {}
+    for template_id in unique_ids:
+        if template_id not in owners:
+            outcomes[template_id] = "not_found"
+        elif owner_id is not None and owners[template_id] != owner_id:
+            outcomes[template_id] = "forbidden"
+        else:
+            outcomes[template_id] = "deleted"
+
+    deletable = [template_id for template_id, outcome in outcomes.items()
+                 if outcome == "deleted"]
+    # Child rows first, so the template DELETEs never violate their foreign keys
+    _unindex(db, deletable)
+    for chunk in chunked(deletable):
+        db.execute(delete(TemplateRevision).where(TemplateRevision.template_id.in_(chunk)))
+        db.execute(delete(Template).where(Template.id.in_(chunk)))
+    db.commit()
+    return outcomes
+
+
+def search_templates(db: Session, query: str, owner_id: Optional[int] = None,
+                     skip: int = 0, limit: int = 20):
+    """Templates matching ``query``, best first, as ``(template, snippet)`` pairs.
+
+    Every word must match as a prefix of a word in the name, description
+    or element text. Only summary columns are loaded; ``owner_id`` limits
+    the search to that user's templates.
+    """
+    statement = search_statement(db, query)
+    if statement is None:
+        return []
+    if owner_id is not None:
+        statement = statement.where(Template.created_by == owner_id)
+    return db.execute(statement.options(load_only(*SUMMARY_COLUMNS))
+                      .offset(skip).limit(limit)).all()
+
+
+def get_templates_using_media(db: Session, path: str, owner_id: Optional[int] = None):
+    """``(usage count, templates)`` for the media file at ``path``.
+
+    The count covers every template, so a file in use by someone else's
+    templates is still reported as in use; the templates are limited to
+    ``owner_id``'s and carry summary columns only.
+    """
+    query = db.query(Template).options(load_only(*SUMMARY_COLUMNS)).join(
+        MediaReference, MediaReference.template_id == Template.id
+    ).filter(MediaReference.path == path)
+    if owner_id is not None:
+        query = query.filter(Template.created_by == owner_id)
+    return count_media_usages(db, path), query.order_by(Template.id).all()
+
+
+def find_user_ids(db: Session, usernames: Set[str]) -> Dict[str, int]:
+    """Map the given usernames to user ids; unknown names are left out"""
+    ids = {}
+    for chunk in chunked(sorted(usernames)):
+        ids.update(db.query(User.username, User.id).filter(User.username.in_(chunk)).all())
+    return ids
+
+
+async def stream_templates_async(db: AsyncSession, owner_id: Optional[int] = None,
+                                 batch_size: int = 500):
+    """Yield ``(template, owner username)`` for every template, by id.
+
+    Rows come through a server-side cursor ``batch_size`` at a time, so
+    memory stays flat however many templates there are.
+    """
+    statement = select(Template, User.username).join(
+        User, User.id == Template.created_by).order_by(Template.id)
+    if owner_id is not None:
+        statement = statement.where(Template.created_by == owner_id)
+    result = await db.stream(statement.execution_options(yield_per=batch_size))
+    async for template, username in result:
+        yield template, username
+
+
+def get_template_revisions(db: Session, template_id: int, skip: int = 0, limit: int = 100,
+                           after_id: Optional[int] = None, owner_id: Optional[int] = None):
+    """List a template's revisions without their payloads.
+
+    Returns None if the template does not exist and raises
+    ``PermissionDenied`` if ``owner_id`` does not own it.
+    """
+    query = _owned_by(db.query(TemplateRevision).options(load_only(
+        TemplateRevision.id, TemplateRevision.revision, TemplateRevision.kind,
+        TemplateRevision.created_by, TemplateRevision.created_at,
+    )), owner_id).filter(TemplateRevision.template_id == template_id).order_by(TemplateRevision.id)
+    if after_id is not None:
+        query = query.filter(TemplateRevision.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    revisions = query.limit(limit).all()
+    # An empty page is also what a missing or foreign template looks like
+    if not revisions and _check_access(db, template_id, owner_id) is None:
+        return None
+    return revisions
+
+
+def get_template_revision(db: Session, template_id: int, revision: int,
+                          owner_id: Optional[int] = None):
+    """Rebuild the document of one revision.
+
+    Starts from the closest snapshot at or before ``revision`` and replays
+    the deltas after it, so at most ``revision_snapshot_interval - 1``
+    patches are applied. Returns None if the revision does not exist and
+    raises ``PermissionDenied`` if ``owner_id`` does not own the template.
+    """
+    base = _owned_by(db.query(TemplateRevision), owner_id).filter(
+        TemplateRevision.template_id == template_id,
+        TemplateRevision.revision <= revision,
+        TemplateRevision.kind == "snapshot",
+    ).order_by(TemplateRevision.revision.desc()).first()
+    if base is None:
+        _check_access(db, template_id, owner_id)
+        return None
+
+    deltas = db.query(TemplateRevision).filter(
+        TemplateRevision.template_id == template_id,
+        TemplateRevision.revision > base.revision,
+        TemplateRevision.revision <= revision,
+    ).order_by(TemplateRevision.revision).all()
+    if base.revision + len(deltas) != revision:
+        return None
+
+    document = base.payload
+    for delta in deltas:
+        document = delta.payload if delta.kind == "snapshot" else apply_patch(
+            document, delta.payload)
+    return {"revision": revision, **document}
+
+
+# Async variants for AsyncSession callers, see crud.user for the rationale
+
+
+async def get_template_async(db: AsyncSession, template_id: int, fields: Optional[Sequence[str]] = None,
+                             owner_id: Optional[int] = None):
+    return await db.run_sync(get_template, template_id, fields, owner_id)
+
+
+async def get_templates_by_user_async(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100,
+                                      after_id: Optional[int] = None, fields: Optional[Sequence[str]] = None,
+                                      element_type: Optional[str] = None, source: Optional[str] = None):
+    return await db.run_sync(get_templates_by_user, user_id, skip, limit, after_id, fields,
+                             element_type, source)
+
+
+async def get_all_templates_async(db: AsyncSession, skip: int = 0, limit: int = 100,
+                                  after_id: Optional[int] = None, fields: Optional[Sequence[str]] = None,
+                                  element_type: Optional[str] = None, source: Optional[str] = None):
+    return await db.run_sync(get_all_templates, skip, limit, after_id, fields, element_type, source)
+
+
+async def get_template_summaries_by_user_async(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100,
+                                               after_id: Optional[int] = None, element_type: Optional[str] = None,
+                                               source: Optional[str] = None):
+    return await db.run_sync(get_template_summaries_by_user, user_id, skip, limit, after_id,
+                             element_type, source)
+
+
+async def create_template_async(db: AsyncSession, template: TemplateCreate, user_id: int):
+    return await db.run_sync(create_template, template, user_id)
+
+
+async def update_template_async(db: AsyncSession, template_id: int, template: TemplateUpdate,
+                                user_id: Optional[int] = None, owner_id: Optional[int] = None,
+                                expected_revision: Optional[int] = None):
+    return await db.run_sync(update_template, template_id, template, user_id, owner_id,
+                             expected_revision)
+
+
+async def patch_template_async(db: AsyncSession, template_id: int, operations: List[Dict[str, Any]],
+                               user_id: Optional[int] = None, owner_id: Optional[int] = None,
+                               expected_revision: Optional[int] = None):
+    return await db.run_sync(patch_template, template_id, operations, user_id, owner_id,
+                             expected_revision)
+
+
+async def delete_template_async(db: AsyncSession, template_id: int, owner_id: Optional[int] = None,
+                                expected_revision: Optional[int] = None):
+    return await db.run_sync(delete_template, template_id, owner_id, expected_revision)
+
+
+async def bulk_create_templates_async(db: AsyncSession, templates: Sequence[TemplateCreate], user_id: int,
+                                      owner_ids: Optional[Sequence[int]] = None):
+    return await db.run_sync(bulk_create_templates, templates, user_id, owner_ids)
+
+
+async def search_templates_async(db: AsyncSession, query: str, owner_id: Optional[int] = None,
+                                 skip: int = 0, limit: int = 20):
+    return await db.run_sync(search_templates, query, owner_id, skip, limit)
+
+
+async def get_templates_using_media_async(db: AsyncSession, path: str, owner_id: Optional[int] = None):
+    return await db.run_sync(get_templates_using_media, path, owner_id)
+
+
+async def find_user_ids_async(db: AsyncSession, usernames: Set[str]):
+    return await db.run_sync(find_user_ids, usernames)
+
+
+async def bulk_delete_templates_async(db: AsyncSession, template_ids: Sequence[int],
+                                      owner_id: Optional[int] = None):
+    return await db.run_sync(bulk_delete_templates, template_ids, owner_id)
+
+
+async def get_template_revisions_async(db: AsyncSession, template_id: int, skip: int = 0, limit: int = 100,
+                                       after_id: Optional[int] = None, owner_id: Optional[int] = None):
+    return await db.run_sync(get_template_revisions, template_id, skip, limit, after_id, owner_id)
+
+
+async def get_template_revision_async(db: AsyncSession, template_id: int, revision: int,
+                                      owner_id: Optional[int] = None):
+    return await db.run_sync(get_template_revision, template_id, revision, owner_id)
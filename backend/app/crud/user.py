@@ -1,11 +1,48 @@
+import secrets
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from ..models.user import User
-from ..schemas.user import UserCreate, UserUpdate
-from ..auth.security import get_password_hash, verify_password
+from ..schemas.user import UserCreate, UserImport, UserUpdate
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from ..auth.security import (get_password_hash, verify_password, verify_password_async,
+                             get_password_hash_async, get_password_hashes_async)
+from ..auth.cache import principal_cache, token_versions
+from .fieldsets import fieldset_options
+from .exceptions import VersionConflict
+from .bulk import chunked
 
+# Changing any of these alters the claims embedded in issued tokens
+TOKEN_CLAIM_FIELDS = {"username", "role", "permissions",
+                      "is_active", "hashed_password"}
 
-def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+
+def _revoke_tokens(db_user: User):
+    """Invalidate every access token issued to the user so far"""
+    db_user.token_version = (db_user.token_version or 0) + 1
+
+
+def _publish_token_state(db_user: User):
+    token_versions.set(db_user.id, db_user.token_version or 0,
+                       db_user.is_active)
+
+
+# Columns every sparse user load includes; version backs the ETag
+REQUIRED_FIELDS = ("id", "version")
+
+
+def get_user(db: Session, user_id: int, fields: Optional[Sequence[str]] = None):
+    return db.query(User).options(*fieldset_options(User, fields, {}, REQUIRED_FIELDS)).filter(
+        User.id == user_id).first()
+
+
+def get_user_token_state(db: Session, user_id: int):
+    """Return ``(token_version, is_active)`` without loading the full user row"""
+    row = db.query(User.token_version, User.is_active).filter(
+        User.id == user_id).first()
+    if row is None:
+        return None
+    return row.token_version or 0, bool(row.is_active)
 
 
 def get_user_by_username(db: Session, username: str):
@@ -16,12 +53,21 @@ def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+              fields: Optional[Sequence[str]] = None):
+    # Keyset pagination when after_id is given, offset otherwise
+    query = db.query(User).options(
+        *fieldset_options(User, fields, {}, REQUIRED_FIELDS)).order_by(User.id)
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -35,30 +81,122 @@ def create_user(db: Session, user: UserCreate):
     return db_user
 
 
-def update_user(db: Session, user_id: int, user: UserUpdate):
-    db_user = get_user(db, user_id)
-    if not db_user:
-        return None
+def find_registered(db: Session, usernames: Set[str], emails: Set[str]) -> Tuple[Set[str], Set[str]]:
+    """The given usernames and emails that already belong to a user"""
+    taken_usernames, taken_emails = set(), set()
+    for chunk in chunked(sorted(usernames)):
+        taken_usernames.update(row[0] for row in db.query(User.username).filter(
+            User.username.in_(chunk)))
+    for chunk in chunked(sorted(emails)):
+        taken_emails.update(row[0] for row in db.query(User.email).filter(
+            User.email.in_(chunk)))
+    return taken_usernames, taken_emails
+
+
+def _is_bcrypt_hash(value: str) -> bool:
+    return len(value) == 60 and value.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def plan_user_import(db: Session, rows: Sequence[Tuple[int, UserImport]],
+                     reset_passwords: bool = False):
+    """Split import rows into the ones to insert and per-row errors.
+
+    Duplicates are detected set-wise, against the rest of the batch in
+    memory and against existing users with a few IN queries, instead of two
+    SELECTs per row. Rows without a password are refused unless
+    ``reset_passwords`` is set. Returns ``(accepted, errors)``.
+    """
+    taken_usernames, taken_emails = find_registered(
+        db, {row.username for _, row in rows}, {row.email for _, row in rows})
+
+    accepted, errors = [], []
+    for index, row in rows:
+        if row.username in taken_usernames:
+            detail = "Username already registered"
+        elif row.email in taken_emails:
+            detail = "Email already registered"
+        elif row.hashed_password is not None and not _is_bcrypt_hash(row.hashed_password):
+            detail = "hashed_password is not a bcrypt hash"
+        elif row.hashed_password is None and not row.password and not reset_passwords:
+            detail = ("password or hashed_password is required; export with "
+                      "include_password_hashes=true or import with reset_passwords=true")
+        else:
+            taken_usernames.add(row.username)
+            taken_emails.add(row.email)
+            accepted.append((index, row))
+            continue
+        errors.append({"index": index, "status": "error", "detail": detail})
+    return accepted, errors
+
+
+def bulk_insert_users(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert prepared user rows as one executemany and commit.
+
+    Returns the new ids in row order.
+    """
+    if not rows:
+        return []
+    # Users start at version 1, as ORM-created ones do
+    ids = db.scalars(insert(User).returning(User.id, sort_by_parameter_order=True),
+                     [dict(row, version=1) for row in rows]).all()
+    db.commit()
+    return list(ids)
+
 
+def update_user(db: Session, user_id: int, user: UserUpdate, hashed_password: Optional[str] = None,
+                expected_version: Optional[int] = None):
+    """Apply ``user`` with a single ``UPDATE ... RETURNING`` statement.
+
+    The version (and the token version, when a claim field changes) is
+    bumped in the same statement. With ``expected_version`` (or
+    ``user.version``) the update only matches that version and raises
+    ``VersionConflict`` otherwise. Returns None if the user does not exist.
+    """
     update_data = user.dict(exclude_unset=True)
+    body_version = update_data.pop("version", None)
+    if expected_version is None:
+        expected_version = body_version
 
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(
-            update_data.pop("password"))
-
-    for field, value in update_data.items():
-        setattr(db_user, field, value)
+        password = update_data.pop("password")
+        update_data["hashed_password"] = hashed_password or get_password_hash(
+            password)
+
+    values = dict(update_data, version=User.version + 1)
+    if TOKEN_CLAIM_FIELDS.intersection(update_data):
+        values["token_version"] = User.token_version + 1
+
+    statement = update(User).where(User.id == user_id)
+    if expected_version is not None:
+        statement = statement.where(User.version == expected_version)
+    db_user = db.execute(
+        statement.values(**values).returning(User),
+        execution_options={"populate_existing": True},
+    ).scalars().first()
+
+    if db_user is None:
+        # Only a miss pays for telling "gone" from "changed"
+        current = db.query(User.version).filter(User.id == user_id).scalar()
+        if current is None:
+            return None
+        raise VersionConflict(current)
 
     db.commit()
-    db.refresh(db_user)
+    # Covers the cache entry under the old username as well
+    principal_cache.invalidate_user(db_user.id)
+    _publish_token_state(db_user)
     return db_user
 
 
-def delete_user(db: Session, user_id: int):
+def delete_user(db: Session, user_id: int, expected_version: Optional[int] = None):
     db_user = get_user(db, user_id)
+    if db_user and expected_version is not None and db_user.version != expected_version:
+        raise VersionConflict(db_user.version)
     if db_user:
         db.delete(db_user)
         db.commit()
+        principal_cache.invalidate(db_user.username)
+        token_versions.invalidate(db_user.id)
     return db_user
 
 
@@ -83,8 +221,11 @@ def deactivate_user(db: Session, user_id: int):
     db_user = get_user(db, user_id)
     if db_user:
         db_user.is_active = False
+        _revoke_tokens(db_user)
         db.commit()
         db.refresh(db_user)
+        principal_cache.invalidate(db_user.username)
+        _publish_token_state(db_user)
     return db_user
 
 
@@ -94,22 +235,146 @@ def activate_user(db: Session, user_id: int):
         db_user.is_active = True
         db.commit()
         db.refresh(db_user)
+        principal_cache.invalidate(db_user.username)
+        _publish_token_state(db_user)
     return db_user
 
 
-def update_user_password(db: Session, user_id: int, new_password: str, clear_force_change: bool = False):
+def update_user_password(db: Session, user_id: int, new_password: Optional[str] = None,
+                         clear_force_change: bool = False, hashed_password: Optional[str] = None):
     db_user = get_user(db, user_id)
     if not db_user:
         return None
 
-    db_user.hashed_password = get_password_hash(new_password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(new_password)
+    db_user.hashed_password = hashed_password
     if clear_force_change:
         db_user.force_password_change = False
+    _revoke_tokens(db_user)
 
     db.commit()
     db.refresh(db_user)
+    principal_cache.invalidate(db_user.username)
+    _publish_token_state(db_user)
     return db_user
 
 
 def verify_user_password(plain_password: str, hashed_password: str):
     return verify_password(plain_password, hashed_password)
+
+
+async def verify_user_password_async(plain_password: str, hashed_password: str):
+    return await verify_password_async(plain_password, hashed_password)
+
+
+# Async variants for AsyncSession callers. Each runs the sync implementation
+# above through AsyncSession.run_sync, so queries go through the async
+# driver (aiosqlite / asyncpg) without a threadpool and the two paths
+# cannot drift apart.
+
+
+async def get_user_async(db: AsyncSession, user_id: int, fields: Optional[Sequence[str]] = None):
+    return await db.run_sync(get_user, user_id, fields)
+
+
+async def get_user_token_state_async(db: AsyncSession, user_id: int):
+    return await db.run_sync(get_user_token_state, user_id)
+
+
+async def get_user_by_username_async(db: AsyncSession, username: str):
+    return await db.run_sync(get_user_by_username, username)
+
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    return await db.run_sync(get_user_by_email, email)
+
+
+async def get_users_async(db: AsyncSession, skip: int = 0, limit: int = 100,
+                          after_id: Optional[int] = None, fields: Optional[Sequence[str]] = None):
+    return await db.run_sync(get_users, skip, limit, after_id, fields)
+
+
+async def create_user_async(db: AsyncSession, user: UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = await get_password_hash_async(user.password)
+    return await db.run_sync(create_user, user, hashed_password)
+
+
+async def import_users_async(db: AsyncSession, rows: Sequence[Tuple[int, UserImport]],
+                             reset_passwords: bool = False):
+    """Create many users in one transaction; returns a result per row.
+
+    Passwords of the accepted rows are hashed in parallel across the
+    hashing pool. Rows carrying a ``hashed_password`` skip hashing. With
+    ``reset_passwords``, rows with neither get a random password nobody
+    knows and must have theirs set by an admin.
+    """
+    accepted, results = await db.run_sync(plan_user_import, rows, reset_passwords)
+    hashes = iter(await get_password_hashes_async(
+        [row.password or secrets.token_urlsafe(32)
+         for _, row in accepted if row.hashed_password is None]))
+    ids = await db.run_sync(bulk_insert_users, [{
+        "username": row.username,
+        "email": row.email,
+        "hashed_password": row.hashed_password or next(hashes),
+        "role": row.role,
+        "permissions": row.permissions or {},
+        "force_password_change": row.force_password_change or not (
+            row.password or row.hashed_password),
+        "is_active": row.is_active,
+    } for _, row in accepted])
+    results.extend({"index": index, "status": "created", "id": user_id}
+                   for (index, _), user_id in zip(accepted, ids))
+    return sorted(results, key=lambda result: result["index"])
+
+
+async def stream_users_async(db: AsyncSession, batch_size: int = 500):
+    """Yield every user by id through a server-side cursor, ``batch_size`` rows at a time"""
+    result = await db.stream_scalars(
+        select(User).order_by(User.id).execution_options(yield_per=batch_size))
+    async for db_user in result:
+        yield db_user
+
+
+async def update_user_async(db: AsyncSession, user_id: int, user: UserUpdate,
+                            expected_version: Optional[int] = None):
+    hashed_password = None
+    if user.password is not None:
+        hashed_password = await get_password_hash_async(user.password)
+    return await db.run_sync(update_user, user_id, user, hashed_password, expected_version)
+
+
+async def delete_user_async(db: AsyncSession, user_id: int, expected_version: Optional[int] = None):
+    return await db.run_sync(delete_user, user_id, expected_version)
+
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username_async(db, username)
+    if not user:
+        return False
+    if not await verify_password_async(password, user.hashed_password):
+        return False
+    return user
+
+
+async def get_users_by_role_async(db: AsyncSession, role: str):
+    return await db.run_sync(get_users_by_role, role)
+
+
+async def get_active_users_async(db: AsyncSession):
+    return await db.run_sync(get_active_users)
+
+
+async def deactivate_user_async(db: AsyncSession, user_id: int):
+    return await db.run_sync(deactivate_user, user_id)
+
+
+async def activate_user_async(db: AsyncSession, user_id: int):
+    return await db.run_sync(activate_user, user_id)
+
+
+async def update_user_password_async(db: AsyncSession, user_id: int, new_password: Optional[str] = None,
+                                     clear_force_change: bool = False):
+    hashed_password = await get_password_hash_async(new_password)
+    return await db.run_sync(update_user_password, user_id, None, clear_force_change, hashed_password)
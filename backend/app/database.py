@@ -1,14 +1,110 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from config import get_config
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./displaydynamix.db"
+config = get_config()
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def build_database_url() -> str:
+    """Build the database URL from the [database] section of config.ini"""
+    if config.database_url:
+        return config.database_url
+
+    if config.database_type in ("postgres", "postgresql"):
+        return URL.create(
+            "postgresql+psycopg2",
+            username=config.database_user or None,
+            password=config.database_password or None,
+            host=config.database_host,
+            port=config.database_port,
+            database=config.database_name,
+        ).render_as_string(hide_password=False)
+
+    database_dir = config.resolve_path(config.database_path)
+    database_dir.mkdir(parents=True, exist_ok=True)
+    return f"sqlite:///{database_dir / config.database_name}"
+
+
+def sqlite_pragmas() -> dict:
+    return {
+        "journal_mode": config.sqlite_journal_mode,
+        "synchronous": config.sqlite_synchronous,
+        "mmap_size": config.sqlite_mmap_size,
+        "cache_size": config.sqlite_cache_size,
+        "busy_timeout": config.sqlite_busy_timeout,
+    }
+
+
+# Async drivers used for the AsyncSession data path
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def build_async_database_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart"""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def _engine_options(url: str) -> dict:
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    return {
+        "pool_size": config.database_pool_size,
+        "max_overflow": config.database_max_overflow,
+        "pool_timeout": config.database_pool_timeout,
+        "pool_recycle": config.database_pool_recycle,
+        "pool_pre_ping": True,
+        "connect_args": {"check_same_thread": False} if is_sqlite else {},
+    }
+
+
+def _install_sqlite_pragmas(engine, pragmas: dict = None):
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_database_engine(url: str, pragmas: dict = None):
+    """Create an engine with pooling from config and SQLite PRAGMA tuning"""
+    engine = create_engine(url, **_engine_options(url))
+    if engine.dialect.name == "sqlite":
+        _install_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def create_async_database_engine(url: str, pragmas: dict = None):
+    """Async counterpart of create_database_engine (aiosqlite / asyncpg)"""
+    engine = create_async_engine(url, **_engine_options(url))
+    if engine.dialect.name == "sqlite":
+        _install_sqlite_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
+SQLALCHEMY_DATABASE_URL = build_database_url()
+
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_SQLALCHEMY_DATABASE_URL = build_async_database_url(
+    SQLALCHEMY_DATABASE_URL)
+
+async_engine = create_async_database_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+# Objects are returned to FastAPI for serialization after the CRUD layer
+# commits, so they must not expire (an expired attribute would need IO)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency
@@ -20,3 +116,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
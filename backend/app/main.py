@@ -1,11 +1,20 @@
 from .api.users import router as users_router
 from .api.auth import router as auth_router
 from .api.templates import router as templates_router
+from .api.media import router as media_router
 from .models import user as models
 from .models import template as template_models
+from .models import media as media_models
 from .database import engine
+from .auth.cache import principal_cache, token_versions
+from .auth.hashing import hashing_service, HashingServiceBusy
+from .media.catalog import catalog_service
+from .media.derivatives import derivative_service
+from .crud.exceptions import PermissionDenied, VersionConflict
+from .api.conditional import conflict_status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request
 from config import get_config
 import sys
 import os
@@ -39,11 +48,55 @@ app.add_middleware(
     max_age=config.cors_max_age,
 )
 
+@app.exception_handler(HashingServiceBusy)
+async def hashing_service_busy_handler(request: Request, exc: HashingServiceBusy):
+    # Shed load fast rather than queueing logins behind a saturated pool
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(VersionConflict)
+async def version_conflict_handler(request: Request, exc: VersionConflict):
+    return JSONResponse(
+        status_code=conflict_status(request),
+        content={"detail": str(exc), "current_version": exc.current_version},
+    )
+
+
+@app.exception_handler(PermissionDenied)
+async def permission_denied_handler(request: Request, exc: PermissionDenied):
+    return JSONResponse(status_code=403, content={"detail": "Not enough permissions"})
+
+
+@app.on_event("shutdown")
+def shutdown_hashing_service():
+    hashing_service.shutdown()
+
+
+@app.on_event("startup")
+async def start_media_catalog():
+    await catalog_service.start()
+
+
+@app.on_event("shutdown")
+async def stop_media_catalog():
+    await catalog_service.stop()
+
+
+@app.on_event("shutdown")
+def shutdown_derivative_service():
+    derivative_service.shutdown()
+
+
 # Include routers
 app.include_router(auth_router, prefix="/api/auth", tags=["authentication"])
 app.include_router(users_router, prefix="/api/users", tags=["user management"])
 app.include_router(
     templates_router, prefix="/api/templates", tags=["templates"])
+app.include_router(media_router, prefix="/api/media", tags=["media"])
 
 
 @app.get("/")
@@ -53,4 +106,11 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "principal_cache": principal_cache.stats(),
+        "token_versions": token_versions.stats(),
+        "hashing": hashing_service.stats(),
+        "media_catalog": catalog_service.stats(),
+        "derivatives": derivative_service.stats()
+    }
@@ -0,0 +1,5 @@
+from .storage import (MEDIA_URL_PREFIXES, clean_media_path, media_file, media_reference,
+                      media_root, restore_media, trash_media, walk_media)
+
+__all__ = ["MEDIA_URL_PREFIXES", "clean_media_path", "media_file", "media_reference",
+           "media_root", "restore_media", "trash_media", "walk_media"]
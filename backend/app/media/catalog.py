@@ -0,0 +1,312 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import stat as stat_module
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from anyio import to_thread
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config import get_config
+from ..crud.bulk import chunked
+from ..database import SessionLocal
+from ..models.media import MediaAsset
+from .probe import probe
+from .serving import media_type
+from .storage import clean_media_path, media_root, walk_media
+from .uploads import media_type_for
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - installed with uvicorn[standard]
+    watchfiles = None
+
+config = get_config()
+
+# The catalog mirrors the media root into media_assets. A scan stats
+# every file (cheap) but only hashes and probes the ones whose inode,
+# size or mtime changed since they were catalogued; a file that merely
+# moved keeps its hash and metadata. Between scans, filesystem events
+# refresh just the paths they name.
+
+# Rows written per transaction, so a long first scan never holds the
+# database write lock for long
+SCAN_BATCH_SIZE = 1000
+HASH_CHUNK_SIZE = 1 << 20
+# Only one process per media root runs the background scanner
+CATALOG_LOCK = ".catalog.lock"
+
+_COLUMNS = ("path", "type", "sha256", "size", "mime", "width", "height", "duration",
+            "mtime_ns", "inode")
+
+
+def _identity(stat: os.stat_result) -> Tuple[int, int, int]:
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def _file_digest(file: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file, "rb") as handle:
+        for block in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def inspect_file(path: str, stat: os.stat_result, sha256: Optional[str] = None) -> Dict[str, Any]:
+    """Catalog row for the file at ``path``: its hash, type and dimensions"""
+    file = media_root() / path
+    kind = media_type_for(path.rsplit("/", 1)[-1])
+    row = {"path": path, "type": kind, "sha256": sha256 or _file_digest(file),
+           "size": stat.st_size, "mime": media_type(file), "mtime_ns": stat.st_mtime_ns,
+           "inode": stat.st_ino}
+    row.update(probe(file, kind))
+    return row
+
+
+def _moved(row: Dict[str, Any], path: str, stat: os.stat_result) -> Dict[str, Any]:
+    """``row`` of a file that was renamed to ``path``, without re-reading it"""
+    return dict(row, path=path, type=media_type_for(path.rsplit("/", 1)[-1]),
+                mime=media_type(Path(path)), mtime_ns=stat.st_mtime_ns, inode=stat.st_ino)
+
+
+def _apply(db, inserts: List[Dict[str, Any]], updates: List[Dict[str, Any]], deletes: List[str],
+           directories: Iterable[str] = ()):
+    """Write a batch of catalog changes; ``directories`` lose every row under them"""
+    def remove():
+        for chunk in chunked(deletes):
+            db.execute(delete(MediaAsset).where(MediaAsset.path.in_(chunk)))
+        for directory in directories:
+            db.execute(delete(MediaAsset).where(
+                MediaAsset.path.startswith(f"{directory}/", autoescape=True)))
+
+    remove()
+    try:
+        if inserts:
+            db.execute(insert(MediaAsset), inserts)
+        if updates:
+            db.execute(update(MediaAsset), updates)
+        db.commit()
+    except IntegrityError:
+        # An upload or filesystem event catalogued one of the files
+        # meanwhile; write the rows one by one instead
+        db.rollback()
+        remove()
+        for row in inserts + updates:
+            db.merge(MediaAsset(**row))
+        db.commit()
+
+
+def scan_catalog(full: bool = False) -> Dict[str, Any]:
+    """Bring media_assets in line with the media root.
+
+    Unchanged files cost a stat and a dictionary lookup; with ``full``
+    every file is hashed and probed again. Returns counts of what was
+    found and changed.
+    """
+    root = media_root()
+    started = time.perf_counter()
+    report = {"scanned": 0, "added": 0, "updated": 0, "moved": 0, "removed": 0,
+              "unchanged": 0}
+    db = SessionLocal()
+    try:
+        known = {path: (inode, size, mtime_ns) for path, inode, size, mtime_ns in db.execute(
+            select(MediaAsset.path, MediaAsset.inode, MediaAsset.size, MediaAsset.mtime_ns))}
+        seen = set()
+        changed: List[Tuple[str, os.stat_result]] = []
+        for path, stat in walk_media(root):
+            report["scanned"] += 1
+            seen.add(path)
+            if not full and known.get(path) == _identity(stat):
+                report["unchanged"] += 1
+            else:
+                changed.append((path, stat))
+
+        # Files that disappeared may reappear among the changed paths
+        # under a new name; match them by inode, size and mtime
+        gone = [path for path in known if path not in seen]
+        by_identity = {}
+        for chunk in chunked(gone):
+            for row in db.execute(select(*(getattr(MediaAsset, column) for column in _COLUMNS))
+                                  .where(MediaAsset.path.in_(chunk))):
+                by_identity[known[row.path]] = row._asdict()
+        deletes = gone
+        inserts, updates = [], []
+        for path, stat in changed:
+            previous = None if full else by_identity.pop(_identity(stat), None)
+            try:
+                row = _moved(previous, path, stat) if previous else inspect_file(path, stat)
+            except FileNotFoundError:
+                # Deleted while the scan was running
+                continue
+            if path in known:
+                updates.append(row)
+                report["updated"] += 1
+            else:
+                inserts.append(row)
+                report["moved" if previous else "added"] += 1
+            if len(inserts) + len(updates) >= SCAN_BATCH_SIZE:
+                _apply(db, inserts, updates, [])
+                inserts, updates = [], []
+        _apply(db, inserts, updates, deletes)
+        report["removed"] = len(by_identity)
+    finally:
+        db.close()
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def refresh_paths(paths: Iterable[str], digests: Optional[Dict[str, str]] = None) -> int:
+    """Re-check specific media paths, e.g. after an upload, delete or event.
+
+    Paths that no longer name a file are dropped from the catalog.
+    ``digests`` supplies hashes already known (uploads compute one while
+    streaming) so those files are not read again. Returns the number of
+    rows written.
+    """
+    root = media_root()
+    digests = digests or {}
+    paths = sorted({path for path in paths if path and not any(
+        part.startswith(".") for part in path.split("/"))})
+    if not paths:
+        return 0
+    db = SessionLocal()
+    try:
+        known = {}
+        for chunk in chunked(paths):
+            for row in db.execute(select(MediaAsset.path, MediaAsset.inode, MediaAsset.size,
+                                         MediaAsset.mtime_ns).where(MediaAsset.path.in_(chunk))):
+                known[row.path] = (row.inode, row.size, row.mtime_ns)
+        inserts, updates, deletes, missing = [], [], [], []
+        for path in paths:
+            try:
+                stat = os.stat(root / path)
+            except (FileNotFoundError, NotADirectoryError):
+                stat = None
+            if stat is None:
+                if path in known:
+                    deletes.append(path)
+                # Also covers a directory that was moved away as a whole
+                missing.append(path)
+                continue
+            if not stat_module.S_ISREG(stat.st_mode):
+                continue
+            if known.get(path) == _identity(stat):
+                continue
+            try:
+                row = inspect_file(path, stat, digests.get(path))
+            except FileNotFoundError:
+                continue
+            (updates if path in known else inserts).append(row)
+        _apply(db, inserts, updates, deletes, missing)
+    finally:
+        db.close()
+    return len(inserts) + len(updates) + len(deletes)
+
+
+class CatalogService:
+    """Keeps the media catalog current in the background.
+
+    On startup it runs an incremental scan, then follows filesystem
+    events (inotify on Linux, through watchfiles) and rescans every
+    ``scan_interval`` seconds to catch anything the events missed, such
+    as changes made while the server was down or on network mounts.
+    With several server workers, a lock file in the media root lets only
+    one of them do this.
+    """
+
+    def __init__(self, scan_interval: int, watch: bool):
+        self.scan_interval = scan_interval
+        self.watch = watch
+        self._lock_file = None
+        self._tasks: List[asyncio.Task] = []
+        self._stop: Optional[asyncio.Event] = None
+        self.last_scan: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self.refreshed = 0
+
+    def _acquire_lock(self) -> bool:
+        try:
+            root = media_root()
+            root.mkdir(parents=True, exist_ok=True)
+            handle = open(root / CATALOG_LOCK, "a")
+        except OSError as e:
+            self.last_error = str(e)
+            return False
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            return False
+        self._lock_file = handle
+        return True
+
+    async def scan(self, full: bool = False) -> Dict[str, Any]:
+        report = await to_thread.run_sync(scan_catalog, full)
+        self.last_scan = dict(report, finished_at=time.time())
+        return report
+
+    async def refresh(self, paths: Iterable[str], digests: Optional[Dict[str, str]] = None):
+        self.refreshed += await to_thread.run_sync(refresh_paths, list(paths), digests)
+
+    async def _scan_periodically(self):
+        while True:
+            try:
+                await self.scan()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"Scan failed: {e}"
+            if not self.scan_interval:
+                return
+            await asyncio.sleep(self.scan_interval)
+
+    async def _follow_events(self):
+        root = media_root()
+        async for changes in watchfiles.awatch(root, stop_event=self._stop, recursive=True):
+            changed = {Path(path) for _, path in changes}
+            try:
+                if any(path.is_dir() for path in changed):
+                    # A directory moved in brings files no event names
+                    await self.scan()
+                else:
+                    await self.refresh(clean_media_path(path.relative_to(root).as_posix())
+                                       for path in changed)
+            except Exception as e:
+                self.last_error = f"Refresh failed: {e}"
+
+    async def start(self):
+        if self._tasks or not self._acquire_lock():
+            return
+        self._stop = asyncio.Event()
+        self._tasks.append(asyncio.create_task(self._scan_periodically()))
+        if self.watch and watchfiles is not None:
+            self._tasks.append(asyncio.create_task(self._follow_events()))
+
+    async def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": bool(self._tasks),
+            "watching": len(self._tasks) > 1,
+            "last_scan": self.last_scan,
+            "refreshed": self.refreshed,
+            "last_error": self.last_error,
+        }
+
+
+catalog_service = CatalogService(
+    scan_interval=config.media_catalog_scan_interval,
+    watch=config.media_catalog_watch,
+)
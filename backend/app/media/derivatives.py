@@ -0,0 +1,332 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config import get_config
+from .storage import media_root
+from .uploads import VIDEO_EXTENSIONS
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow is listed in requirements.txt
+    Image = ImageOps = None
+
+config = get_config()
+
+# Derivatives are cached under a dot-directory of the media root, which
+# scans, garbage collection and /serve skip. A file's name is its key:
+# the source's SHA-256 plus the transform, so an edited source gets new
+# derivatives and the old ones age out of the LRU instead of going stale.
+CACHE_DIR = ".derivatives"
+# Images Pillow can decode (not SVG)
+RASTER_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "bmp", "webp"}
+FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+# Largest box a derivative may be asked for
+MAX_DIMENSION = 4096
+# Cache hits refresh the file's mtime, which eviction orders by, at most
+# this often so hot thumbnails do not cost a metadata write per request
+TOUCH_INTERVAL = 3600
+# Eviction trims the cache to this fraction of [media] derivative_cache_size
+EVICT_TO = 0.9
+FFMPEG_TIMEOUT = 30
+
+
+class DerivativeError(Exception):
+    """The source cannot be turned into an image (unknown format, corrupt...)"""
+
+
+class DerivativesUnavailable(DerivativeError):
+    """Pillow is not installed"""
+
+
+class DerivativeServiceBusy(Exception):
+    """Raised when the render queue is full and the request should be shed."""
+
+
+@dataclass(frozen=True)
+class Transform:
+    """Fit within ``width`` x ``height`` (never upscaling), encoded as ``format``"""
+    width: int
+    height: int
+    format: str = "webp"
+    quality: int = 85
+
+    def key(self, sha256: str) -> str:
+        return f"{sha256}-{self.width}x{self.height}-q{self.quality}.{self.format}"
+
+    def clamped(self, width: Optional[int], height: Optional[int]) -> "Transform":
+        """The same transform for a ``width`` x ``height`` source.
+
+        Boxes larger than the source all give the source size, so they
+        share one cache entry.
+        """
+        if not width or not height:
+            return self
+        scale = min(self.width / width, self.height / height, 1)
+        return Transform(max(1, round(width * scale)), max(1, round(height * scale)),
+                         self.format, self.quality)
+
+
+def thumbnail_transform() -> Transform:
+    """The ``[media] thumbnail_size`` / ``compression_quality`` transform"""
+    width, _, height = config.media_thumbnail_size.lower().partition("x")
+    return Transform(int(width), int(height or width), "webp", config.media_compression_quality)
+
+
+def has_derivatives(path: str) -> bool:
+    """Whether thumbnails can be made of the media file at ``path``"""
+    extension = path.rsplit(".", 1)[-1].lower()
+    if extension in RASTER_EXTENSIONS:
+        return Image is not None
+    return extension in VIDEO_EXTENSIONS and Image is not None and _has_ffmpeg()
+
+
+@lru_cache(maxsize=1)
+def _has_ffmpeg() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def cache_dir() -> Path:
+    return media_root() / CACHE_DIR
+
+
+def cache_file(key: str) -> Path:
+    # Two-level fan-out keeps directories small
+    return cache_dir() / key[:2] / key
+
+
+def _video_frame(source: str):
+    """A frame one second into a video, via ffmpeg when it is installed"""
+    executable = shutil.which("ffmpeg")
+    if executable is None:
+        raise DerivativeError("Video thumbnails need ffmpeg")
+    for offset in ("1", "0"):
+        result = subprocess.run(
+            [executable, "-v", "error", "-ss", offset, "-i", source, "-frames:v", "1",
+             "-f", "image2pipe", "-vcodec", "png", "-"],
+            capture_output=True, timeout=FFMPEG_TIMEOUT)
+        if result.stdout:
+            return Image.open(io.BytesIO(result.stdout))
+    raise DerivativeError("No frame could be read from the video")
+
+
+def _render(source: str, target: str, media_type: str, transform: Transform) -> int:
+    """Write the derivative of ``source`` to ``target``; runs in a worker process"""
+    # Written beside the target and renamed, so concurrent readers and
+    # other server processes never see a partial file
+    temp = f"{target}.{uuid.uuid4().hex}.part"
+    try:
+        image = _video_frame(source) if media_type == "videos" else Image.open(source)
+        with image:
+            if image.format == "JPEG":
+                # Let the decoder scale down by up to 8x while decoding
+                side = max(transform.width, transform.height)
+                image.draft("RGB", (side, side))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((transform.width, transform.height), Image.LANCZOS)
+            if transform.format == "jpeg" and image.mode != "RGB":
+                # JPEG has no alpha: flatten onto white
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                image = image.convert("RGBA")
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            image.save(temp, FORMATS[transform.format][0], quality=transform.quality,
+                       **({"method": 4} if transform.format == "webp" else {"optimize": True}))
+        os.replace(temp, target)
+    except (OSError, ValueError, Image.DecompressionBombError, subprocess.SubprocessError,
+            DerivativeError) as e:
+        try:
+            os.unlink(temp)
+        except FileNotFoundError:
+            pass
+        # Pillow's messages name the file; keep server paths out of responses
+        raise DerivativeError(str(e) if isinstance(e, DerivativeError)
+                              else "The file is not a readable image")
+    return os.stat(target).st_size
+
+
+def evict(limit: int, keep: str = "") -> Tuple[int, int]:
+    """Delete least recently used derivatives until the cache is under ``limit``.
+
+    ``keep`` (a path just rendered, about to be served) is never deleted.
+    Returns ``(bytes remaining, files deleted)``.
+    """
+    entries = []
+    now = time.time()
+    try:
+        directories = list(os.scandir(cache_dir()))
+    except FileNotFoundError:
+        return 0, 0
+    for directory in directories:
+        if not directory.is_dir(follow_symlinks=False):
+            continue
+        for entry in os.scandir(directory.path):
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith(".part") and now - stat.st_mtime < TOUCH_INTERVAL:
+                # Still being written, possibly by another server process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    deleted = 0
+    if total > limit:
+        entries.sort()
+        target = limit * EVICT_TO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+    return total, deleted
+
+
+class DerivativeService:
+    """Renders derivatives in a process pool and keeps the on-disk cache.
+
+    Image decoding and resampling are CPU-bound, so they run in worker
+    processes; at most ``workers`` renders run plus ``queue_size`` wait,
+    and anything beyond is rejected with ``DerivativeServiceBusy``.
+    Concurrent requests for a derivative that is being rendered wait for
+    that render instead of starting their own. The cache is kept under
+    ``cache_size`` bytes by evicting the least recently used files.
+    """
+
+    def __init__(self, workers: int, queue_size: int, cache_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.cache_size = cache_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._cache_bytes: Optional[int] = None
+        self._evicting = False
+        self.hits = 0
+        self.rendered = 0
+        self.joined = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn avoids forking a server process that owns threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    async def get(self, source: Path, media_type: str, sha256: str, transform: Transform) -> Path:
+        """Path of the cached derivative, rendering it first if needed"""
+        key = transform.key(sha256)
+        target = cache_file(key)
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, self._touch, target):
+            self.hits += 1
+            return target
+
+        task = self._pending.get(key)
+        if task is not None:
+            self.joined += 1
+        else:
+            if Image is None:
+                raise DerivativesUnavailable("Image derivatives need Pillow")
+            if len(self._pending) >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise DerivativeServiceBusy("Derivative queue is full")
+            # A task of its own, so a client going away does not cancel
+            # the render for everyone else waiting on it
+            task = asyncio.ensure_future(self._generate(key, source, target, media_type, transform))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._pending[key] = task
+        await asyncio.shield(task)
+        return target
+
+    async def _generate(self, key: str, source: Path, target: Path, media_type: str,
+                        transform: Transform):
+        try:
+            await asyncio.to_thread(target.parent.mkdir, parents=True, exist_ok=True)
+            size = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), _render, str(source), str(target), media_type, transform)
+        finally:
+            del self._pending[key]
+        self.rendered += 1
+        await self._account(size, target)
+
+    @staticmethod
+    def _touch(target: Path) -> bool:
+        try:
+            mtime = target.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        now = time.time()
+        if now - mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(target, (now, now))
+            except FileNotFoundError:
+                return False
+        return True
+
+    async def _account(self, size: int, target: Path):
+        """Count the new file ``target`` against the cache size, evicting when it is full"""
+        if self._cache_bytes is not None:
+            self._cache_bytes += size
+        if self._evicting or (self._cache_bytes is not None
+                              and self._cache_bytes <= self.cache_size):
+            return
+        # The first render after startup measures the cache
+        self._evicting = True
+        try:
+            total, deleted = await asyncio.get_running_loop().run_in_executor(
+                None, evict, self.cache_size, str(target))
+            self._cache_bytes = total
+            self.evicted += deleted
+        finally:
+            self._evicting = False
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rendering": len(self._pending),
+            "hits": self.hits,
+            "rendered": self.rendered,
+            "joined": self.joined,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "cache_bytes": self._cache_bytes,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+derivative_service = DerivativeService(
+    workers=config.media_derivative_workers or os.cpu_count() or 1,
+    queue_size=config.media_derivative_queue_size,
+    cache_size=config.media_derivative_cache_size,
+)
@@ -0,0 +1,68 @@
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..crud.bulk import IN_CHUNK_SIZE
+from ..crud.media import referenced_paths
+from ..database import SessionLocal
+from .catalog import refresh_paths
+from .storage import media_root, walk_media
+from .uploads import purge_stale_uploads
+
+# Paths listed in a collection report; the counts cover every file
+REPORT_LIMIT = 1000
+
+
+def collect_garbage(grace_period: int, dry_run: bool = True,
+                    upload_expiry: Optional[int] = None) -> Dict[str, Any]:
+    """Delete media files no template references.
+
+    Files are checked against media_references a chunk at a time, so the
+    cost is one indexed IN query per chunk rather than reading templates.
+    Files modified within ``grace_period`` seconds are kept: they may
+    have been uploaded for a template that has not been saved yet. With
+    ``dry_run`` nothing is deleted and the report lists what would be.
+    Otherwise uploads abandoned for ``upload_expiry`` seconds are removed
+    as well.
+    """
+    root = media_root()
+    cutoff = time.time() - grace_period
+    deleted = []
+    report = {"dry_run": dry_run, "scanned": 0, "unreferenced": 0,
+              "deleted": 0, "freed_bytes": 0, "expired_uploads": 0, "paths": []}
+    if not dry_run and upload_expiry is not None:
+        report["expired_uploads"] = purge_stale_uploads(upload_expiry)
+
+    def sweep(batch: List[Tuple[str, os.stat_result]]):
+        in_use = referenced_paths(db, [path for path, _ in batch])
+        for path, stat in batch:
+            if path in in_use or stat.st_mtime > cutoff:
+                continue
+            report["unreferenced"] += 1
+            if len(report["paths"]) < REPORT_LIMIT:
+                report["paths"].append(path)
+            if dry_run:
+                continue
+            try:
+                (root / path).unlink()
+            except FileNotFoundError:
+                continue
+            deleted.append(path)
+            report["deleted"] += 1
+            report["freed_bytes"] += stat.st_size
+
+    db = SessionLocal()
+    try:
+        batch = []
+        for entry in walk_media(root):
+            report["scanned"] += 1
+            batch.append(entry)
+            if len(batch) == IN_CHUNK_SIZE:
+                sweep(batch)
+                batch = []
+        if batch:
+            sweep(batch)
+    finally:
+        db.close()
+    refresh_paths(deleted)
+    return report
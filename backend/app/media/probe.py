@@ -0,0 +1,257 @@
+import json
+import re
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Dimensions and durations come from the file headers, read with plain
+# struct parsing so the catalog needs no imaging or video libraries.
+# Formats without a parser here (wmv, flv...) go to ffprobe when it is
+# installed and are catalogued without them otherwise.
+
+# Bytes read for image headers and EBML (webm/mkv) headers
+HEADER_SIZE = 64 * 1024
+# Largest MP4 'moov' box read; it holds the duration and track sizes
+MAX_MOOV_SIZE = 16 * 1024 * 1024
+FFPROBE_TIMEOUT = 10
+
+_SVG_TAG = re.compile(rb"<svg\b[^>]*>", re.IGNORECASE | re.DOTALL)
+_SVG_LENGTH = re.compile(r"^\s*([0-9.]+)\s*(px)?\s*$")
+
+
+def _info(width=None, height=None, duration=None) -> Dict[str, Any]:
+    return {"width": int(width) if width else None,
+            "height": int(height) if height else None,
+            "duration": round(duration, 3) if duration else None}
+
+
+def _jpeg(handle) -> Optional[Dict[str, Any]]:
+    handle.seek(2)
+    while True:
+        marker = handle.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        kind = marker[1]
+        if kind == 0xFF:
+            handle.seek(-1, 1)
+            continue
+        if kind in (0xD8, 0x01) or 0xD0 <= kind <= 0xD7:
+            continue
+        (length,) = struct.unpack(">H", handle.read(2))
+        # Start of frame markers, except DHT, JPG and DAC
+        if 0xC0 <= kind <= 0xCF and kind not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", handle.read(5))
+            return _info(width, height)
+        handle.seek(length - 2, 1)
+
+
+def _svg(header: bytes) -> Optional[Dict[str, Any]]:
+    tag = _SVG_TAG.search(header)
+    if not tag:
+        return None
+    attributes = dict(re.findall(r'([\w:-]+)\s*=\s*["\']([^"\']*)["\']',
+                                 tag.group().decode("utf-8", "replace")))
+    width, height = (_SVG_LENGTH.match(attributes.get(name, "")) for name in ("width", "height"))
+    if width and height:
+        return _info(float(width.group(1)), float(height.group(1)))
+    view_box = attributes.get("viewBox", "").replace(",", " ").split()
+    if len(view_box) == 4:
+        return _info(float(view_box[2]), float(view_box[3]))
+    return None
+
+
+def _image(handle, header: bytes) -> Optional[Dict[str, Any]]:
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return _info(*struct.unpack(">II", header[16:24]))
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return _info(*struct.unpack("<HH", header[6:10]))
+    if header.startswith(b"BM"):
+        width, height = struct.unpack("<ii", header[18:26])
+        return _info(width, abs(height))
+    if header.startswith(b"\xff\xd8"):
+        return _jpeg(handle)
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        chunk = header[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", header[26:30])
+            return _info(width & 0x3FFF, height & 0x3FFF)
+        if chunk == b"VP8L":
+            (bits,) = struct.unpack("<I", header[21:25])
+            return _info((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+        if chunk == b"VP8X":
+            return _info(int.from_bytes(header[24:27], "little") + 1,
+                         int.from_bytes(header[27:30], "little") + 1)
+        return None
+    if b"<svg" in header.lower():
+        return _svg(header)
+    return None
+
+
+def _boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """``(type, payload start, payload end)`` of the ISO-BMFF boxes in ``data``"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[offset:offset + 8])
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", data[offset + 8:offset + 16])
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield kind, offset + header, min(offset + size, end)
+        offset += size
+
+
+def _find_moov(handle) -> Optional[bytes]:
+    """Read the 'moov' box, seeking over 'mdat' wherever it is in the file"""
+    offset = 0
+    while True:
+        handle.seek(offset)
+        header = handle.read(16)
+        if len(header) < 8:
+            return None
+        size, kind = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", header[8:16])
+            header_size = 16
+        if kind == b"moov":
+            if size == 0 or size > MAX_MOOV_SIZE:
+                return None
+            handle.seek(offset + header_size)
+            return handle.read(size - header_size)
+        if size < header_size:
+            return None
+        offset += size
+
+
+def _mp4(handle) -> Optional[Dict[str, Any]]:
+    moov = _find_moov(handle)
+    if moov is None:
+        return None
+    duration = width = height = None
+    for kind, start, end in _boxes(moov):
+        if kind == b"mvhd":
+            if moov[start] == 1:
+                timescale, length = struct.unpack(">IQ", moov[start + 20:start + 32])
+            else:
+                timescale, length = struct.unpack(">II", moov[start + 12:start + 20])
+            if timescale:
+                duration = length / timescale
+        elif kind == b"trak" and not width:
+            for child, child_start, child_end in _boxes(moov, start, end):
+                if child == b"tkhd":
+                    # 16.16 fixed point width and height end the box
+                    track_width, track_height = struct.unpack(">II", moov[child_end - 8:child_end])
+                    width, height = track_width >> 16, track_height >> 16
+    return _info(width, height, duration)
+
+
+# QuickTime files need not start with 'ftyp'
+_MP4_FIRST_BOXES = (b"ftyp", b"moov", b"mdat", b"wide", b"free")
+
+# EBML ids (webm/mkv): masters descended into, and the values read
+_EBML_MASTERS = {0x18538067, 0x1549A966, 0x1654AE6B, 0xAE, 0xE0}
+_EBML_CLUSTER = 0x1F43B675
+
+
+def _vint(data: bytes, offset: int, keep_marker: bool):
+    first = data[offset]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable-length integer")
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, offset + length, unknown
+
+
+def _ebml(header: bytes) -> Optional[Dict[str, Any]]:
+    scale, duration, width, height = 1000000, None, None, None
+    offset = 0
+    while offset < len(header) - 2:
+        element, offset, _ = _vint(header, offset, keep_marker=True)
+        size, offset, unknown = _vint(header, offset, keep_marker=False)
+        if element == _EBML_CLUSTER:
+            break
+        if element in _EBML_MASTERS:
+            continue
+        if unknown:
+            break
+        payload = header[offset:offset + size]
+        if element == 0x2AD7B1:
+            scale = int.from_bytes(payload, "big")
+        elif element == 0x4489:
+            duration = struct.unpack(">f" if size == 4 else ">d", payload)[0]
+        elif element == 0xB0 and not width:
+            width = int.from_bytes(payload, "big")
+        elif element == 0xBA and not height:
+            height = int.from_bytes(payload, "big")
+        offset += size
+    if duration is not None:
+        duration = duration * scale / 1e9
+    if not (width or duration):
+        return None
+    return _info(width, height, duration)
+
+
+def _avi(header: bytes) -> Optional[Dict[str, Any]]:
+    if header[12:16] != b"LIST" or header[20:28] != b"hdrlavih":
+        return None
+    frame_us, frames = struct.unpack("<I12xI", header[32:52])
+    width, height = struct.unpack("<II", header[64:72])
+    return _info(width, height, frame_us * frames / 1e6)
+
+
+def _ffprobe(file: Path) -> Optional[Dict[str, Any]]:
+    executable = shutil.which("ffprobe")
+    if executable is None:
+        return None
+    try:
+        result = subprocess.run(
+            [executable, "-v", "error", "-print_format", "json", "-show_format",
+             "-show_streams", "-select_streams", "v:0", str(file)],
+            capture_output=True, timeout=FFPROBE_TIMEOUT, check=True)
+        probed = json.loads(result.stdout)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    stream = (probed.get("streams") or [{}])[0]
+    duration = probed.get("format", {}).get("duration")
+    return _info(stream.get("width"), stream.get("height"),
+                 float(duration) if duration else None)
+
+
+def probe(file: Path, media_type: str) -> Dict[str, Any]:
+    """``width``, ``height`` and ``duration`` of an image or video.
+
+    Each is None when the format is not recognised or the file is
+    truncated; nothing is decoded beyond the headers.
+    """
+    if media_type not in ("images", "videos"):
+        return _info()
+    try:
+        with open(file, "rb") as handle:
+            header = handle.read(HEADER_SIZE)
+            if media_type == "images":
+                info = _image(handle, header)
+            elif header[4:8] in _MP4_FIRST_BOXES:
+                info = _mp4(handle)
+            elif header.startswith(b"\x1a\x45\xdf\xa3"):
+                info = _ebml(header)
+            elif header[:4] == b"RIFF" and header[8:12] == b"AVI ":
+                info = _avi(header)
+            else:
+                info = None
+    except (OSError, ValueError, IndexError, struct.error):
+        info = None
+    if info is None and media_type == "videos":
+        info = _ffprobe(file)
+    return info or _info()
@@ -0,0 +1,93 @@
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+from config import get_config
+
+config = get_config()
+
+# URL prefixes elements use for files under the media root; the Next.js
+# app rewrites /media/* to /api/media/serve/*
+MEDIA_URL_PREFIXES = ("/media/", "/api/media/serve/")
+# Files being deleted wait here, out of the served tree, until the delete
+# is known to be safe
+TRASH_DIR = ".trash"
+
+
+def media_root() -> Path:
+    return Path(config.media_upload_path)
+
+
+def clean_media_path(path: str) -> Optional[str]:
+    """``path`` relative to the media root, or None if it is not a valid one.
+
+    Accepts ``images/a.png`` as well as the ``/media/images/a.png`` URL form;
+    query strings and fragments are dropped. Paths climbing out of the
+    root are rejected.
+    """
+    path = path.split("?", 1)[0].split("#", 1)[0]
+    for prefix in MEDIA_URL_PREFIXES:
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+            break
+    if "\\" in path or "\0" in path:
+        return None
+    parts = [part for part in path.split("/") if part not in ("", ".")]
+    if not parts or ".." in parts:
+        return None
+    return "/".join(parts)
+
+
+def media_reference(value: Any) -> Optional[str]:
+    """The media path an element property points at, if it is a media URL"""
+    if isinstance(value, str) and value.startswith(MEDIA_URL_PREFIXES):
+        return clean_media_path(value)
+    return None
+
+
+def media_file(path: str) -> Path:
+    """Absolute location of a cleaned media path"""
+    return media_root() / path
+
+
+def trash_media(path: str) -> Path:
+    """Move a media file into the trash; returns where it went.
+
+    Raises ``FileNotFoundError`` or ``IsADirectoryError`` like ``unlink``.
+    """
+    source = media_file(path)
+    if source.is_dir():
+        raise IsADirectoryError(path)
+    trash = media_root() / TRASH_DIR
+    trash.mkdir(exist_ok=True)
+    trashed = trash / uuid.uuid4().hex
+    os.rename(source, trashed)
+    return trashed
+
+
+def restore_media(trashed: Path, path: str):
+    """Put a file moved by ``trash_media`` back at ``path``"""
+    os.rename(trashed, media_file(path))
+
+
+def walk_media(root: Path) -> Iterator[Tuple[str, os.stat_result]]:
+    """``(relative path, stat)`` for every file under ``root``.
+
+    Dot-files and dot-directories (partial uploads, caches) are skipped.
+    """
+    pending = [""]
+    while pending:
+        relative = pending.pop()
+        try:
+            entries = list(os.scandir(os.path.join(root, relative)))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            path = relative + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                pending.append(path + "/")
+            elif entry.is_file(follow_symlinks=False):
+                yield path, entry.stat()
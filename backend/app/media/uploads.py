@@ -0,0 +1,289 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+from anyio import to_thread
+
+from config import get_config
+from .storage import media_file, media_root
+
+config = get_config()
+
+# Partial uploads live in a dot-directory under the media root: on the
+# same filesystem as their destination, so publishing them is a rename,
+# and skipped by garbage collection and directory listings.
+UPLOAD_DIR = ".uploads"
+# Request chunks are gathered up to this size before each disk write
+WRITE_BUFFER_SIZE = 1 << 20
+# Chunk size for hashing a finished resumable upload
+HASH_CHUNK_SIZE = 1 << 20
+
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "bmp", "webp", "svg"}
+VIDEO_EXTENSIONS = {"mp4", "avi", "mov", "wmv", "flv", "webm", "mkv"}
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class MediaUploadError(Exception):
+    """The upload was rejected (bad filename, extension...)"""
+
+
+class MediaTooLarge(MediaUploadError):
+    pass
+
+
+class MediaExists(MediaUploadError):
+    pass
+
+
+class UploadOffsetMismatch(MediaUploadError):
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+class UploadInProgress(MediaUploadError):
+    pass
+
+
+class ChecksumMismatch(MediaUploadError):
+    pass
+
+
+def media_type_for(filename: str) -> str:
+    """Media root subdirectory for a file: images, videos or files"""
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        return "images"
+    if extension in VIDEO_EXTENSIONS:
+        return "videos"
+    return "files"
+
+
+def target_path(filename: str) -> str:
+    """Media path an uploaded ``filename`` is stored at, e.g. ``images/logo.png``"""
+    if (not filename or "/" in filename or "\\" in filename or "\0" in filename
+            or filename.startswith(".") or len(filename) > 255):
+        raise MediaUploadError("Invalid filename")
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension not in config.media_allowed_extensions:
+        raise MediaUploadError(f"File type not allowed: .{extension}")
+    return f"{media_type_for(filename)}/{filename}"
+
+
+def upload_dir() -> Path:
+    directory = media_root() / UPLOAD_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def media_info(path: str, size: int, sha256: str) -> Dict[str, Any]:
+    return {"path": path, "url": f"/media/{path}", "size": size, "sha256": sha256}
+
+
+async def _write_stream(handle, chunks: AsyncIterator[bytes], limit: int, digest=None) -> int:
+    """Append ``chunks`` to ``handle`` and return the number of bytes written.
+
+    Raises ``MediaTooLarge`` as soon as more than ``limit`` bytes arrive;
+    whatever was written by then is left for the caller to discard. Disk
+    writes run in a worker thread so the event loop keeps serving.
+    """
+    written = 0
+    buffer = bytearray()
+    async for chunk in chunks:
+        written += len(chunk)
+        if written > limit:
+            raise MediaTooLarge(f"File exceeds {limit} bytes")
+        if digest is not None:
+            digest.update(chunk)
+        buffer += chunk
+        if len(buffer) >= WRITE_BUFFER_SIZE:
+            await to_thread.run_sync(handle.write, bytes(buffer))
+            buffer.clear()
+    if buffer:
+        await to_thread.run_sync(handle.write, bytes(buffer))
+    return written
+
+
+def _publish(temp: Path, path: str):
+    """Move a finished upload into place without replacing an existing file.
+
+    The hard link makes the file appear under its final name atomically
+    and fails if the name is taken; filesystems without hard links fall
+    back to a rename after an existence check.
+    """
+    destination = media_file(path)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(temp, destination)
+    except FileExistsError:
+        raise MediaExists(f"{path} already exists")
+    except OSError:
+        if destination.exists():
+            raise MediaExists(f"{path} already exists")
+        os.replace(temp, destination)
+        return
+    temp.unlink()
+
+
+def _discard(path: Path):
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+async def save_upload(filename: str, chunks: AsyncIterator[bytes],
+                      content_length: Optional[int] = None) -> Dict[str, Any]:
+    """Stream an upload to disk, hashing it, and publish it under the media root.
+
+    The body is never held in memory: it is written to a temporary file
+    as it arrives and rejected with ``MediaTooLarge`` mid-stream once it
+    passes ``[media] max_file_size``.
+    """
+    path = target_path(filename)
+    limit = config.media_max_file_size
+    if content_length is not None and content_length > limit:
+        raise MediaTooLarge(f"File exceeds {limit} bytes")
+    if media_file(path).exists():
+        raise MediaExists(f"{path} already exists")
+
+    temp = upload_dir() / f"{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    try:
+        with open(temp, "wb") as handle:
+            size = await _write_stream(handle, chunks, limit, digest)
+            handle.flush()
+            await to_thread.run_sync(os.fsync, handle.fileno())
+        await to_thread.run_sync(_publish, temp, path)
+    except BaseException:
+        _discard(temp)
+        raise
+    return media_info(path, size, digest.hexdigest())
+
+
+# Resumable uploads. A session is a .part file plus a .json file holding
+# the target filename, declared size and owner; the .part file's size is
+# the offset the next chunk must start at, so state survives restarts
+# and is shared by every worker.
+
+def _session_files(upload_id: str):
+    directory = upload_dir()
+    return directory / f"{upload_id}.part", directory / f"{upload_id}.json"
+
+
+def create_session(filename: str, size: int, user_id: int,
+                   sha256: Optional[str] = None) -> Dict[str, Any]:
+    path = target_path(filename)
+    if size > config.media_max_file_size:
+        raise MediaTooLarge(f"File exceeds {config.media_max_file_size} bytes")
+    if media_file(path).exists():
+        raise MediaExists(f"{path} already exists")
+
+    upload_id = uuid.uuid4().hex
+    part, meta = _session_files(upload_id)
+    part.touch()
+    session = {"id": upload_id, "path": path, "size": size,
+               "sha256": sha256.lower() if sha256 else None, "created_by": user_id}
+    meta.write_text(json.dumps(session))
+    return dict(session, offset=0)
+
+
+def load_session(upload_id: str) -> Optional[Dict[str, Any]]:
+    """The session with its current ``offset``, or None if there is none"""
+    if not _UPLOAD_ID.match(upload_id):
+        return None
+    part, meta = _session_files(upload_id)
+    try:
+        session = json.loads(meta.read_text())
+        session["offset"] = part.stat().st_size
+    except FileNotFoundError:
+        return None
+    return session
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def append_chunk(session: Dict[str, Any], offset: int, chunks: AsyncIterator[bytes],
+                       content_length: Optional[int] = None) -> Dict[str, Any]:
+    """Append a chunk at ``offset`` and publish the file once it is complete.
+
+    ``offset`` must equal the bytes received so far; a client that lost
+    track asks for the session and resumes from its ``offset``. Returns
+    the session with the new offset, plus ``media`` when the upload
+    finished. A chunk that fails mid-way is truncated back to ``offset``.
+    """
+    part, meta = _session_files(session["id"])
+    remaining = session["size"] - offset
+    if content_length is not None and content_length > remaining:
+        raise MediaTooLarge(f"Chunk runs past the declared size of {session['size']} bytes")
+
+    with open(part, "ab") as handle:
+        # One writer per session: a retried request racing the original
+        # would otherwise interleave bytes
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadInProgress("Another chunk of this upload is being written")
+        current = os.fstat(handle.fileno()).st_size
+        if offset != current:
+            raise UploadOffsetMismatch(current)
+        try:
+            written = await _write_stream(handle, chunks, remaining)
+            handle.flush()
+        except BaseException:
+            handle.truncate(current)
+            raise
+        await to_thread.run_sync(os.fsync, handle.fileno())
+        # Keeps an active session from expiring
+        os.utime(meta)
+
+        session = dict(session, offset=current + written)
+        if session["offset"] < session["size"]:
+            return session
+
+        sha256 = await to_thread.run_sync(_file_digest, part)
+        if session["sha256"] and sha256 != session["sha256"]:
+            discard_session(session["id"])
+            raise ChecksumMismatch("Upload does not match the declared sha256")
+        try:
+            await to_thread.run_sync(_publish, part, session["path"])
+        except MediaExists:
+            # Another upload took the name first
+            discard_session(session["id"])
+            raise
+        _discard(meta)
+    return dict(session, media=media_info(session["path"], session["size"], sha256))
+
+
+def discard_session(upload_id: str):
+    for path in _session_files(upload_id):
+        _discard(path)
+
+
+def purge_stale_uploads(max_age: int) -> int:
+    """Delete upload files untouched for ``max_age`` seconds; returns how many"""
+    directory = media_root() / UPLOAD_DIR
+    cutoff = time.time() - max_age
+    purged = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+            _discard(Path(entry.path))
+            purged += 1
+    return purged
@@ -0,0 +1,83 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import get_config
+from ..crud.elements import _number
+from .derivatives import MAX_DIMENSION, RASTER_EXTENSIONS
+from .storage import media_reference
+
+config = get_config()
+
+# Templates are laid out on the editor canvas and players scale that
+# canvas to their screen, so an Image element's box on screen is its
+# canvas box times the scale. Each one is pointed at the smallest
+# rendition that still fills that box, rounded up to one of the
+# [media] variant_sizes so that similar boxes and screens share cached
+# derivatives instead of each rendering its own.
+
+
+def parse_size(value: str) -> Tuple[int, int]:
+    """``(width, height)`` of a ``WIDTHxHEIGHT`` setting"""
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height or width)
+
+
+def rendition(box_width: float, box_height: float, fit: str,
+              width: Optional[int], height: Optional[int],
+              sizes: Sequence[int]) -> Optional[int]:
+    """Long edge of the rendition of a ``width`` x ``height`` image for a box.
+
+    ``fit`` is the element's CSS ``object-fit``: ``contain`` shows the
+    whole image inside the box, ``cover`` and ``fill`` spread it over all
+    of it. None means the original is the best fit: its size is unknown,
+    or no rendition would be smaller than it.
+    """
+    if not (width and height and 0 < box_width < math.inf and 0 < box_height < math.inf):
+        return None
+    if fit == "contain":
+        scale = min(box_width / width, box_height / height)
+    else:
+        scale = max(box_width / width, box_height / height)
+    source = max(width, height)
+    needed = math.ceil(source * scale)
+    for size in sizes:
+        if size >= needed:
+            return size if size < source and size <= MAX_DIMENSION else None
+    return None
+
+
+def player_elements(elements: Optional[List[Dict[str, Any]]], assets: Dict[str, Any],
+                    screen: Tuple[int, int], canvas: Tuple[int, int],
+                    image_format: str = "webp") -> List[Dict[str, Any]]:
+    """``elements`` with Image sources swapped for variants sized for ``screen``.
+
+    ``assets`` maps media paths to their catalog rows, which supply the
+    dimensions and the content hash versioning the URLs. Elements that
+    change are copied; the rest are returned as they are. A rewritten
+    element keeps its original URL in ``properties.originalSrc``.
+    """
+    scale = min(screen[0] / canvas[0], screen[1] / canvas[1])
+    sizes = config.media_variant_sizes
+    result = []
+    for element in elements or ():
+        properties = element.get("properties") if isinstance(element, dict) else None
+        if not isinstance(properties, dict) or element.get("type") != "Image":
+            result.append(element)
+            continue
+        path = media_reference(properties.get("src"))
+        asset = assets.get(path) if path else None
+        width, height = _number(element.get("width")), _number(element.get("height"))
+        if (asset is None or width is None or height is None
+                or path.rsplit(".", 1)[-1].lower() not in RASTER_EXTENSIONS):
+            result.append(element)
+            continue
+        size = rendition(width * scale, height * scale, properties.get("objectFit"),
+                         asset.width, asset.height, sizes)
+        if size is None:
+            result.append(element)
+            continue
+        src = (f"/api/media/derivatives/{path}?width={size}&height={size}"
+               f"&format={image_format}&v={asset.sha256[:16]}")
+        result.append(dict(element, properties=dict(properties, src=src,
+                                                     originalSrc=properties["src"])))
+    return result
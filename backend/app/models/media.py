@@ -0,0 +1,48 @@
+from sqlalchemy import BigInteger, Column, Float, ForeignKey, Index, Integer, String
+from ..database import Base
+
+
+class MediaReference(Base):
+    """A template's use of a file under the media root.
+
+    One row per (path, template), with ``path`` relative to the media root
+    (``images/logo.png`` for ``/media/images/logo.png``). Maintained by the
+    CRUD layer on every save, so "where is this file used" is a primary
+    key lookup and garbage collection never has to read templates.
+    """
+    __tablename__ = "media_references"
+
+    path = Column(String, primary_key=True)
+    template_id = Column(Integer, ForeignKey("templates.id"), primary_key=True, index=True)
+
+
+class MediaAsset(Base):
+    """A file under the media root, as last seen by the catalog scanner.
+
+    ``inode``, ``size`` and ``mtime_ns`` identify the version of the file
+    that was inspected: the scanner only re-hashes and re-probes files
+    whose stat no longer matches, and recognises moved files by them.
+    The indexes serve each listing order with and without a type filter,
+    ``path`` breaking ties so pages can be continued by keyset.
+    """
+    __tablename__ = "media_assets"
+    __table_args__ = (
+        Index("ix_media_assets_type_path", "type", "path"),
+        Index("ix_media_assets_type_size", "type", "size", "path"),
+        Index("ix_media_assets_type_mtime", "type", "mtime_ns", "path"),
+        Index("ix_media_assets_size", "size", "path"),
+        Index("ix_media_assets_mtime", "mtime_ns", "path"),
+    )
+
+    path = Column(String, primary_key=True)
+    # images, videos or files, as for uploads
+    type = Column(String(8), nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    mime = Column(String, nullable=False)
+    # Pixels for images and videos, seconds for videos; None when unknown
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    duration = Column(Float, nullable=True)
+    mtime_ns = Column(BigInteger, nullable=False)
+    inode = Column(BigInteger, nullable=False)
@@ -1,9 +1,13 @@
 from ..models.user import User
-from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, Text
+from sqlalchemy import DDL, Column, Float, Integer, Index, String, DateTime, ForeignKey, Text, UniqueConstraint, event
 from sqlalchemy.sql import func
 from sqlalchemy.sql.sqltypes import DateTime
 from sqlalchemy.orm import relationship
 from ..database import Base
+from .types import CompressedJSON
+from config import get_config
+
+config = get_config()
 
 
 class Template(Base):
@@ -12,8 +16,18 @@ class Template(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
-    elements = Column(JSON, nullable=False)  # Store canvas elements as JSON
-    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Store canvas elements as JSON, optionally zlib-compressed
+    elements = Column(CompressedJSON(compress=config.compress_elements,
+                                     level=config.elements_compression_level),
+                      nullable=False)
+    # Maintained by the CRUD layer so listings never need to load elements
+    element_count = Column(Integer, nullable=False,
+                           default=0, server_default="0")
+    content_hash = Column(String(64), nullable=True)
+    # Latest entry in template_revisions, bumped on every saved change
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
+    created_by = Column(Integer, ForeignKey("users.id"),
+                        nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -21,5 +35,65 @@ class Template(Base):
     user = relationship("User", back_populates="templates")
 
 
+class TemplateRevision(Base):
+    """One saved state of a template.
+
+    ``snapshot`` rows hold the full document (name, description, elements);
+    ``delta`` rows hold the JSON Patch that produced the revision from the
+    previous one. A snapshot is written every
+    ``revision_snapshot_interval`` revisions so rebuilding any revision
+    replays a bounded number of deltas.
+    """
+    __tablename__ = "template_revisions"
+    __table_args__ = (UniqueConstraint("template_id", "revision"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    template_id = Column(Integer, ForeignKey("templates.id"), nullable=False)
+    revision = Column(Integer, nullable=False)
+    kind = Column(String(8), nullable=False)  # snapshot | delta
+    payload = Column(CompressedJSON(compress=config.compress_elements,
+                                    level=config.elements_compression_level),
+                     nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TemplateElement(Base):
+    """One element of a template, flattened for querying.
+
+    Rows mirror ``templates.elements`` (which may be stored compressed) and
+    are rewritten by the CRUD layer on every save, so "templates with a
+    Video element" or "templates showing /media/images/a.png" are index
+    lookups instead of decoding every template.
+    """
+    __tablename__ = "template_elements"
+    __table_args__ = (
+        Index("ix_template_elements_type", "type", "template_id"),
+        Index("ix_template_elements_source", "source", "template_id"),
+    )
+
+    template_id = Column(Integer, ForeignKey("templates.id"), primary_key=True)
+    # Index of the element in the template's elements list
+    position = Column(Integer, primary_key=True)
+    type = Column(String, nullable=True)
+    # Media or feed the element displays (properties.src / url / feedUrl)
+    source = Column(String, nullable=True)
+    x = Column(Float, nullable=True)
+    y = Column(Float, nullable=True)
+    width = Column(Float, nullable=True)
+    height = Column(Float, nullable=True)
+
+
+# FTS5 index over template text (SQLite only), maintained by crud.search.
+# rowid is the template id; prefix indexes make "word*" queries cheap.
+TEMPLATE_SEARCH_TABLE = "template_search"
+TEMPLATE_SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TEMPLATE_SEARCH_TABLE} USING fts5("
+    "name, description, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+event.listen(Template.__table__, "after_create",
+             DDL(TEMPLATE_SEARCH_DDL).execute_if(dialect="sqlite"))
+
+
 # Add relationship to User model
 User.templates = relationship("Template", back_populates="user")
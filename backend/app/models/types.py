@@ -0,0 +1,154 @@
+import json
+import zlib
+from typing import Any
+
+from sqlalchemy.types import JSON, LargeBinary, TypeDecorator, UserDefinedType
+
+# Compressed payloads start with this marker followed by a dictionary
+# version byte. Plain JSON always starts with "[" (or whitespace), so the
+# two formats can live side by side in the same column.
+COMPRESSED_MARKER = b"\x00zj"
+
+# Representative elements as the editor saves them (see getDefaultProperties
+# in the dashboard). zlib uses this as a preset dictionary, so even small
+# templates compress well: the keys and default values are already "seen".
+# NEVER edit an existing entry; stored rows reference it by version. Add a
+# new version and bump ELEMENTS_DICTIONARY_VERSION instead.
+_DICTIONARY_SAMPLES = {
+    1: [
+        {"id": 1700000000000, "type": "Webpage", "x": 0, "y": 0, "width": 640, "height": 360, "rotation": 0,
+         "properties": {"url": "", "allowFullscreen": False, "showScrollbars": True, "refreshInterval": 0,
+                        "backgroundColor": "transparent"}, "iconName": "Globe"},
+        {"id": 1700000000001, "type": "QR Code", "x": 0, "y": 0, "width": 200, "height": 200, "rotation": 0,
+         "properties": {"content": "https://example.com", "size": 200, "foregroundColor": "#000000",
+                        "backgroundColor": "#FFFFFF", "errorCorrectionLevel": "M", "format": "url"},
+         "iconName": "QrCode"},
+        {"id": 1700000000002, "type": "Weather", "x": 0, "y": 0, "width": 300, "height": 200, "rotation": 0,
+         "properties": {"location": "London", "units": "metric"}, "iconName": "CloudSun"},
+        {"id": 1700000000003, "type": "Video", "x": 0, "y": 0, "width": 640, "height": 360, "rotation": 0,
+         "properties": {"src": "/media/video.mp4", "autoplay": True, "loop": True, "muted": True,
+                        "controls": False}, "iconName": "Video"},
+        {"id": 1700000000004, "type": "RSS Feed", "x": 0, "y": 0, "width": 400, "height": 300, "rotation": 0,
+         "properties": {"feedUrl": "https://feeds.bbci.co.uk/news/rss.xml", "maxItems": 5, "showTitle": True,
+                        "showDescription": True, "showDate": True, "autoRotate": True, "rotationSpeed": 5,
+                        "fontSize": 16, "color": "#000000", "backgroundColor": "transparent", "bold": False,
+                        "italic": False, "textAlign": "left"}, "iconName": "Rss"},
+        {"id": 1700000000005, "type": "Time/Date", "x": 0, "y": 0, "width": 300, "height": 100, "rotation": 0,
+         "properties": {"showTime": True, "showDate": True, "timeFormat": "12", "dateFormat": "short",
+                        "fontSize": 24, "color": "#000000", "bold": False, "italic": False, "timeZone": "local"},
+         "iconName": "Clock"},
+        {"id": 1700000000006, "type": "Marquee", "x": 0, "y": 0, "width": 1280, "height": 80, "rotation": 0,
+         "properties": {"content": "Scrolling text...", "fontSize": 24, "color": "#000000", "speed": 5,
+                        "direction": "rtl"}, "iconName": "ScrollText"},
+        {"id": 1700000000007, "type": "Shapes", "x": 0, "y": 0, "width": 200, "height": 100, "rotation": 0,
+         "properties": {"shape": "rectangle", "color": "hsl(var(--primary))"}, "iconName": "Shapes"},
+        {"id": 1700000000008, "type": "Image", "x": 0, "y": 0, "width": 200, "height": 100, "rotation": 0,
+         "properties": {"src": "https://placehold.co/300x200.png", "objectFit": "cover"},
+         "iconName": "ImageIcon"},
+        {"id": 1700000000009, "type": "Text", "x": 0, "y": 0, "width": 200, "height": 100, "rotation": 0,
+         "properties": {"content": "Double-click to edit", "fontSize": 24, "color": "#000000"},
+         "iconName": "Type"},
+    ],
+}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+# zlib favours matches near the end of the dictionary, so the most common
+# shapes (Text, Image, Shapes) are listed last above
+ELEMENTS_DICTIONARIES = {
+    version: _dumps(samples).encode("utf-8")
+    for version, samples in _DICTIONARY_SAMPLES.items()
+}
+ELEMENTS_DICTIONARY_VERSION = 1
+
+
+def compress_elements(elements: Any, level: int = 6) -> bytes:
+    """Encode elements as zlib-compressed JSON using the preset dictionary.
+
+    Falls back to plain UTF-8 JSON when compression would not save space
+    (tiny or empty templates).
+    """
+    raw = _dumps(elements).encode("utf-8")
+    compressor = zlib.compressobj(
+        level, zdict=ELEMENTS_DICTIONARIES[ELEMENTS_DICTIONARY_VERSION])
+    compressed = compressor.compress(raw) + compressor.flush()
+    if len(compressed) + len(COMPRESSED_MARKER) + 1 >= len(raw):
+        return raw
+    return COMPRESSED_MARKER + bytes([ELEMENTS_DICTIONARY_VERSION]) + compressed
+
+
+def is_compressed(value: Any) -> bool:
+    return isinstance(value, (bytes, memoryview)) and bytes(
+        value[:len(COMPRESSED_MARKER)]) == COMPRESSED_MARKER
+
+
+def decode_elements(value: Any) -> Any:
+    """Decode a stored elements value in any of the formats it may be in.
+
+    Handles compressed blobs, plain JSON text or bytes (rows written before
+    compression was enabled) and values the driver already parsed (the
+    PostgreSQL JSON column).
+    """
+    if value is None or isinstance(value, (list, dict)):
+        return value
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if isinstance(value, bytes) and value.startswith(COMPRESSED_MARKER):
+        header = len(COMPRESSED_MARKER)
+        decompressor = zlib.decompressobj(
+            zdict=ELEMENTS_DICTIONARIES[value[header]])
+        value = decompressor.decompress(value[header + 1:]) + \
+            decompressor.flush()
+    return json.loads(value)
+
+
+class _StoredJSON(UserDefinedType):
+    """Column type with no driver-level processing; declared as JSON.
+
+    SQLite stores whatever it is given, so a "JSON" column can hold the
+    plain JSON text of older rows next to compressed blobs.
+    """
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return "JSON"
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON column that can transparently store zlib-compressed payloads.
+
+    Reads always accept both plain and compressed values, so compression
+    can be switched on without rewriting existing rows first. On SQLite the
+    column keeps its JSON declaration; on other databases compressed
+    storage needs a binary column (see update_database_compress_elements.py)
+    and plain storage keeps the native JSON type.
+    """
+    impl = JSON
+    cache_ok = True
+
+    def __init__(self, compress: bool = False, level: int = 6):
+        super().__init__()
+        self.compress = compress
+        self.level = level
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(_StoredJSON())
+        if self.compress:
+            return dialect.type_descriptor(LargeBinary())
+        return dialect.type_descriptor(JSON())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if self.compress:
+            return compress_elements(value, self.level)
+        if dialect.name == "sqlite":
+            return _dumps(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        return decode_elements(value)
@@ -17,5 +17,13 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     # Force password change on first login
     force_password_change = Column(Boolean, default=True)
+    # Bumped to revoke every access token issued before the change
+    token_version = Column(Integer, nullable=False,
+                           default=0, server_default="0")
+    # Bumped on every change; writes can require the version they read
+    version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # ORM flushes bump version and fail on a concurrent change
+    __mapper_args__ = {"version_id_col": version}
@@ -0,0 +1,4 @@
+from .base import OwnedRepository
+from .templates import TemplateRepository
+
+__all__ = ["OwnedRepository", "TemplateRepository"]
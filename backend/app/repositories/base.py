@@ -0,0 +1,22 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class OwnedRepository:
+    """Queries over rows owned by a user, scoped to one principal.
+
+    Subclasses pass ``owner_id`` down to the CRUD layer, which adds it to
+    the statement's WHERE clause, so authorizing an operation costs no
+    extra query. A miss is classified afterwards: the CRUD functions return
+    None when the row does not exist (404) and raise ``PermissionDenied``
+    when it belongs to someone else (403).
+    """
+
+    def __init__(self, db: AsyncSession, principal):
+        self.db = db
+        self.principal = principal
+
+    @property
+    def owner_id(self) -> Optional[int]:
+        """Owner every statement is limited to; None lets admins reach all rows"""
+        return None if self.principal.is_admin else self.principal.id
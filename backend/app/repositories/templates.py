@@ -0,0 +1,112 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from ..crud import template as crud_template
+from ..schemas.template import TemplateCreate, TemplateImport, TemplateUpdate
+from .base import OwnedRepository
+
+
+class TemplateRepository(OwnedRepository):
+    """Template operations on behalf of one principal.
+
+    Listings always return the principal's own templates; single-template
+    operations also reach other users' templates for admins.
+    """
+
+    async def list(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+                   fields: Optional[Sequence[str]] = None, element_type: Optional[str] = None,
+                   source: Optional[str] = None):
+        return await crud_template.get_templates_by_user_async(
+            self.db, user_id=self.principal.id, skip=skip, limit=limit,
+            after_id=after_id, fields=fields, element_type=element_type, source=source)
+
+    async def summaries(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+                        element_type: Optional[str] = None, source: Optional[str] = None):
+        return await crud_template.get_template_summaries_by_user_async(
+            self.db, user_id=self.principal.id, skip=skip, limit=limit, after_id=after_id,
+            element_type=element_type, source=source)
+
+    async def search(self, query: str, skip: int = 0, limit: int = 20):
+        return await crud_template.search_templates_async(
+            self.db, query=query, owner_id=self.owner_id, skip=skip, limit=limit)
+
+    async def using_media(self, path: str):
+        """``(usage count, templates)`` for a media file; the count covers everyone's"""
+        return await crud_template.get_templates_using_media_async(
+            self.db, path=path, owner_id=self.owner_id)
+
+    async def get(self, template_id: int, fields: Optional[Sequence[str]] = None):
+        return await crud_template.get_template_async(
+            self.db, template_id=template_id, fields=fields, owner_id=self.owner_id)
+
+    async def create(self, template: TemplateCreate):
+        return await crud_template.create_template_async(
+            self.db, template=template, user_id=self.principal.id)
+
+    async def update(self, template_id: int, template: TemplateUpdate,
+                     expected_revision: Optional[int] = None):
+        return await crud_template.update_template_async(
+            self.db, template_id=template_id, template=template, user_id=self.principal.id,
+            owner_id=self.owner_id, expected_revision=expected_revision)
+
+    async def patch(self, template_id: int, operations: List[Dict[str, Any]],
+                    expected_revision: Optional[int] = None):
+        return await crud_template.patch_template_async(
+            self.db, template_id=template_id, operations=operations, user_id=self.principal.id,
+            owner_id=self.owner_id, expected_revision=expected_revision)
+
+    async def delete(self, template_id: int, expected_revision: Optional[int] = None):
+        return await crud_template.delete_template_async(
+            self.db, template_id=template_id, owner_id=self.owner_id,
+            expected_revision=expected_revision)
+
+    async def create_many(self, templates: Sequence[TemplateCreate],
+                          owner_ids: Optional[Sequence[int]] = None):
+        return await crud_template.bulk_create_templates_async(
+            self.db, templates=templates, user_id=self.principal.id, owner_ids=owner_ids)
+
+    async def import_many(self, rows: Sequence[Tuple[int, TemplateImport]]):
+        """Create imported templates and return a result per row.
+
+        For admins each template keeps the ``owner`` named in its row, and
+        rows naming a user that does not exist here fail. Everyone else's
+        imports belong to themselves.
+        """
+        owners = {}
+        if self.principal.is_admin:
+            owners = await crud_template.find_user_ids_async(
+                self.db, {row.owner for _, row in rows if row.owner})
+
+        accepted, owner_ids, results = [], [], []
+        for index, row in rows:
+            if self.principal.is_admin and row.owner:
+                if row.owner not in owners:
+                    results.append({"index": index, "status": "error",
+                                    "detail": f"Unknown owner: {row.owner}"})
+                    continue
+                owner_ids.append(owners[row.owner])
+            else:
+                owner_ids.append(self.principal.id)
+            accepted.append((index, row))
+
+        ids = await self.create_many([row for _, row in accepted], owner_ids)
+        results.extend({"index": index, "status": "created", "id": template_id}
+                       for (index, _), template_id in zip(accepted, ids))
+        return results
+
+    def stream(self, batch_size: int = 500):
+        """Every template the principal can reach, with its owner's username"""
+        return crud_template.stream_templates_async(
+            self.db, owner_id=self.owner_id, batch_size=batch_size)
+
+    async def delete_many(self, template_ids: Sequence[int]):
+        return await crud_template.bulk_delete_templates_async(
+            self.db, template_ids=template_ids, owner_id=self.owner_id)
+
+    async def revisions(self, template_id: int, skip: int = 0, limit: int = 100,
+                        after_id: Optional[int] = None):
+        return await crud_template.get_template_revisions_async(
+            self.db, template_id=template_id, skip=skip, limit=limit, after_id=after_id,
+            owner_id=self.owner_id)
+
+    async def revision(self, template_id: int, revision: int):
+        return await crud_template.get_template_revision_async(
+            self.db, template_id=template_id, revision=revision, owner_id=self.owner_id)
@@ -1,4 +1,4 @@
-from .user import UserBase, UserCreate, UserUpdate, UserLogin, UserResponse, Token, TokenData
+from .user import UserBase, UserCreate, UserImport, UserUpdate, UserLogin, UserResponse, Token, TokenData
 
-__all__ = ["UserBase", "UserCreate", "UserUpdate",
+__all__ = ["UserBase", "UserCreate", "UserImport", "UserUpdate",
            "UserLogin", "UserResponse", "Token", "TokenData"]
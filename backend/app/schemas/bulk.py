@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class BulkItemResult(BaseModel):
+    """Outcome of one item of a bulk request, by its position in the request"""
+    index: int
+    # created | deleted | error | not_found | forbidden
+    status: str
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+class BatchDelete(BaseModel):
+    ids: List[int]
@@ -0,0 +1,83 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from .template import TemplateSummary
+
+
+class MediaUsages(BaseModel):
+    path: str
+    # Every template using the file, including ones the caller cannot see
+    usage_count: int
+    templates: List[TemplateSummary]
+
+
+class MediaCollection(BaseModel):
+    """Report of a media garbage collection run"""
+    dry_run: bool
+    scanned: int
+    unreferenced: int
+    deleted: int
+    freed_bytes: int
+    # Abandoned resumable uploads removed
+    expired_uploads: int
+    # The first unreferenced paths found, deleted unless dry_run
+    paths: List[str]
+
+
+class MediaFile(BaseModel):
+    """A file stored under the media root"""
+    path: str
+    # URL elements reference the file by
+    url: str
+    size: int
+    sha256: str
+
+
+class UploadCreate(BaseModel):
+    filename: str = Field(..., max_length=255)
+    # Total size in bytes; chunks past it are rejected
+    size: int = Field(..., ge=0)
+    # Checked against the assembled file when given
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")
+
+
+class UploadSession(BaseModel):
+    id: str
+    path: str
+    size: int
+    # Bytes received so far; the next chunk starts here
+    offset: int
+    sha256: Optional[str] = None
+    # Set once the last chunk arrived and the file was published
+    media: Optional[MediaFile] = None
+
+
+class MediaAsset(BaseModel):
+    """A catalogued file under the media root"""
+    path: str
+    url: str
+    # images, videos or files
+    type: str
+    sha256: str
+    size: int
+    mime: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    # Seconds, for videos
+    duration: Optional[float] = None
+    modified_at: datetime
+    # Content-addressed, so cacheable for good; None when no thumbnail
+    # can be made (SVG, other files, videos without ffmpeg)
+    thumbnail_url: Optional[str] = None
+
+
+class MediaScan(BaseModel):
+    """Report of a media catalog scan"""
+    scanned: int
+    added: int
+    updated: int
+    # Files found under a new name, recognised without re-reading them
+    moved: int
+    removed: int
+    unchanged: int
+    seconds: float
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 
@@ -23,14 +23,44 @@ class TemplateCreate(TemplateBase):
     pass
 
 
+class TemplateImport(TemplateBase):
+    """One line of a template import, as written by the export"""
+    # Username of the owner; kept for admin imports when that user exists
+    owner: Optional[str] = None
+
+
 class TemplateUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     elements: Optional[List[Dict[str, Any]]] = None
+    # Revision the client last read; a stale value is rejected with 409
+    revision: Optional[int] = None
+
+
+class TemplateSummary(BaseModel):
+    """Template listing entry without the elements payload"""
+    id: int
+    name: str
+    description: Optional[str] = None
+    element_count: int
+    content_hash: Optional[str] = None
+    revision: int = 0
+    created_by: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TemplateSearchResult(TemplateSummary):
+    """Search hit: the template summary plus the matching text, matches in [brackets]"""
+    snippet: Optional[str] = None
 
 
 class TemplateResponse(TemplateBase):
     id: int
+    revision: int = 0
     created_by: int
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -38,3 +68,30 @@ class TemplateResponse(TemplateBase):
 
     class Config:
         from_attributes = True
+
+
+
+class TemplatePatchOperation(BaseModel):
+    """One RFC 6902 operation against ``{name, description, elements}``"""
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Any = None
+    from_: Optional[str] = Field(None, alias="from")
+
+
+class TemplateRevisionInfo(BaseModel):
+    id: int
+    revision: int
+    kind: str
+    created_by: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TemplateRevisionDocument(BaseModel):
+    revision: int
+    name: str
+    description: Optional[str] = None
+    elements: List[Dict[str, Any]]
@@ -15,6 +15,17 @@ class UserCreate(UserBase):
     password: str
 
 
+class UserImport(UserBase):
+    """One row of a bulk user import.
+
+    Set either ``password`` or ``hashed_password``, an existing bcrypt hash
+    (e.g. exported from another system) that is stored as is.
+    """
+    password: Optional[str] = None
+    hashed_password: Optional[str] = None
+    is_active: bool = True
+
+
 class UserUpdate(BaseModel):
     username: Optional[str] = None
     email: Optional[EmailStr] = None
@@ -23,6 +34,8 @@ class UserUpdate(BaseModel):
     permissions: Optional[Dict[str, Any]] = None
     is_active: Optional[bool] = None
     force_password_change: Optional[bool] = None
+    # Version the client last read; a stale value is rejected with 409
+    version: Optional[int] = None
 
 
 class UserLogin(BaseModel):
@@ -33,6 +46,7 @@ class UserLogin(BaseModel):
 class UserResponse(UserBase):
     id: int
     is_active: bool
+    version: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -47,6 +61,10 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None
+    role: Optional[str] = None
+    permissions: int = 0
+    token_version: Optional[int] = None
 
 
 class PasswordChange(BaseModel):
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Authenticated request latency benchmark.
+
+Measures GET /api/templates/ with a legacy subject-only token (user row
+loaded on every request, principal cache disabled) against a token that
+carries id, role, permissions and token version claims.
+
+Usage:
+    python benchmarks/bench_auth.py [--requests 1000]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from datetime import timedelta
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+# Run against a throwaway database in a scratch directory
+workdir = tempfile.mkdtemp(prefix="ddx-bench-")
+shutil.copy(backend_dir.parent / "config.ini", workdir)
+os.chdir(workdir)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.main import app  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.template import Template  # noqa: E402
+from app.auth.cache import principal_cache  # noqa: E402
+from app.auth.security import create_access_token, create_user_access_token  # noqa: E402
+
+
+def seed():
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com",
+                hashed_password="x", role="Editor", permissions={})
+    db.add(user)
+    db.commit()
+    for i in range(20):
+        db.add(Template(name=f"Template {i}", elements=[], created_by=user.id))
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+    return user
+
+
+def measure(client, token, requests):
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/api/templates/", headers=headers)
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get("/api/templates/", headers=headers)
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+    samples.sort()
+    return (statistics.mean(samples) * 1000,
+            samples[len(samples) // 2] * 1000,
+            samples[int(len(samples) * 0.95)] * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    user = seed()
+    client = TestClient(app)
+    expires = timedelta(minutes=30)
+
+    # Before: subject-only token, user row reloaded on every request
+    principal_cache.ttl = 0
+    legacy_token = create_access_token({"sub": user.username}, expires)
+    before = measure(client, legacy_token, args.requests)
+
+    # After: everything needed to authorize is in the token
+    claims_token = create_user_access_token(user, expires)
+    after = measure(client, claims_token, args.requests)
+
+    print(f"{'token':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print("-" * 42)
+    print(f"{'subject':<12}{before[0]:>10.2f}{before[1]:>10.2f}{before[2]:>10.2f}")
+    print(f"{'claims':<12}{after[0]:>10.2f}{after[1]:>10.2f}{after[2]:>10.2f}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Bulk user import benchmark.
+
+Imports --users users into a scratch database the old way (two duplicate
+check SELECTs and one commit per user, as POST /api/users/ does) and with
+the bulk path (set-based duplicate detection plus one executemany insert
+in a single transaction). Rows carry a precomputed bcrypt hash so only
+the database work is timed; --hash then times hashing --hash passwords
+one at a time vs hash_many across the process pool.
+
+Usage:
+    python benchmarks/bench_bulk_import.py [--users 5000] [--hash 32] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+# Run against a throwaway database in a scratch directory
+workdir = tempfile.mkdtemp(prefix="ddx-bench-")
+shutil.copy(backend_dir.parent / "config.ini", workdir)
+os.chdir(workdir)
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.auth.hashing import HashingService  # noqa: E402
+from app.auth.security import pwd_context  # noqa: E402
+from app.crud import user as crud_user  # noqa: E402
+from app.schemas.user import UserCreate, UserImport  # noqa: E402
+
+
+def per_row(users, hashed):
+    db = SessionLocal()
+    started = time.perf_counter()
+    for user in users:
+        if crud_user.get_user_by_username(db, user.username):
+            continue
+        if crud_user.get_user_by_email(db, user.email):
+            continue
+        crud_user.create_user(db, user, hashed)
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+def bulk(rows):
+    db = SessionLocal()
+    started = time.perf_counter()
+    accepted, _ = crud_user.plan_user_import(db, list(enumerate(rows)))
+    crud_user.bulk_insert_users(db, [{
+        "username": row.username, "email": row.email,
+        "hashed_password": row.hashed_password, "role": row.role,
+        "permissions": {}, "force_password_change": True,
+    } for _, row in accepted])
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+async def hash_pool(passwords, workers):
+    service = HashingService(workers=workers, queue_size=0)
+    await service.hash_many(passwords[:workers])  # start the worker processes
+    started = time.perf_counter()
+    await service.hash_many(passwords)
+    elapsed = time.perf_counter() - started
+    service.shutdown()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--hash", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    hashed = pwd_context.hash("bench-password")
+
+    print(f"{'import':<12}{'users':>8}{'total s':>10}{'users/s':>10}")
+    print("-" * 40)
+    elapsed = per_row([UserCreate(username=f"row{i}", email=f"row{i}@example.com",
+                                  password="x") for i in range(args.users)], hashed)
+    print(f"{'per-row':<12}{args.users:>8}{elapsed:>10.2f}{args.users / elapsed:>10.0f}")
+    elapsed = bulk([UserImport(username=f"bulk{i}", email=f"bulk{i}@example.com",
+                               hashed_password=hashed) for i in range(args.users)])
+    print(f"{'bulk':<12}{args.users:>8}{elapsed:>10.2f}{args.users / elapsed:>10.0f}")
+
+    if args.hash:
+        passwords = [f"password-{i}" for i in range(args.hash)]
+        print(f"\n{'hashing':<12}{'passwords':>10}{'total s':>10}")
+        print("-" * 32)
+        started = time.perf_counter()
+        for password in passwords:
+            pwd_context.hash(password)
+        print(f"{'serial':<12}{args.hash:>10}{time.perf_counter() - started:>10.2f}")
+        elapsed = asyncio.run(hash_pool(passwords, args.workers))
+        print(f"{f'pool x{args.workers}':<12}{args.hash:>10}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
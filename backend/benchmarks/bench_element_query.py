@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Element query benchmark.
+
+Seeds a scratch database with --rows templates of --elements elements
+each (Text, Image, Video, Weather...) and answers "which templates have a
+Video element" and "which templates show /media/images/<name>" two ways:
+loading every template's elements and filtering in Python, and the
+indexed template_elements lookup behind ?element_type= and ?source=.
+
+Usage:
+    python benchmarks/bench_element_query.py [--rows 20000] [--elements 20]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+# Run against a throwaway database in a scratch directory
+workdir = tempfile.mkdtemp(prefix="ddx-bench-")
+shutil.copy(backend_dir.parent / "config.ini", workdir)
+os.chdir(workdir)
+
+from sqlalchemy import insert, select  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.template import Template  # noqa: E402
+from app.crud import template as crud_template  # noqa: E402
+from app.crud.elements import index_elements  # noqa: E402
+
+TYPES = ("Text", "Text", "Text", "Shapes", "Marquee", "Image", "Image", "Time/Date", "Weather", "Video")
+IMAGES = 2000
+
+
+def element(rng):
+    element_type = rng.choice(TYPES)
+    properties = {"content": "Welcome"} if element_type in ("Text", "Marquee") else {}
+    if element_type == "Image":
+        properties["src"] = f"/media/images/img{rng.randrange(IMAGES)}.png"
+    elif element_type == "Video":
+        properties["src"] = f"/media/videos/clip{rng.randrange(200)}.mp4"
+    return {"id": rng.randrange(10**9), "type": element_type, "x": rng.randrange(1920),
+            "y": rng.randrange(1080), "width": 320, "height": 180, "rotation": 0,
+            "properties": properties}
+
+
+def seed(rows, elements):
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com",
+                hashed_password="x", role="Editor", permissions={})
+    db.add(user)
+    db.commit()
+    batch = 2000
+    for start in range(0, rows, batch):
+        templates = [{
+            "name": f"Template {n}",
+            "elements": [element(rng) for _ in range(elements)],
+            "created_by": user.id,
+        } for n in range(start, min(start + batch, rows))]
+        ids = db.scalars(insert(Template).returning(Template.id, sort_by_parameter_order=True),
+                         templates).all()
+        index_elements(db, [(template_id, t["elements"]) for template_id, t in zip(ids, templates)],
+                       replace=False)
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        hits = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, hits
+
+
+def python_scan(db, user_id, predicate):
+    """The pre-index approach: decode every template and look at each element"""
+    return [template_id for template_id, elements in db.execute(
+        select(Template.id, Template.elements).where(Template.created_by == user_id)
+        .order_by(Template.id))
+        if any(predicate(e) for e in elements)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--elements", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    user_id = seed(args.rows, args.elements)
+    print(f"Seeded {args.rows} templates x {args.elements} elements "
+          f"in {time.perf_counter() - started:.1f}s\n")
+
+    source = "/media/images/img42.png"
+    cases = (
+        ("type = Video", lambda e: e.get("type") == "Video", {"element_type": "Video"}),
+        (f"source = {source}", lambda e: e.get("properties", {}).get("src") == source,
+         {"source": source}),
+    )
+    db = SessionLocal()
+    print(f"{'query':<36}{'python scan ms':>16}{'indexed ms':>12}{'matches':>9}")
+    print("-" * 73)
+    for label, predicate, filters in cases:
+        scan_ms, scanned = timed(lambda: python_scan(db, user_id, predicate), args.repeat)
+        # Fetch every match, like the scan, rather than one page
+        index_ms, indexed = timed(lambda: [t.id for t in crud_template.get_template_summaries_by_user(
+            db, user_id, limit=args.rows, **filters)], args.repeat)
+        assert scanned == indexed
+        print(f"{label:<36}{scan_ms:>16.1f}{index_ms:>12.1f}{len(indexed):>9}")
+    db.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark for password verification.
+
+Compares the old inline path (bcrypt verify on the event loop) with the
+process-pool hashing service at 1, 4 and 8 worker processes. Each run fires
+a burst of concurrent logins and reports logins/second together with the
+worst event loop stall observed while the burst was in flight.
+
+Usage:
+    python benchmarks/bench_login.py [--logins 64] [--workers 1,4,8]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import warnings
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+from app.auth.hashing import HashingService  # noqa: E402
+from app.auth.security import pwd_context  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+
+async def watch_loop_lag(stop: asyncio.Event, interval: float = 0.01):
+    """Return the largest delay between scheduled and actual wake-ups"""
+    loop = asyncio.get_running_loop()
+    worst = 0.0
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        worst = max(worst, loop.time() - started - interval)
+    return worst
+
+
+async def run_burst(verify, logins: int):
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop_lag(stop))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(verify() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await watcher
+    assert all(results)
+    return logins / elapsed, worst_lag
+
+
+async def bench_inline(hashed: str, logins: int):
+    async def verify():
+        return pwd_context.verify(PASSWORD, hashed)
+
+    return await run_burst(verify, logins)
+
+
+async def bench_pool(hashed: str, logins: int, workers: int):
+    service = HashingService(workers=workers, queue_size=logins)
+    try:
+        # Warm the pool so process start-up is not measured
+        await asyncio.gather(*(service.verify(PASSWORD, hashed)
+                               for _ in range(workers)))
+        return await run_burst(lambda: service.verify(PASSWORD, hashed), logins)
+    finally:
+        service.shutdown()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", default="1,4,8")
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash(PASSWORD)
+
+    print(f"{'mode':<16}{'logins/s':>12}{'max loop stall':>18}")
+    print("-" * 46)
+
+    rate, lag = await bench_inline(hashed, args.logins)
+    print(f"{'inline':<16}{rate:>12.1f}{lag * 1000:>15.1f} ms")
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        rate, lag = await bench_pool(hashed, args.logins, workers)
+        print(f"{f'pool x{workers}':<16}{rate:>12.1f}{lag * 1000:>15.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Media listing benchmark.
+
+Fills a scratch media root with --files small images and videos and
+lists them two ways: the Next.js route src/app/api/media/list/route.ts
+(readdir, extension filter and sort on every call, names only; then
+with a stat per file, as returning size and mtime would need), and a
+page of the media_assets catalog behind GET /api/media. Also times the
+scanner's first scan, a rescan with nothing changed and one after 100
+files changed.
+
+Usage:
+    python benchmarks/bench_media_catalog.py [--files 100000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+# Run against a throwaway database and media root in a scratch directory
+workdir = tempfile.mkdtemp(prefix="ddx-bench-")
+media = Path(workdir) / "media"
+config = (backend_dir.parent / "config.ini").read_text().splitlines()
+config = [f"upload_path = {media}/" if line.startswith("upload_path") else line
+          for line in config]
+(Path(workdir) / "config.ini").write_text("\n".join(config) + "\n")
+os.chdir(workdir)
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.crud.media import asset_sort_key, list_media_assets  # noqa: E402
+from app.media.catalog import scan_catalog  # noqa: E402
+from app.models.media import MediaAsset  # noqa: E402
+
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".svg"]
+PAGE_SIZE = 100
+
+
+def png(width, height, size):
+    header = b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", width, height)
+    return header + os.urandom(size - len(header))
+
+
+def mp4(seconds, size):
+    mvhd = struct.pack(">I4s12xII80x", 108, b"mvhd", 1000, seconds * 1000)
+    tkhd = struct.pack(">I4s76xII", 92, b"tkhd", 1920 << 16, 1080 << 16)
+    moov = struct.pack(">I4s", 8 + len(mvhd) + 8 + len(tkhd), b"moov") + mvhd + \
+        struct.pack(">I4s", 8 + len(tkhd), b"trak") + tkhd
+    ftyp = struct.pack(">I4s8s", 16, b"ftyp", b"isom\0\0\0\0")
+    return ftyp + struct.pack(">I4s", size, b"mdat") + os.urandom(size - 8) + moov
+
+
+def seed(files):
+    rng = random.Random(7)
+    (media / "images").mkdir(parents=True)
+    (media / "videos").mkdir()
+    for n in range(files):
+        if rng.random() < 0.8:
+            (media / "images" / f"img{n}.png").write_bytes(
+                png(rng.choice((640, 1280, 1920)), rng.choice((360, 720, 1080)),
+                    rng.randrange(1000, 4000)))
+        else:
+            (media / "videos" / f"clip{n}.mp4").write_bytes(
+                mp4(rng.randrange(5, 120), rng.randrange(4000, 8000)))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def readdir_names():
+    # route.ts: fs.readdir, extension filter, sort
+    return sorted(name for name in os.listdir(media / "images")
+                  if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS)
+
+
+def readdir_stat():
+    directory = media / "images"
+    entries = [(os.stat(directory / name).st_mtime_ns, name) for name in os.listdir(directory)
+               if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS]
+    return sorted(entries, reverse=True)[:PAGE_SIZE]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seed(args.files)
+    print(f"Wrote {args.files} media files in {time.perf_counter() - started:.1f}s\n")
+
+    MediaAsset.__table__.create(bind=engine)
+    print(f"{'catalog scan':<44}{'ms':>10}{'inspected':>11}")
+    print("-" * 65)
+    first = scan_catalog()
+    print(f"{'first scan (hash + probe every file)':<44}{first['seconds'] * 1000:>10.0f}"
+          f"{first['added']:>11}")
+    rescan = scan_catalog()
+    print(f"{'rescan, nothing changed':<44}{rescan['seconds'] * 1000:>10.0f}"
+          f"{rescan['added'] + rescan['updated']:>11}")
+    for path in random.Random(3).sample(sorted((media / "images").iterdir()), 100):
+        with open(path, "ab") as handle:
+            handle.write(b"\0")
+    changed = scan_catalog()
+    print(f"{'rescan, 100 files changed':<44}{changed['seconds'] * 1000:>10.0f}"
+          f"{changed['added'] + changed['updated']:>11}")
+
+    db = SessionLocal()
+    images = args.files * 8 // 10
+
+    def page(after=None, **filters):
+        return list_media_assets(db, limit=PAGE_SIZE, after=after, **filters)
+
+    # Walk to the middle of the newest-first listing to time a deep page
+    middle, after = 0, None
+    while middle < images // 2:
+        assets = page(after, media_type="images", sort="modified", descending=True)
+        after = asset_sort_key(assets[-1], "modified")
+        middle += len(assets)
+
+    print(f"\n{'listing images':<44}{'ms':>10}{'rows':>11}")
+    print("-" * 65)
+    for label, fn in [
+        ("readdir + filter + sort (route.ts, names)", readdir_names),
+        ("readdir + stat, newest first (100)", readdir_stat),
+        ("catalog page, by path", lambda: page(media_type="images")),
+        ("catalog page, newest first", lambda: page(media_type="images", sort="modified",
+                                                    descending=True)),
+        (f"catalog page {middle // PAGE_SIZE}, newest first",
+         lambda: page(after, media_type="images", sort="modified", descending=True)),
+        ("catalog page, largest first", lambda: page(media_type="images", sort="size",
+                                                     descending=True)),
+        ("catalog page, path contains '42'", lambda: page(media_type="images", q="42")),
+    ]:
+        ms, rows = timed(fn, args.repeat)
+        print(f"{label:<44}{ms:>10.1f}{len(rows):>11}")
+    db.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Media thumbnail benchmark.
+
+Writes --images photo-sized JPEGs (3000x2000) to a scratch media root
+and loads them the way the media browser does: the full-resolution
+originals through GET /api/media/serve/..., against thumbnails from GET
+/api/media/thumbnails/... on first request (rendered in the process
+pool) and once cached. Then --concurrency clients ask at once for a
+derivative that does not exist yet, to show them sharing one render.
+
+Usage:
+    python benchmarks/bench_media_derivatives.py [--images 24] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+
+def setup():
+    # Run against a throwaway database and media root in a scratch directory
+    workdir = tempfile.mkdtemp(prefix="ddx-bench-")
+    media = Path(workdir) / "media"
+    config = (backend_dir.parent / "config.ini").read_text().splitlines()
+    config = [f"upload_path = {media}/" if line.startswith("upload_path") else line
+              for line in config]
+    (Path(workdir) / "config.ini").write_text("\n".join(config) + "\n")
+    os.chdir(workdir)
+    return workdir, media
+
+
+def seed(media, images):
+    from PIL import Image
+
+    (media / "images").mkdir(parents=True)
+    for n in range(images):
+        # Noise over a gradient compresses about like a photograph
+        gradient = Image.linear_gradient("L").resize((3000, 2000)).rotate(n * 15, expand=False)
+        noise = Image.effect_noise((3000, 2000), 24 + n)
+        photo = Image.merge("RGB", (gradient, noise, Image.blend(gradient, noise, 0.5)))
+        photo.save(media / "images" / f"photo{n}.jpg", quality=90)
+
+
+async def fetch_all(client, urls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(url):
+        async with semaphore:
+            response = await client.get(url)
+            assert response.status_code == 200, f"{url}: {response.status_code}"
+            return len(response.content)
+
+    started = time.perf_counter()
+    sizes = await asyncio.gather(*(fetch(url) for url in urls))
+    return time.perf_counter() - started, sum(sizes)
+
+
+async def run(args, media):
+    import httpx
+    from app.main import app
+    from app.media.derivatives import derivative_service
+
+    names = sorted(path.name for path in (media / "images").iterdir())
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'loading ' + str(len(names)) + ' images':<34}{'seconds':>10}{'MB sent':>10}")
+        print("-" * 54)
+        for label, prefix in [("originals (/serve)", "/api/media/serve/images/"),
+                              ("thumbnails, first request", "/api/media/thumbnails/images/"),
+                              ("thumbnails, cached", "/api/media/thumbnails/images/")]:
+            elapsed, sent = await fetch_all(client, [prefix + name for name in names],
+                                            args.concurrency)
+            print(f"{label:<34}{elapsed:>10.2f}{sent / 1e6:>10.1f}")
+
+        before = derivative_service.stats()
+        elapsed, _ = await fetch_all(
+            client, ["/api/media/derivatives/images/photo0.jpg?width=640&height=640"]
+            * args.concurrency, args.concurrency)
+        after = derivative_service.stats()
+        print(f"\n{args.concurrency} concurrent requests for one new 640px derivative: "
+              f"{after['rendered'] - before['rendered']} render(s), "
+              f"{after['joined'] - before['joined']} joined it, {elapsed:.2f}s")
+    derivative_service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    workdir, media = setup()
+    try:
+        started = time.perf_counter()
+        seed(media, args.images)
+        print(f"Wrote {args.images} 3000x2000 JPEGs in {time.perf_counter() - started:.1f}s "
+              f"({os.cpu_count()} CPUs)\n")
+        asyncio.run(run(args, media))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
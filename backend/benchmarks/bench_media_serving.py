@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Concurrent media streaming benchmark.
+
+Writes a --size MB video to a scratch media root and has --clients
+concurrent players download it from two servers:
+
+- GET /api/media/serve/... from this backend under uvicorn: FileResponse
+  streams the file in chunks and honours Range
+- a Node.js server with the same logic as the Next.js route
+  src/app/api/media/serve/[...path]/route.ts, which reads the whole file
+  into a Buffer per request (skipped when node is not on PATH)
+
+Reports aggregate throughput, the server's peak RSS (Linux only) and what
+a player gets when it seeks with a Range request.
+
+Usage:
+    python benchmarks/bench_media_serving.py [--size 200] [--clients 8]
+"""
+
+import argparse
+import http.client
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent
+
+# Port of route.ts: fs.access, fs.readFile of the whole file, one response
+NEXT_ROUTE = r"""
+const http = require('http'), fs = require('fs').promises, path = require('path');
+const [base, port] = process.argv.slice(-2);
+http.createServer(async (req, res) => {
+  const filePath = decodeURIComponent(req.url.split('?')[0]).replace(/^\/media\//, '');
+  const fullPath = path.join(base, filePath);
+  try { await fs.access(fullPath); } catch (e) { res.writeHead(404); return res.end(); }
+  const fileBuffer = await fs.readFile(fullPath);
+  res.writeHead(200, {'Content-Type': 'video/mp4', 'Cache-Control': 'public, max-age=3600',
+                      'Content-Length': fileBuffer.length});
+  res.end(fileBuffer);
+}).listen(Number(port), '127.0.0.1');
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def peak_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    return float("nan")
+
+
+def download(port, url, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    connection.request("GET", url, headers=headers or {})
+    response = connection.getresponse()
+    received = 0
+    while True:
+        block = response.read(1 << 20)
+        if not block:
+            break
+        received += len(block)
+    connection.close()
+    return response.status, received
+
+
+def run(name, process, port, url, clients, size):
+    wait_for(port)
+    # Warm up: first request pays for imports, the hash cache, page cache...
+    download(port, url)
+    idle = peak_rss_mb(process.pid)
+
+    results = []
+    started = time.perf_counter()
+    threads = [threading.Thread(target=lambda: results.append(download(port, url)))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(received for _, received in results)
+    assert total == clients * size, f"{name}: incomplete downloads"
+    seek_status, seek_bytes = download(port, url, {"Range": f"bytes={size // 2}-{size // 2 + 999999}"})
+    print(f"{name:<26}{total / elapsed / 1e6:>12.0f}{idle:>12.0f}{peak_rss_mb(process.pid):>12.0f}"
+          f"{seek_status:>8}{seek_bytes / 1e6:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=200, help="video size in MB")
+    parser.add_argument("--clients", type=int, default=8)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="ddx-bench-"))
+    media = workdir / "media"
+    (media / "videos").mkdir(parents=True)
+    size = args.size * 1000 * 1000
+    with open(media / "videos" / "bench.mp4", "wb") as handle:
+        block = os.urandom(1000 * 1000)
+        for _ in range(args.size):
+            handle.write(block)
+
+    config = (backend_dir.parent / "config.ini").read_text().splitlines()
+    config = [f"upload_path = {media}/" if line.startswith("upload_path") else line
+              for line in config]
+    (workdir / "config.ini").write_text("\n".join(config) + "\n")
+
+    print(f"{args.clients} clients downloading a {args.size} MB video\n")
+    print(f"{'server':<26}{'MB/s':>12}{'idle RSS MB':>12}{'peak RSS MB':>12}"
+          f"{'seek':>8}{'seek MB':>10}")
+    print("-" * 80)
+    processes = []
+    try:
+        port = free_port()
+        backend = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=workdir, env=dict(os.environ, PYTHONPATH=str(backend_dir)),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        processes.append(backend)
+        run("FastAPI FileResponse", backend, port,
+            "/api/media/serve/videos/bench.mp4", args.clients, size)
+
+        if shutil.which("node"):
+            port = free_port()
+            node = subprocess.Popen(["node", "-e", NEXT_ROUTE, "--", str(media), str(port)])
+            processes.append(node)
+            run("readFile (Next.js route)", node, port,
+                "/media/videos/bench.mp4", args.clients, size)
+        else:
+            print("node not found; skipping the Next.js route baseline")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Media "where used" benchmark.
+
+Seeds a scratch database with --rows templates whose Image and Video
+elements point at --files media files, then finds the templates using
+one file and the unreferenced files among all of them two ways: decoding
+every template's elements in Python, and the media_references index
+behind GET /api/media/{path}/usages and POST /api/media/gc.
+
+Usage:
+    python benchmarks/bench_media_usages.py [--rows 20000] [--files 10000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+# Run against a throwaway database in a scratch directory
+workdir = tempfile.mkdtemp(prefix="ddx-bench-")
+shutil.copy(backend_dir.parent / "config.ini", workdir)
+os.chdir(workdir)
+
+from sqlalchemy import insert, select  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.template import Template  # noqa: E402
+from app.crud import template as crud_template  # noqa: E402
+from app.crud.media import index_media_references, media_paths, referenced_paths  # noqa: E402
+
+ELEMENTS = 20
+
+
+def seed(rows, files):
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com",
+                hashed_password="x", role="Editor", permissions={})
+    db.add(user)
+    db.commit()
+    for start in range(0, rows, 2000):
+        templates = [{
+            "name": f"Template {n}",
+            "elements": [{"type": "Image", "x": 0, "y": 0, "width": 320, "height": 180,
+                          "properties": {"src": f"/media/images/img{rng.randrange(files)}.png"}}
+                         if rng.random() < 0.3 else
+                         {"type": "Text", "properties": {"content": "Welcome"}}
+                         for _ in range(ELEMENTS)],
+            "created_by": user.id,
+        } for n in range(start, min(start + 2000, rows))]
+        ids = db.scalars(insert(Template).returning(Template.id, sort_by_parameter_order=True),
+                         templates).all()
+        index_media_references(db, [(template_id, t["elements"])
+                                    for template_id, t in zip(ids, templates)], replace=False)
+    db.commit()
+    db.close()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def scan_usages(db, path):
+    return [template_id for template_id, elements in db.execute(
+        select(Template.id, Template.elements).order_by(Template.id))
+        if path in media_paths(elements)]
+
+
+def scan_unreferenced(db, paths):
+    used = set()
+    for (elements,) in db.execute(select(Template.elements)):
+        used |= media_paths(elements)
+    return set(paths) - used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seed(args.rows, args.files)
+    print(f"Seeded {args.rows} templates x {ELEMENTS} elements over {args.files} files "
+          f"in {time.perf_counter() - started:.1f}s\n")
+
+    db = SessionLocal()
+    path = "images/img42.png"
+    # Every file in the library, plus as many that nothing references
+    library = [f"images/img{n}.png" for n in range(args.files * 2)]
+
+    scan_ms, scanned = timed(lambda: scan_usages(db, path), args.repeat)
+    index_ms, (_, using) = timed(lambda: crud_template.get_templates_using_media(db, path),
+                                 args.repeat)
+    assert scanned == [t.id for t in using]
+    print(f"{'operation':<40}{'python scan ms':>16}{'indexed ms':>12}{'result':>9}")
+    print("-" * 77)
+    print(f"{'usages of ' + path:<40}{scan_ms:>16.1f}{index_ms:>12.1f}{len(using):>9}")
+
+    scan_ms, scanned = timed(lambda: scan_unreferenced(db, library), args.repeat)
+    index_ms, used = timed(lambda: referenced_paths(db, library), args.repeat)
+    unreferenced = set(library) - used
+    assert scanned == unreferenced
+    label = f"unreferenced among {len(library)} files"
+    print(f"{label:<40}{scan_ms:>16.1f}{index_ms:>12.1f}{len(unreferenced):>9}")
+    db.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
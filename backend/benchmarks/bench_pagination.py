@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Offset vs keyset pagination benchmark.
+
+Seeds a scratch database with --rows templates owned by one user, then
+pages through all of them with get_templates_by_user in offset mode and
+in keyset (cursor) mode, reporting total time and the cost of the last
+page.
+
+Usage:
+    python benchmarks/bench_pagination.py [--rows 100000] [--page-size 100]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+# Run against a throwaway database in a scratch directory
+workdir = tempfile.mkdtemp(prefix="ddx-bench-")
+shutil.copy(backend_dir.parent / "config.ini", workdir)
+os.chdir(workdir)
+
+from sqlalchemy import insert  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.template import Template  # noqa: E402
+from app.crud import template as crud_template  # noqa: E402
+
+
+def seed(rows):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com",
+                hashed_password="x", role="Editor", permissions={})
+    db.add(user)
+    db.commit()
+    batch = 5000
+    for start in range(0, rows, batch):
+        db.execute(insert(Template), [
+            {"name": f"Template {i}", "elements": [{"type": "Text"}],
+             "created_by": user.id}
+            for i in range(start, min(start + batch, rows))
+        ])
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+def walk(user_id, page_size, keyset):
+    db = SessionLocal()
+    pages = 0
+    last_page = 0.0
+    after_id = None
+    skip = 0
+    started = time.perf_counter()
+    while True:
+        page_started = time.perf_counter()
+        if keyset:
+            items = crud_template.get_templates_by_user(
+                db, user_id, limit=page_size, after_id=after_id)
+        else:
+            items = crud_template.get_templates_by_user(
+                db, user_id, skip=skip, limit=page_size)
+        last_page = time.perf_counter() - page_started
+        if not items:
+            break
+        pages += 1
+        after_id = items[-1].id
+        skip += len(items)
+        db.expunge_all()
+    total = time.perf_counter() - started
+    db.close()
+    return pages, total, last_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    user_id = seed(args.rows)
+
+    print(f"{'mode':<10}{'pages':>8}{'total s':>10}{'last page ms':>15}")
+    print("-" * 43)
+    for label, keyset in (("offset", False), ("keyset", True)):
+        pages, total, last_page = walk(user_id, args.page_size, keyset)
+        print(f"{label:<10}{pages:>8}{total:>10.2f}{last_page * 1000:>15.2f}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
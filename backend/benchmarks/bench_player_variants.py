@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Player image variant benchmark.
+
+Builds a template on the 1280x720 editor canvas with a full-screen
+background and --tiles smaller image tiles, all pointing at 3840x2160
+JPEG photos, and loads it as players with 720p, 1080p and 4K screens
+would: every original as stored in the template, against the renditions
+GET /api/templates/{id}/player picks for that screen. Reports bytes
+downloaded and pixels the player has to decode, and the time to fetch
+the renditions on first request (rendered) and once cached.
+
+Usage:
+    python benchmarks/bench_player_variants.py [--tiles 8]
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+SCREENS = [(1280, 720), (1920, 1080), (3840, 2160)]
+
+
+def setup():
+    # Run against a throwaway database and media root in a scratch directory
+    workdir = tempfile.mkdtemp(prefix="ddx-bench-")
+    media = Path(workdir) / "media"
+    config = (backend_dir.parent / "config.ini").read_text().splitlines()
+    config = [f"upload_path = {media}/" if line.startswith("upload_path") else line
+              for line in config]
+    (Path(workdir) / "config.ini").write_text("\n".join(config) + "\n")
+    os.chdir(workdir)
+    return workdir, media
+
+
+def seed(media, tiles):
+    from PIL import Image
+
+    (media / "images").mkdir(parents=True)
+    for n in range(tiles + 1):
+        # Noise over a gradient compresses about like a photograph
+        gradient = Image.linear_gradient("L").resize((3840, 2160)).rotate(n * 15)
+        noise = Image.effect_noise((3840, 2160), 24 + n)
+        photo = Image.merge("RGB", (gradient, noise, Image.blend(gradient, noise, 0.5)))
+        photo.save(media / "images" / f"photo{n}.jpg", quality=90)
+
+    # A full-screen background and a row of tiles on the 1280x720 canvas
+    elements = [{"id": 0, "type": "Image", "x": 0, "y": 0, "width": 1280, "height": 720,
+                 "rotation": 0, "properties": {"src": "/media/images/photo0.jpg",
+                                               "objectFit": "cover"}}]
+    tile = 1280 // tiles
+    for n in range(1, tiles + 1):
+        elements.append({"id": n, "type": "Image", "x": (n - 1) * tile, "y": 520,
+                         "width": tile, "height": 160, "rotation": 0,
+                         "properties": {"src": f"/media/images/photo{n}.jpg",
+                                        "objectFit": "cover"}})
+    return elements
+
+
+def backend_url(src):
+    # /media/ is served by Next.js; fetch the same files from the backend
+    return src.replace("/media/", "/api/media/serve/", 1) if src.startswith("/media/") else src
+
+
+async def fetch_images(client, urls):
+    """Seconds taken, bytes downloaded and pixels decoded for ``urls``"""
+    from PIL import Image
+
+    async def fetch(url):
+        response = await client.get(url)
+        assert response.status_code == 200, f"{url}: {response.status_code}"
+        with Image.open(io.BytesIO(response.content)) as image:
+            return len(response.content), image.width * image.height
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(fetch(url) for url in urls))
+    return (time.perf_counter() - started, sum(size for size, _ in results),
+            sum(pixels for _, pixels in results))
+
+
+async def run(elements):
+    import httpx
+    from app.main import app
+    from app.database import SessionLocal
+    from app.crud.user import create_user
+    from app.media.catalog import scan_catalog
+    from app.media.derivatives import derivative_service
+    from app.schemas.user import UserCreate
+
+    db = SessionLocal()
+    create_user(db, UserCreate(username="bench", email="bench@example.com",
+                               password="bench-password", role="Admin"))
+    db.close()
+    scan_catalog()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        token = (await client.post("/api/auth/login", json={
+            "username": "bench", "password": "bench-password"})).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        template = (await client.post("/api/templates/", json={
+            "name": "Player benchmark", "elements": elements})).json()
+
+        originals = [backend_url(element["properties"]["src"]) for element in elements]
+        elapsed, sent, pixels = await fetch_images(client, originals)
+        print(f"{'screen':<12}{'images':<22}{'seconds':>10}{'MB sent':>10}{'Mpx decoded':>13}")
+        print("-" * 67)
+        print(f"{'any':<12}{'originals':<22}{elapsed:>10.2f}{sent / 1e6:>10.2f}"
+              f"{pixels / 1e6:>13.1f}")
+        for width, height in SCREENS:
+            response = await client.get(f"/api/templates/{template['id']}/player",
+                                        params={"screen_width": width, "screen_height": height})
+            urls = [backend_url(element["properties"]["src"])
+                    for element in response.json()["elements"]]
+            for label in ("variants, first request", "variants, cached"):
+                elapsed, sent, pixels = await fetch_images(client, urls)
+                print(f"{f'{width}x{height}':<12}{label:<22}{elapsed:>10.2f}{sent / 1e6:>10.2f}"
+                      f"{pixels / 1e6:>13.1f}")
+    derivative_service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tiles", type=int, default=8)
+    args = parser.parse_args()
+
+    workdir, media = setup()
+    try:
+        started = time.perf_counter()
+        elements = seed(media, args.tiles)
+        print(f"Wrote {args.tiles + 1} 3840x2160 JPEGs in {time.perf_counter() - started:.1f}s "
+              f"({os.cpu_count()} CPUs)\n")
+        asyncio.run(run(elements))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Template search benchmark.
+
+Seeds a scratch database with --rows templates (names, descriptions and
+Text / Marquee elements drawn from a Zipf-distributed vocabulary, so word
+frequencies look like real text) and times the same queries three ways: LIKE '%word%' on the name, LIKE over the stored
+elements JSON (what a client-side scan amounts to), and the FTS5
+template_search index with bm25 ranking.
+
+LIKE with a LIMIT stops at the first 20 rows it finds, so it is fast when
+the word is on most rows and returns them unranked; FTS5 ranks every
+match, and wins by orders of magnitude on selective words and misses,
+where LIKE has to scan the whole table.
+
+Usage:
+    python benchmarks/bench_search.py [--rows 100000] [--repeat 20]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+# Run against a throwaway database in a scratch directory
+workdir = tempfile.mkdtemp(prefix="ddx-bench-")
+shutil.copy(backend_dir.parent / "config.ini", workdir)
+os.chdir(workdir)
+
+from sqlalchemy import insert, select  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.template import Template  # noqa: E402
+from app.crud import template as crud_template  # noqa: E402
+from app.crud.search import index_templates  # noqa: E402
+
+COMMON = ("welcome menu lunch special offer sale news event meeting schedule "
+          "lobby floor exit parking coffee pharmacy concert").split()
+# Common signage words first, then filler words; weight 1/rank gives a Zipf curve
+WORDS = COMMON + [f"w{n:04d}x" for n in range(5000 - len(COMMON))]
+CUM_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(WORDS) + 1)))
+# A very common word, a two-word query, a prefix, a rare word and a miss
+QUERIES = ("welcome", "lunch special", "conc", "w3000x", "zebra")
+
+
+def sentence(rng, words):
+    return " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=words))
+
+
+def seed(rows):
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com",
+                hashed_password="x", role="Editor", permissions={})
+    db.add(user)
+    db.commit()
+    batch = 5000
+    for start in range(0, rows, batch):
+        templates = [{
+            "name": sentence(rng, 3).title(),
+            "description": sentence(rng, 6),
+            "elements": [{"type": "Text", "properties": {"content": sentence(rng, 8)}},
+                         {"type": "Marquee", "properties": {"content": sentence(rng, 12)}}],
+            "created_by": user.id,
+        } for _ in range(start, min(start + batch, rows))]
+        ids = db.scalars(insert(Template).returning(Template.id, sort_by_parameter_order=True),
+                         templates).all()
+        index_templates(db, [(template_id, t["name"], t["description"], t["elements"])
+                             for template_id, t in zip(ids, templates)])
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        hits = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, len(hits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    user_id = seed(args.rows)
+    print(f"Seeded and indexed {args.rows} templates in {time.perf_counter() - started:.1f}s\n")
+
+    db = SessionLocal()
+    print(f"{'query':<20}{'name LIKE ms':>14}{'JSON LIKE ms':>14}{'FTS5 ms':>10}{'FTS5 hits':>11}")
+    print("-" * 69)
+    for query in QUERIES:
+        word = query.split()[0]
+        name_like = timed(lambda: db.execute(select(Template.id).where(
+            Template.created_by == user_id, Template.name.ilike(f"%{word}%")).limit(20)).all(),
+            args.repeat)
+        json_like = timed(lambda: db.execute(select(Template.id).where(
+            Template.created_by == user_id,
+            Template.elements.cast(Template.name.type).ilike(f"%{word}%")).limit(20)).all(),
+            args.repeat)
+        fts = timed(lambda: crud_template.search_templates(
+            db, query, owner_id=user_id, limit=20), args.repeat)
+        print(f"{query:<20}{name_like[0]:>14.2f}{json_like[0]:>14.2f}{fts[0]:>10.2f}{fts[1]:>11}")
+    db.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
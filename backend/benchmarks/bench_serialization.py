@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Template response serialization benchmark.
+
+Builds in-memory templates with --sizes elements each and times turning
+one into response bytes through FastAPI's response_model path (pydantic
+validation from attributes, then dump_json), through jsonable_encoder,
+and through the FastJSONResponse path used by the template routes.
+
+Usage:
+    python benchmarks/bench_serialization.py [--sizes 10,100,500,2000] [--repeat 200]
+"""
+
+import argparse
+import json
+import sys
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.template import Template  # noqa: E402
+from app.schemas.template import TemplateResponse  # noqa: E402
+from app.api.responses import FastJSONResponse, orjson, serialize_orm  # noqa: E402
+
+
+def make_template(size):
+    elements = [
+        {
+            "id": f"element-{i}",
+            "type": "Text" if i % 3 else "Image",
+            "x": i * 1.5, "y": i * 2.25, "width": 320, "height": 180,
+            "rotation": 0, "zIndex": i, "visible": True,
+            "content": f"Element {i}", "src": f"/media/image-{i}.png",
+            "style": {"fontSize": 24, "color": "#ffffff", "fontFamily": "Inter"},
+        }
+        for i in range(size)
+    ]
+    user = User(id=1, username="bench", email="bench@example.com", role="Editor")
+    return Template(id=1, name="Bench", description="Benchmark template",
+                    elements=elements, created_by=1, user=user,
+                    created_at=datetime.now(), updated_at=None)
+
+
+adapter = TypeAdapter(TemplateResponse)
+
+
+def response_model_path(template):
+    # What FastAPI does with response_model: validate, then dump to JSON
+    return adapter.dump_json(adapter.validate_python(template, from_attributes=True))
+
+
+def jsonable_encoder_path(template):
+    model = TemplateResponse.model_validate(template)
+    return json.dumps(jsonable_encoder(model)).encode("utf-8")
+
+
+def fast_path(template):
+    return FastJSONResponse(serialize_orm(template, TemplateResponse)).body
+
+
+def timed(fn, template, repeat):
+    fn(template)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(template)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,500,2000")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'json (orjson not installed)'}")
+    print(f"{'elements':>9}{'response_model ms':>19}{'jsonable ms':>13}{'fast ms':>10}{'speedup':>9}")
+    print("-" * 60)
+    for size in (int(s) for s in args.sizes.split(",")):
+        template = make_template(size)
+        slow = timed(response_model_path, template, args.repeat)
+        encoder = timed(jsonable_encoder_path, template, args.repeat)
+        fast = timed(fast_path, template, args.repeat)
+        print(f"{size:>9}{slow:>19.3f}{encoder:>13.3f}{fast:>10.3f}{slow / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
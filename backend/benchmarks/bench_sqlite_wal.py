@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Concurrent SQLite read/write throughput benchmark.
+
+Runs reader and writer threads against a scratch database twice: once with
+SQLite's defaults (rollback journal, synchronous=FULL) and once with the
+PRAGMAs from the [database] section of config.ini (WAL, synchronous=NORMAL,
+mmap and page cache sizing, busy timeout).
+
+Usage:
+    python benchmarks/bench_sqlite_wal.py [--readers 8] [--writers 2] [--seconds 5]
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+warnings.filterwarnings("ignore")
+
+from sqlalchemy import text  # noqa: E402
+from app.database import create_database_engine, sqlite_pragmas  # noqa: E402
+
+DEFAULT_PRAGMAS = {"journal_mode": "DELETE",
+                   "synchronous": "FULL", "busy_timeout": 5000}
+ROWS = 10000
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, payload TEXT)"))
+        connection.execute(
+            text("INSERT INTO items (id, name, payload) VALUES (:id, :name, :payload)"),
+            [{"id": i, "name": f"item {i}", "payload": "x" * 512} for i in range(ROWS)])
+
+
+def run(pragmas, readers, writers, seconds):
+    workdir = tempfile.mkdtemp(prefix="ddx-bench-")
+    engine = create_database_engine(
+        f"sqlite:///{workdir}/bench.db", pragmas=pragmas)
+    try:
+        seed(engine)
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def reader():
+            done = 0
+            while time.perf_counter() < deadline:
+                with engine.connect() as connection:
+                    connection.execute(text("SELECT payload FROM items WHERE id = :id"),
+                                       {"id": random.randrange(ROWS)}).fetchone()
+                done += 1
+            with lock:
+                counts["reads"] += done
+
+        def writer():
+            done = errors = 0
+            while time.perf_counter() < deadline:
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(text("UPDATE items SET name = :name WHERE id = :id"),
+                                           {"id": random.randrange(ROWS), "name": str(time.time())})
+                    done += 1
+                except Exception:
+                    errors += 1
+            with lock:
+                counts["writes"] += done
+                counts["errors"] += errors
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {key: value / seconds if key != "errors" else value
+                for key, value in counts.items()}
+    finally:
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'reads/s':>12}{'writes/s':>12}{'errors':>10}")
+    print("-" * 44)
+    for label, pragmas in (("default", DEFAULT_PRAGMAS), ("wal", sqlite_pragmas())):
+        result = run(pragmas, args.readers, args.writers, args.seconds)
+        print(f"{label:<10}{result['reads']:>12.0f}{result['writes']:>12.0f}{result['errors']:>10}")
+
+
+if __name__ == "__main__":
+    main()
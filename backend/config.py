@@ -10,6 +10,7 @@ class Config:
     def __init__(self, config_file: str = "config.ini"):
         self.config = configparser.ConfigParser()
         self.config_file = config_file
+        self.config_dir = Path.cwd()
         self._load_config()
 
     def _load_config(self):
@@ -25,6 +26,7 @@ class Config:
         for path in config_paths:
             if os.path.exists(path):
                 self.config.read(path)
+                self.config_dir = Path(path).resolve().parent
                 config_loaded = True
                 break
 
@@ -60,6 +62,13 @@ class Config:
             return [item.strip() for item in value.split(',') if item.strip()]
         return fallback or []
 
+    def resolve_path(self, path: str) -> Path:
+        """Resolve a configured path relative to the directory of config.ini"""
+        resolved = Path(os.path.expanduser(path))
+        if not resolved.is_absolute():
+            resolved = self.config_dir / resolved
+        return resolved
+
     def get_section(self, section: str) -> Dict[str, str]:
         """Get all configuration values from a section"""
         if section in self.config:
@@ -109,6 +118,14 @@ class Config:
     def api_timeout(self) -> int:
         return self.getint('api', 'timeout', 30000)
 
+    @property
+    def api_bulk_max_items(self) -> int:
+        return self.getint('api', 'bulk_max_items', 10000)
+
+    @property
+    def api_stream_batch_size(self) -> int:
+        return max(1, self.getint('api', 'stream_batch_size', 500))
+
     # CORS configuration
     @property
     def cors_allowed_origins(self) -> List[str]:
@@ -128,7 +145,7 @@ class Config:
 
     @property
     def cors_expose_headers(self) -> List[str]:
-        return self.getlist('cors', 'expose_headers', ['Content-Disposition', 'Content-Length', 'Content-Type'])
+        return self.getlist('cors', 'expose_headers', ['Content-Disposition', 'Content-Length', 'Content-Type', 'X-Next-Cursor', 'ETag'])
 
     @property
     def cors_max_age(self) -> int:
@@ -147,6 +164,72 @@ class Config:
     def database_path(self) -> str:
         return self.get('database', 'path', 'backend/')
 
+    @property
+    def database_url(self) -> str:
+        # Overrides type/name/path when set
+        return self.get('database', 'url', '')
+
+    @property
+    def database_host(self) -> str:
+        return self.get('database', 'host', 'localhost')
+
+    @property
+    def database_port(self) -> int:
+        return self.getint('database', 'port', 5432)
+
+    @property
+    def database_user(self) -> str:
+        return self.get('database', 'user', '')
+
+    @property
+    def database_password(self) -> str:
+        return self.get('database', 'password', '')
+
+    @property
+    def database_pool_size(self) -> int:
+        return self.getint('database', 'pool_size', 5)
+
+    @property
+    def database_max_overflow(self) -> int:
+        return self.getint('database', 'max_overflow', 10)
+
+    @property
+    def database_pool_recycle(self) -> int:
+        return self.getint('database', 'pool_recycle', 1800)
+
+    @property
+    def database_pool_timeout(self) -> int:
+        return self.getint('database', 'pool_timeout', 30)
+
+    @property
+    def sqlite_journal_mode(self) -> str:
+        return self.get('database', 'sqlite_journal_mode', 'WAL')
+
+    @property
+    def sqlite_synchronous(self) -> str:
+        return self.get('database', 'sqlite_synchronous', 'NORMAL')
+
+    @property
+    def sqlite_mmap_size(self) -> int:
+        return self.getint('database', 'sqlite_mmap_size', 268435456)
+
+    @property
+    def sqlite_cache_size(self) -> int:
+        # Negative values are KiB, positive values are pages
+        return self.getint('database', 'sqlite_cache_size', -65536)
+
+    @property
+    def sqlite_busy_timeout(self) -> int:
+        return self.getint('database', 'sqlite_busy_timeout', 5000)
+
+    @property
+    def compress_elements(self) -> bool:
+        return self.getboolean('database', 'compress_elements', False)
+
+    @property
+    def elements_compression_level(self) -> int:
+        return self.getint('database', 'elements_compression_level', 6)
+
     @property
     def database_backup_enabled(self) -> bool:
         return self.getboolean('database', 'backup_enabled', True)
@@ -155,6 +238,15 @@ class Config:
     def database_backup_interval(self) -> int:
         return self.getint('database', 'backup_interval', 24)
 
+    # Templates configuration
+    @property
+    def template_revision_snapshot_interval(self) -> int:
+        return max(1, self.getint('templates', 'revision_snapshot_interval', 20))
+
+    @property
+    def template_canvas_size(self) -> str:
+        return self.get('templates', 'canvas_size', '1280x720')
+
     # Security configuration
     @property
     def jwt_secret(self) -> str:
@@ -176,6 +268,15 @@ class Config:
     def bcrypt_rounds(self) -> int:
         return self.getint('security', 'bcrypt_rounds', 12)
 
+    @property
+    def hash_workers(self) -> int:
+        # 0 means one worker process per CPU
+        return self.getint('security', 'hash_workers', 0)
+
+    @property
+    def hash_queue_size(self) -> int:
+        return self.getint('security', 'hash_queue_size', 64)
+
     # Authentication configuration
     @property
     def session_timeout(self) -> int:
@@ -189,10 +290,39 @@ class Config:
     def lockout_duration(self) -> int:
         return self.getint('auth', 'lockout_duration', 900)
 
+    @property
+    def lockout_store(self) -> str:
+        # memory or sqlite
+        return self.get('auth', 'lockout_store', 'memory').lower()
+
+    @property
+    def lockout_store_path(self) -> str:
+        return self.get('auth', 'lockout_store_path', 'login_attempts.db')
+
+    @property
+    def lockout_max_entries(self) -> int:
+        return self.getint('auth', 'lockout_max_entries', 10000)
+
     @property
     def require_email_verification(self) -> bool:
         return self.getboolean('auth', 'require_email_verification', False)
 
+    @property
+    def principal_cache_size(self) -> int:
+        return self.getint('auth', 'principal_cache_size', 1024)
+
+    @property
+    def principal_cache_ttl(self) -> int:
+        return self.getint('auth', 'principal_cache_ttl', 60)
+
+    @property
+    def token_version_cache_size(self) -> int:
+        return self.getint('auth', 'token_version_cache_size', 4096)
+
+    @property
+    def token_version_cache_ttl(self) -> int:
+        return self.getint('auth', 'token_version_cache_ttl', 30)
+
     # Role permissions
     @property
     def admin_permissions(self) -> List[str]:
@@ -236,6 +366,41 @@ class Config:
     def media_compression_quality(self) -> int:
         return self.getint('media', 'compression_quality', 85)
 
+    @property
+    def media_gc_grace_period(self) -> int:
+        return max(0, self.getint('media', 'gc_grace_period', 86400))
+
+    @property
+    def media_upload_expiry(self) -> int:
+        return max(0, self.getint('media', 'upload_expiry', 86400))
+
+    @property
+    def media_catalog_scan_interval(self) -> int:
+        return max(0, self.getint('media', 'catalog_scan_interval', 3600))
+
+    @property
+    def media_catalog_watch(self) -> bool:
+        return self.getboolean('media', 'catalog_watch', True)
+
+    @property
+    def media_derivative_cache_size(self) -> int:
+        return max(0, self.getint('media', 'derivative_cache_size', 1073741824))
+
+    @property
+    def media_derivative_workers(self) -> int:
+        # 0 means one worker process per CPU
+        return self.getint('media', 'derivative_workers', 0)
+
+    @property
+    def media_derivative_queue_size(self) -> int:
+        return self.getint('media', 'derivative_queue_size', 32)
+
+    @property
+    def media_variant_sizes(self) -> List[int]:
+        sizes = self.getlist('media', 'variant_sizes',
+                             ['320', '480', '640', '960', '1280', '1920', '2560', '3840'])
+        return sorted({int(size) for size in sizes if size.isdigit() and int(size) > 0})
+
     # Logging configuration
     @property
     def logging_level(self) -> str:
@@ -13,6 +13,8 @@ from pathlib import Path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
+from app.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+
 
 # Password hashing context - suppress bcrypt version warnings
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -39,8 +41,7 @@ def reset_admin_password():
         sys.stderr.close()
         sys.stderr = stderr_backup
 
-    # Create engine
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./displaydynamix.db"
+    # Create engine using the same database URL as the main application
     engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
                            "check_same_thread": False})
 
@@ -18,6 +18,9 @@ from pathlib import Path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
+from app.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+from app.models.template import TEMPLATE_SEARCH_DDL, TEMPLATE_SEARCH_TABLE  # noqa: E402
+
 
 # Suppress bcrypt warnings
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -32,7 +35,6 @@ def reset_database():
     """Reset database and create default admin user"""
 
     # Create engine using the same database URL as the main application
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./displaydynamix.db"
     engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
                            "check_same_thread": False})
 
@@ -40,6 +42,10 @@ def reset_database():
         print("🔄 Resetting database...")
 
         with engine.connect() as connection:
+            # Dropping the FTS5 table also drops its shadow tables
+            connection.execute(text(f"DROP TABLE IF EXISTS {TEMPLATE_SEARCH_TABLE}"))
+            connection.commit()
+
             # Get all table names
             inspector = inspect(engine)
             tables = inspector.get_table_names()
@@ -66,6 +72,8 @@ def reset_database():
                     permissions TEXT,
                     is_active BOOLEAN DEFAULT TRUE,
                     force_password_change BOOLEAN DEFAULT TRUE,
+                    token_version INTEGER NOT NULL DEFAULT 0,
+                    version INTEGER NOT NULL DEFAULT 0,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     updated_at DATETIME
                 )
@@ -79,6 +87,9 @@ def reset_database():
                     name VARCHAR NOT NULL,
                     description TEXT,
                     elements JSON NOT NULL,
+                    element_count INTEGER NOT NULL DEFAULT 0,
+                    content_hash VARCHAR(64),
+                    revision INTEGER NOT NULL DEFAULT 0,
                     created_by INTEGER NOT NULL,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     updated_at DATETIME,
@@ -86,6 +97,73 @@ def reset_database():
                 )
             """))
 
+            # Create template revisions table
+            print("🔄 Creating template_revisions table...")
+            connection.execute(text("""
+                CREATE TABLE template_revisions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    template_id INTEGER NOT NULL,
+                    revision INTEGER NOT NULL,
+                    kind VARCHAR(8) NOT NULL,
+                    payload JSON NOT NULL,
+                    created_by INTEGER,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (template_id, revision),
+                    FOREIGN KEY (template_id) REFERENCES templates (id),
+                    FOREIGN KEY (created_by) REFERENCES users (id)
+                )
+            """))
+
+            # Create template element index
+            print("🔄 Creating template_elements table...")
+            connection.execute(text("""
+                CREATE TABLE template_elements (
+                    template_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    type VARCHAR,
+                    source VARCHAR,
+                    x FLOAT,
+                    y FLOAT,
+                    width FLOAT,
+                    height FLOAT,
+                    PRIMARY KEY (template_id, position),
+                    FOREIGN KEY (template_id) REFERENCES templates (id)
+                )
+            """))
+
+            # Create media reference index
+            print("🔄 Creating media_references table...")
+            connection.execute(text("""
+                CREATE TABLE media_references (
+                    path VARCHAR NOT NULL,
+                    template_id INTEGER NOT NULL,
+                    PRIMARY KEY (path, template_id),
+                    FOREIGN KEY (template_id) REFERENCES templates (id)
+                )
+            """))
+
+            # Create media catalog
+            print("🔄 Creating media_assets table...")
+            connection.execute(text("""
+                CREATE TABLE media_assets (
+                    path VARCHAR NOT NULL,
+                    type VARCHAR(8) NOT NULL,
+                    sha256 VARCHAR(64) NOT NULL,
+                    size BIGINT NOT NULL,
+                    mime VARCHAR NOT NULL,
+                    width INTEGER,
+                    height INTEGER,
+                    duration FLOAT,
+                    mtime_ns BIGINT NOT NULL,
+                    inode BIGINT NOT NULL,
+                    PRIMARY KEY (path)
+                )
+            """))
+
+            # Create template search index
+            print("🔄 Creating template_search table...")
+            connection.execute(text(TEMPLATE_SEARCH_DDL))
+
             # Create indexes
             print("🔄 Creating indexes...")
             connection.execute(
@@ -96,6 +174,22 @@ def reset_database():
                 text("CREATE INDEX ix_templates_name ON templates (name)"))
             connection.execute(
                 text("CREATE INDEX ix_templates_created_by ON templates (created_by)"))
+            connection.execute(
+                text("CREATE INDEX ix_template_elements_type ON template_elements (type, template_id)"))
+            connection.execute(
+                text("CREATE INDEX ix_template_elements_source ON template_elements (source, template_id)"))
+            connection.execute(
+                text("CREATE INDEX ix_media_references_template_id ON media_references (template_id)"))
+            connection.execute(
+                text("CREATE INDEX ix_media_assets_type_path ON media_assets (type, path)"))
+            connection.execute(
+                text("CREATE INDEX ix_media_assets_type_size ON media_assets (type, size, path)"))
+            connection.execute(
+                text("CREATE INDEX ix_media_assets_type_mtime ON media_assets (type, mtime_ns, path)"))
+            connection.execute(
+                text("CREATE INDEX ix_media_assets_size ON media_assets (size, path)"))
+            connection.execute(
+                text("CREATE INDEX ix_media_assets_mtime ON media_assets (mtime_ns, path)"))
 
             connection.commit()
             print("✅ All tables and indexes created.")
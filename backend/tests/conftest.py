@@ -0,0 +1,120 @@
+"""
+Fixtures running the API in-process against a throwaway SQLite database
+and media root.
+
+The config is read from the working directory when ``app`` (or
+``config``) is first imported, so the session moves to a scratch
+directory holding a copy of config.ini before any test runs. Tests
+import ``app`` modules inside the test, never at module level: at
+collection time the working directory is still the real one.
+
+Run from backend/ with ``python -m pytest``.
+"""
+
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+PASSWORD = "test-password"
+_usernames = itertools.count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def workdir():
+    workdir = Path(tempfile.mkdtemp(prefix="ddx-test-")).resolve()
+    config = (backend_dir.parent / "config.ini").read_text().splitlines()
+    config = [f"upload_path = {workdir / 'media'}/" if line.startswith("upload_path") else line
+              for line in config]
+    (workdir / "config.ini").write_text("\n".join(config) + "\n")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    from config import get_config
+    # Anything imported earlier would have read the real config.ini and database
+    assert get_config().config_dir == workdir, "config was loaded before the tests started"
+
+    yield workdir
+    os.chdir(cwd)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client(workdir):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.media.derivatives import derivative_service
+
+    with TestClient(app) as client:
+        yield client
+    derivative_service.shutdown()
+
+
+@pytest.fixture(scope="session")
+def media_dir(client):
+    from app.media import media_root
+    return media_root()
+
+
+def login(client, username: str, password: str = PASSWORD) -> dict:
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def password():
+    """Password of every user ``make_user`` creates"""
+    return PASSWORD
+
+
+@pytest.fixture(scope="session")
+def make_user(client):
+    """Create a user with a unique name; returns ``(user, auth headers)``"""
+    from app.crud.user import create_user
+    from app.database import SessionLocal
+    from app.schemas.user import UserCreate
+
+    def make(role: str = "Editor"):
+        username = f"user{next(_usernames)}"
+        db = SessionLocal()
+        try:
+            user = create_user(db, UserCreate(
+                username=username, email=f"{username}@example.com",
+                password=PASSWORD, role=role))
+        finally:
+            db.close()
+        return user, login(client, username)
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def admin(make_user):
+    """Auth headers of an admin shared by the whole session"""
+    return make_user("Admin")[1]
+
+
+@pytest.fixture
+def editor(make_user):
+    """A fresh editor and their auth headers"""
+    return make_user()
+
+
+@pytest.fixture
+def make_template(client, admin):
+    def make(headers=None, **fields):
+        body = {"name": "Template", "elements": []}
+        body.update(fields)
+        response = client.post("/api/templates/", headers=headers or admin, json=body)
+        assert response.status_code == 200, response.text
+        return response
+    return make
@@ -0,0 +1,83 @@
+"""Batch template create/delete and bulk user import"""
+
+
+def results(response):
+    assert response.status_code == 200, response.text
+    return [(result["index"], result["status"]) for result in response.json()["results"]]
+
+
+def test_batch_create_reports_invalid_items(client, admin):
+    response = client.post("/api/templates/batch", headers=admin, json=[
+        {"name": "First", "elements": []},
+        {"name": "No elements"},
+        {"name": "Third", "elements": [{"type": "Text"}]},
+    ])
+    assert results(response) == [(0, "created"), (1, "error"), (2, "created")]
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert "elements" in body["results"][1]["detail"]
+
+    third = client.get(f"/api/templates/{body['results'][2]['id']}", headers=admin).json()
+    assert third["name"] == "Third"
+    assert third["revision"] == 1
+
+
+def test_batch_delete_reports_each_id(client, admin, editor, make_template):
+    _, headers = editor
+    own = make_template(headers).json()["id"]
+    foreign = make_template().json()["id"]
+
+    response = client.post("/api/templates/batch/delete", headers=headers,
+                           json={"ids": [own, foreign, 999999]})
+    assert results(response) == [(0, "deleted"), (1, "forbidden"), (2, "not_found")]
+    assert client.get(f"/api/templates/{own}", headers=headers).status_code == 404
+    assert client.get(f"/api/templates/{foreign}", headers=admin).status_code == 200
+
+
+def test_batch_size_is_capped(client, admin):
+    from app.api.bulk import config
+
+    ids = list(range(config.api_bulk_max_items + 1))
+    response = client.post("/api/templates/batch/delete", headers=admin, json={"ids": ids})
+    assert response.status_code == 413
+
+
+def test_user_import_creates_valid_rows(client, admin, editor):
+    existing, _ = editor
+    response = client.post("/api/users/import", headers=admin, json=[
+        {"username": "bulk-a", "email": "bulk-a@example.com", "password": "bulk-password"},
+        {"username": existing.username, "email": "taken@example.com", "password": "x" * 8},
+        {"username": "bulk-b", "email": "not-an-email", "password": "bulk-password"},
+        {"username": "bulk-a", "email": "bulk-a2@example.com", "password": "bulk-password"},
+        {"username": "bulk-c", "email": "bulk-c@example.com", "password": "bulk-password",
+         "role": "Viewer", "force_password_change": False},
+    ])
+    assert results(response) == [(0, "created"), (1, "error"), (2, "error"),
+                                 (3, "error"), (4, "created")]
+    details = [result["detail"] for result in response.json()["results"]]
+    assert details[1] == "Username already registered"
+    assert details[3] == "Username already registered"
+
+    login = client.post("/api/auth/login", json={"username": "bulk-c", "password": "bulk-password"})
+    assert login.status_code == 200
+
+
+def test_imported_users_start_at_version_one(client, admin):
+    response = client.post("/api/users/import", headers=admin, json=[
+        {"username": "bulk-version", "email": "bulk-version@example.com",
+         "password": "bulk-password"},
+    ])
+    user_id = response.json()["results"][0]["id"]
+    url = f"/api/users/{user_id}"
+
+    assert client.get(url, headers=admin).json()["version"] == 1
+    assert client.put(url, headers=admin, json={"role": "Viewer", "version": 1}).status_code == 200
+
+
+def test_user_import_reads_csv(client, admin):
+    body = ("username,email,password,role\n"
+            "csv-a,csv-a@example.com,csv-password,Viewer\n"
+            "csv-b,csv-b@example.com,,Viewer\n")
+    response = client.post("/api/users/import", headers={**admin, "Content-Type": "text/csv"},
+                           content=body)
+    assert results(response) == [(0, "created"), (1, "error")]
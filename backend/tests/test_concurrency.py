@@ -0,0 +1,70 @@
+"""Optimistic concurrency on templates and users"""
+
+
+def test_put_with_stale_revision_conflicts(client, admin, make_template):
+    template = make_template().json()
+    url = f"/api/templates/{template['id']}"
+    assert client.put(url, headers=admin, json={"name": "First", "revision": 1}).status_code == 200
+
+    response = client.put(url, headers=admin, json={"name": "Second", "revision": 1})
+    assert response.status_code == 409
+    assert response.json()["current_version"] == 2
+    assert client.get(url, headers=admin).json()["name"] == "First"
+
+
+def test_put_returns_the_full_template(client, admin, editor, make_template):
+    owner, headers = editor
+    template = make_template(headers, elements=[{"type": "Text"}]).json()
+    url = f"/api/templates/{template['id']}"
+
+    response = client.put(url, headers=headers, json={"name": "Saved", "revision": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["revision"] == 2
+    assert body["elements"] == [{"type": "Text"}]
+    assert body["user"]["username"] == owner.username
+    assert body == client.get(url, headers=headers).json()
+    assert response.headers["etag"] == client.get(url, headers=headers).headers["etag"]
+
+
+def test_put_etag_chains_into_if_match(client, admin, make_template):
+    created = make_template()
+    url = f"/api/templates/{created.json()['id']}"
+
+    etag = created.headers["etag"]
+    for name in ("One", "Two", "Three"):
+        response = client.put(url, headers={**admin, "If-Match": etag}, json={"name": name})
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+    assert client.get(url, headers=admin).json()["revision"] == 4
+
+
+def test_put_without_changes_checks_the_revision(client, admin, make_template):
+    template = make_template().json()
+    url = f"/api/templates/{template['id']}"
+
+    assert client.put(url, headers=admin, json={"revision": 1}).json()["revision"] == 1
+    assert client.put(url, headers=admin, json={"revision": 0}).status_code == 409
+
+
+def test_writes_to_missing_or_foreign_templates(client, admin, editor, make_template):
+    _, headers = editor
+    url = f"/api/templates/{make_template().json()['id']}"
+
+    assert client.put(url, headers=headers, json={"name": "Mine"}).status_code == 403
+    assert client.put("/api/templates/999999", headers=admin, json={"name": "x"}).status_code == 404
+
+
+def test_user_update_with_stale_version_conflicts(client, admin, editor):
+    user, _ = editor
+    url = f"/api/users/{user.id}"
+    version = client.get(url, headers=admin).json()["version"]
+
+    updated = client.put(url, headers=admin, json={"role": "Viewer", "version": version})
+    assert updated.status_code == 200
+    assert updated.json()["version"] == version + 1
+
+    stale = client.put(url, headers=admin, json={"role": "Editor", "version": version})
+    assert stale.status_code == 409
+    assert stale.json()["current_version"] == version + 1
+    assert client.get(url, headers=admin).json()["role"] == "Viewer"
@@ -0,0 +1,113 @@
+"""ETags, If-None-Match and If-Match on templates and users"""
+
+
+def test_get_returns_304_for_current_etag(client, admin, make_template):
+    created = make_template()
+    etag = created.headers["etag"]
+    template_id = created.json()["id"]
+
+    response = client.get(f"/api/templates/{template_id}", headers=admin)
+    assert response.headers["etag"] == etag
+
+    cached = client.get(f"/api/templates/{template_id}", headers={**admin, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+
+def test_weak_and_listed_tags_match(client, admin, make_template):
+    created = make_template()
+    etag = created.headers["etag"]
+    url = f"/api/templates/{created.json()['id']}"
+
+    header = f'"t0-0", W/{etag}'
+    assert client.get(url, headers={**admin, "If-None-Match": header}).status_code == 304
+
+
+def test_saving_the_template_changes_the_etag(client, admin, make_template):
+    created = make_template()
+    etag = created.headers["etag"]
+    url = f"/api/templates/{created.json()['id']}"
+
+    saved = client.put(url, headers=admin, json={"name": "Renamed"})
+    assert saved.headers["etag"] != etag
+
+    response = client.get(url, headers={**admin, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+    assert response.headers["etag"] == saved.headers["etag"]
+
+
+def test_editing_the_owner_changes_the_etag(client, admin, editor, make_template):
+    owner, headers = editor
+    created = make_template(headers)
+    etag = created.headers["etag"]
+    url = f"/api/templates/{created.json()['id']}"
+
+    client.put(f"/api/users/{owner.id}", headers=admin, json={"email": f"new-{owner.email}"})
+
+    response = client.get(url, headers={**admin, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["user"]["email"] == f"new-{owner.email}"
+    assert response.headers["etag"] != etag
+
+
+def test_sparse_fieldsets_have_their_own_etags(client, admin, make_template):
+    created = make_template()
+    url = f"/api/templates/{created.json()['id']}"
+
+    sparse = client.get(url, headers=admin, params={"fields": "name"})
+    assert sparse.json() == {"name": "Template"}
+    assert sparse.headers["etag"] != created.headers["etag"]
+
+    # The full tag does not validate the sparse representation, nor the reverse
+    assert client.get(url, headers={**admin, "If-None-Match": created.headers["etag"]},
+                      params={"fields": "name"}).status_code == 200
+    assert client.get(url, headers={**admin, "If-None-Match": sparse.headers["etag"]},
+                      params={"fields": "name"}).status_code == 304
+    assert client.get(url, headers={**admin, "If-None-Match": sparse.headers["etag"]}).status_code == 200
+
+
+def test_stale_if_match_fails_with_412(client, admin, make_template):
+    created = make_template()
+    etag = created.headers["etag"]
+    url = f"/api/templates/{created.json()['id']}"
+    current = client.put(url, headers={**admin, "If-Match": etag}, json={"name": "First"})
+    assert current.status_code == 200
+
+    assert client.put(url, headers={**admin, "If-Match": etag},
+                      json={"name": "Second"}).status_code == 412
+    assert client.patch(url, headers={**admin, "If-Match": etag}, json=[]).status_code == 412
+    assert client.delete(url, headers={**admin, "If-Match": etag}).status_code == 412
+    assert client.put(url, headers={**admin, "If-Match": '"not-a-tag"'},
+                      json={"name": "Second"}).status_code == 412
+    assert client.get(url, headers=admin).json()["name"] == "First"
+
+    assert client.delete(url, headers={**admin, "If-Match": current.headers["etag"]}).status_code == 200
+
+
+def test_if_match_ignores_the_owner_version(client, admin, editor, make_template):
+    owner, headers = editor
+    created = make_template(headers)
+    url = f"/api/templates/{created.json()['id']}"
+
+    # Editing the owner changes the representation, not the template
+    client.put(f"/api/users/{owner.id}", headers=admin, json={"role": "Viewer"})
+
+    response = client.put(url, headers={**admin, "If-Match": created.headers["etag"]},
+                          json={"name": "Still current"})
+    assert response.status_code == 200
+
+
+def test_user_etags(client, admin, editor):
+    user, _ = editor
+    url = f"/api/users/{user.id}"
+    etag = client.get(url, headers=admin).headers["etag"]
+
+    assert client.get(url, headers={**admin, "If-None-Match": etag}).status_code == 304
+
+    updated = client.put(url, headers={**admin, "If-Match": etag}, json={"role": "Viewer"})
+    assert updated.status_code == 200
+    assert updated.headers["etag"] != etag
+    assert client.get(url, headers={**admin, "If-None-Match": etag}).status_code == 200
+    assert client.delete(url, headers={**admin, "If-Match": etag}).status_code == 412
@@ -0,0 +1,96 @@
+"""Failed-login lockout: the sliding window in both stores and the 429 it causes"""
+
+import types
+
+import pytest
+
+KEY = "someone|10.0.0.1"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    from app.auth.lockout import MemoryAttemptStore, SqliteAttemptStore
+
+    if request.param == "memory":
+        return MemoryAttemptStore(max_attempts=3, window=60)
+    return SqliteAttemptStore(str(tmp_path / "attempts.db"), max_attempts=3, window=60)
+
+
+def test_locks_after_max_attempts_within_the_window(store):
+    for now in (1000, 1010):
+        store.record_failure(KEY, now)
+        assert store.retry_after(KEY, now) == 0
+    store.record_failure(KEY, 1020)
+
+    # Locked until the oldest of the three failures leaves the window
+    assert store.retry_after(KEY, 1020) == 41
+    assert store.retry_after(KEY, 1059) == 2
+    assert store.retry_after(KEY, 1060) == 0
+    assert store.retry_after("someone|10.0.0.2", 1020) == 0
+
+
+def test_failures_spread_wider_than_the_window_never_lock(store):
+    for now in range(1000, 1400, 30):
+        store.record_failure(KEY, now)
+        assert store.retry_after(KEY, now) == 0
+
+
+def test_window_slides_with_each_failure(store):
+    for now in (1000, 1050, 1059):
+        store.record_failure(KEY, now)
+    assert store.retry_after(KEY, 1059) == 2
+
+    # The first failure has expired, so one more makes three in the window
+    store.record_failure(KEY, 1061)
+    assert store.retry_after(KEY, 1061) == 50
+
+
+def test_reset_clears_the_key(store):
+    for now in (1000, 1001, 1002):
+        store.record_failure(KEY, now)
+    store.reset(KEY)
+    assert store.retry_after(KEY, 1002) == 0
+
+
+def test_memory_store_evicts_least_recently_used_keys():
+    from app.auth.lockout import MemoryAttemptStore
+
+    store = MemoryAttemptStore(max_attempts=1, window=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        store.record_failure(key, 1000)
+    assert [store.retry_after(key, 1000) for key in ("a", "b", "c")] == [0, 61, 61]
+
+
+def test_sqlite_store_purges_expired_failures(tmp_path):
+    import sqlite3
+    from app.auth.lockout import SqliteAttemptStore
+
+    path = str(tmp_path / "attempts.db")
+    store = SqliteAttemptStore(path, max_attempts=3, window=60)
+    for n in range(50):
+        store.record_failure(f"user{n}|ip", 1000)
+    store.purge(1100)
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM login_failures").fetchone() == (0,)
+
+
+def test_login_is_refused_with_429_during_lockout(client, make_user, password, monkeypatch):
+    from app.auth import lockout
+    from config import get_config
+
+    clock = types.SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(lockout, "time", types.SimpleNamespace(time=lambda: clock.now))
+    user, _ = make_user()
+    credentials = {"username": user.username, "password": password}
+    wrong = dict(credentials, password="wrong-password")
+
+    for _ in range(get_config().max_login_attempts):
+        assert client.post("/api/auth/login", json=wrong).status_code == 401
+    locked = client.post("/api/auth/login", json=credentials)
+    assert locked.status_code == 429
+    assert int(locked.headers["retry-after"]) == get_config().lockout_duration + 1
+
+    clock.now += get_config().lockout_duration
+    assert client.post("/api/auth/login", json=credentials).status_code == 200
+    # A successful login clears the failures
+    assert client.post("/api/auth/login", json=wrong).status_code == 401
+    assert client.post("/api/auth/login", json=credentials).status_code == 200
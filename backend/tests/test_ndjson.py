@@ -0,0 +1,114 @@
+"""NDJSON export and import of users and templates"""
+
+import json
+
+import pytest
+
+NDJSON = "application/x-ndjson"
+
+
+def ndjson(response):
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith(NDJSON)
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def dump(rows):
+    return "\n".join(json.dumps(row) for row in rows) + "\n"
+
+
+def renamed(row, prefix):
+    return dict(row, username=f"{prefix}-{row['username']}", email=f"{prefix}-{row['email']}")
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    """Stream imports two lines per batch"""
+    from config import Config
+    monkeypatch.setattr(Config, "api_stream_batch_size", property(lambda self: 2))
+
+
+def test_user_export_leaves_out_hashes(client, admin, editor):
+    user, _ = editor
+    rows = {row["username"]: row for row in ndjson(client.get("/api/users/export", headers=admin))}
+    assert "hashed_password" not in rows[user.username]
+    assert "version" not in rows[user.username]
+
+    with_hashes = ndjson(client.get("/api/users/export", headers=admin,
+                                    params={"include_password_hashes": True}))
+    assert all(row["hashed_password"].startswith("$2") for row in with_hashes)
+
+
+def test_export_with_hashes_imports_as_is(client, admin, editor, password):
+    user, _ = editor
+    row = next(row for row in ndjson(client.get(
+        "/api/users/export", headers=admin, params={"include_password_hashes": True}))
+        if row["username"] == user.username)
+
+    imported = renamed(row, "copy")
+    response = client.post("/api/users/import", headers={**admin, "Content-Type": NDJSON},
+                           content=dump([imported]))
+    assert response.json()["succeeded"] == 1
+
+    login = client.post("/api/auth/login",
+                        json={"username": imported["username"], "password": password})
+    assert login.status_code == 200
+
+
+def test_export_without_hashes_needs_reset_passwords(client, admin, editor, password):
+    user, _ = editor
+    row = next(row for row in ndjson(client.get("/api/users/export", headers=admin))
+               if row["username"] == user.username)
+    headers = {**admin, "Content-Type": NDJSON}
+
+    refused = client.post("/api/users/import", headers=headers, content=dump([renamed(row, "a")]))
+    result = refused.json()["results"][0]
+    assert result["status"] == "error"
+    assert "include_password_hashes" in result["detail"]
+    assert "reset_passwords" in result["detail"]
+
+    reset = client.post("/api/users/import", headers=headers, content=dump([renamed(row, "b")]),
+                        params={"reset_passwords": True})
+    user_id = reset.json()["results"][0]["id"]
+    created = client.get(f"/api/users/{user_id}", headers=admin).json()
+    assert created["force_password_change"] is True
+    assert client.post("/api/auth/login", json={
+        "username": created["username"], "password": password}).status_code == 401
+
+
+def test_partial_import_keeps_committed_batches(client, admin, small_batches):
+    rows = [{"username": f"nd-{n}", "email": f"nd-{n}@example.com", "password": "nd-password"}
+            for n in range(5)]
+    body = (dump(rows[:2]) + "{not json\n" + dump([rows[0]]) + "\n"
+            + dump(rows[2:]) + json.dumps(rows[2]))
+    response = client.post("/api/users/import", headers={**admin, "Content-Type": NDJSON},
+                           content=body)
+    results = response.json()["results"]
+
+    # Blank lines count towards the line numbers in results
+    assert [(r["index"], r["status"]) for r in results] == [
+        (0, "created"), (1, "created"), (2, "error"), (3, "error"),
+        (5, "created"), (6, "created"), (7, "created"), (8, "error")]
+    assert results[2]["detail"] == "Invalid JSON"
+    assert results[3]["detail"] == "Username already registered"
+    assert results[7]["detail"] == "Username already registered"
+
+
+def test_template_export_round_trip(client, admin, editor, make_template):
+    owner, headers = editor
+    template = make_template(headers, name="Exported", elements=[{"type": "Text"}]).json()
+    rows = ndjson(client.get("/api/templates/export", headers=headers))
+    assert [row["id"] for row in rows] == [template["id"]]
+    assert rows[0]["owner"] == owner.username
+
+    rows.append(dict(rows[0], owner="nobody-here"))
+    response = client.post("/api/templates/import", headers={**admin, "Content-Type": NDJSON},
+                           content=dump(rows))
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["created", "error"]
+    assert results[1]["detail"] == "Unknown owner: nobody-here"
+
+    copy = client.get(f"/api/templates/{results[0]['id']}", headers=headers).json()
+    assert copy["id"] != template["id"]
+    assert copy["user"]["username"] == owner.username
+    assert (copy["name"], copy["elements"]) == ("Exported", [{"type": "Text"}])
@@ -0,0 +1,86 @@
+"""RFC 6902 PATCH and revision history of templates"""
+
+import pytest
+
+
+def text(n):
+    return {"id": n, "type": "Text", "x": 0, "y": 0, "properties": {"content": f"Line {n}"}}
+
+
+@pytest.fixture
+def template(client, admin, make_template):
+    created = make_template(name="Patched", elements=[text(1), text(2)])
+    return f"/api/templates/{created.json()['id']}", created.headers["etag"]
+
+
+def test_patch_applies_operations(client, admin, template):
+    url, etag = template
+    response = client.patch(url, headers={**admin, "If-Match": etag}, json=[
+        {"op": "test", "path": "/name", "value": "Patched"},
+        {"op": "replace", "path": "/elements/0/x", "value": 120},
+        {"op": "add", "path": "/elements/-", "value": text(3)},
+        {"op": "move", "from": "/elements/1", "path": "/elements/0"},
+        {"op": "replace", "path": "/description", "value": "Moved"},
+    ])
+    assert response.status_code == 200
+    summary = response.json()
+    assert (summary["revision"], summary["element_count"]) == (2, 3)
+    assert "elements" not in summary
+    assert response.headers["etag"] != etag
+
+    current = client.get(url, headers=admin).json()
+    assert [element["id"] for element in current["elements"]] == [2, 1, 3]
+    assert current["elements"][1]["x"] == 120
+    assert current["description"] == "Moved"
+
+
+def test_failed_test_operation_conflicts(client, admin, template):
+    url, _ = template
+    response = client.patch(url, headers=admin, json=[
+        {"op": "test", "path": "/elements/0/properties/content", "value": "Stale"},
+        {"op": "remove", "path": "/elements/0"},
+    ])
+    assert response.status_code == 409
+    assert client.get(url, headers=admin).json()["revision"] == 1
+
+
+@pytest.mark.parametrize("operations", [
+    [{"op": "remove", "path": "/elements/9"}],
+    [{"op": "replace", "path": "/revision", "value": 7}],
+    [{"op": "remove", "path": "/name"}],
+    [{"op": "replace", "path": "/elements", "value": "not a list"}],
+    [{"op": "copy", "from": "/missing", "path": "/name"}],
+])
+def test_patch_that_does_not_apply_is_rejected(client, admin, template, operations):
+    url, _ = template
+    assert client.patch(url, headers=admin, json=operations).status_code == 422
+    assert client.get(url, headers=admin).json()["revision"] == 1
+
+
+def test_revisions_rebuild_every_version(client, admin, template):
+    url, _ = template
+    client.patch(url, headers=admin, json=[{"op": "remove", "path": "/elements/0"}])
+    client.put(url, headers=admin, json={"name": "Saved"})
+    client.patch(url, headers=admin, json=[{"op": "add", "path": "/elements/0", "value": text(9)}])
+
+    history = client.get(f"{url}/revisions", headers=admin).json()
+    assert [entry["revision"] for entry in history] == [1, 2, 3, 4]
+    assert history[0]["kind"] == "snapshot"
+
+    documents = [client.get(f"{url}/revisions/{n}", headers=admin).json() for n in (1, 2, 3, 4)]
+    assert [[element["id"] for element in doc["elements"]] for doc in documents] == [
+        [1, 2], [2], [2], [9, 2]]
+    assert [doc["name"] for doc in documents] == ["Patched", "Patched", "Saved", "Saved"]
+
+    current = client.get(url, headers=admin).json()
+    assert {key: current[key] for key in ("name", "description", "elements")} == {
+        key: documents[-1][key] for key in ("name", "description", "elements")}
+    assert client.get(f"{url}/revisions/5", headers=admin).status_code == 404
+
+
+def test_revisions_of_foreign_templates_are_forbidden(client, editor, template):
+    url, _ = template
+    _, headers = editor
+    assert client.get(f"{url}/revisions", headers=headers).status_code == 403
+    assert client.get(f"{url}/revisions/1", headers=headers).status_code == 403
+    assert client.patch(url, headers=headers, json=[]).status_code == 403
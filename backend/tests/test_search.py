@@ -0,0 +1,62 @@
+"""Full-text template search"""
+
+
+def search(client, headers, q):
+    response = client.get("/api/templates/search", headers=headers, params={"q": q})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def marquee(text):
+    return {"type": "Marquee", "properties": {"text": text}}
+
+
+def test_search_matches_prefixes_of_every_word(client, admin, make_template):
+    lobby = make_template(name="Zephyr lobby menu").json()["id"]
+    make_template(name="Zephyr kitchen").json()
+
+    assert [hit["id"] for hit in search(client, admin, "zeph lob")] == [lobby]
+    assert search(client, admin, "zephyr lobby breakfast") == []
+
+
+def test_search_ranks_name_matches_first(client, admin, make_template):
+    in_text = make_template(name="Plain", elements=[marquee("quokka sightings")]).json()["id"]
+    in_name = make_template(name="Quokka board").json()["id"]
+
+    hits = search(client, admin, "quokka")
+    assert [hit["id"] for hit in hits] == [in_name, in_text]
+    assert "quokka" in hits[1]["snippet"].lower()
+    assert "elements" not in hits[0]
+
+
+def test_search_follows_saves_and_deletes(client, admin, make_template):
+    template = make_template(name="Narwhal").json()
+    url = f"/api/templates/{template['id']}"
+
+    client.put(url, headers=admin, json={"name": "Walrus", "elements": [marquee("axolotl")]})
+    assert search(client, admin, "narwhal") == []
+    assert [hit["id"] for hit in search(client, admin, "axolotl")] == [template["id"]]
+
+    client.patch(url, headers=admin, json=[{"op": "replace", "path": "/name", "value": "Ibis"}])
+    assert [hit["id"] for hit in search(client, admin, "ibis")] == [template["id"]]
+
+    client.delete(url, headers=admin)
+    assert search(client, admin, "ibis") == []
+
+
+def test_search_is_limited_to_own_templates(client, admin, editor, make_template):
+    _, headers = editor
+    own = make_template(headers, name="Pangolin mine").json()["id"]
+    make_template(name="Pangolin theirs")
+
+    assert [hit["id"] for hit in search(client, headers, "pangolin")] == [own]
+    assert len(search(client, admin, "pangolin")) == 2
+
+
+def test_search_treats_operators_as_text(client, admin, make_template):
+    make_template(name="Tapir")
+    for q in ('tapir"', "(tapir", "tapir*", "-tapir", "^tapir", "tapir:"):
+        assert len(search(client, admin, q)) == 1, q
+    # Operator names are words like any other, and every word must match
+    for q in ("tapir OR", "NEAR(tapir", "name:tapir", '""'):
+        assert search(client, admin, q) == [], q
@@ -13,12 +13,13 @@ from pathlib import Path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
+from app.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+
 
 def update_database():
     """Update database to add force_password_change column"""
 
     # Create engine using the same database URL as the main application
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./displaydynamix.db"
     engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
                            "check_same_thread": False})
 
@@ -77,7 +78,6 @@ def verify_database():
     """Verify that the database is properly updated"""
 
     # Create engine using the same database URL as the main application
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./displaydynamix.db"
     engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
                            "check_same_thread": False})
 
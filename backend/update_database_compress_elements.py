@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Database update script to compress stored template elements in place.
+Rows are rewritten as zlib-compressed JSON (see app/models/types.py), then
+the database size and element read latency are reported before and after.
+Pass --decompress to rewrite every row back to plain JSON.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import SQLALCHEMY_DATABASE_URL, create_database_engine  # noqa: E402
+from app.models.types import compress_elements, decode_elements, is_compressed  # noqa: E402
+from config import get_config  # noqa: E402
+
+BATCH_SIZE = 500
+
+config = get_config()
+
+
+def database_size(connection):
+    if connection.dialect.name == "sqlite":
+        page_count = connection.execute(text("PRAGMA page_count")).scalar()
+        page_size = connection.execute(text("PRAGMA page_size")).scalar()
+        return page_count * page_size
+    return connection.execute(
+        text("SELECT pg_total_relation_size('templates')")).scalar()
+
+
+def measure(connection):
+    """Return (database bytes, stored element bytes, rows, read ms per row)"""
+    size = database_size(connection)
+    length = ("LENGTH(CAST(elements AS BLOB))" if connection.dialect.name == "sqlite"
+              else "pg_column_size(elements)")
+    stored = connection.execute(text(
+        f"SELECT COALESCE(SUM({length}), 0), COUNT(*) FROM templates"
+    )).fetchone()
+
+    started = time.perf_counter()
+    last_id = 0
+    while True:
+        rows = connection.execute(text("""
+            SELECT id, elements FROM templates
+            WHERE id > :last_id ORDER BY id LIMIT :limit
+        """), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        for _, elements in rows:
+            decode_elements(elements)
+        last_id = rows[-1][0]
+    elapsed = time.perf_counter() - started
+
+    rows = stored[1]
+    return size, stored[0], rows, (elapsed * 1000 / rows) if rows else 0.0
+
+
+def rewrite(connection, decompress: bool):
+    """Rewrite every row into the target format, returning rows changed"""
+    is_sqlite = connection.dialect.name == "sqlite"
+    changed = 0
+    last_id = 0
+    while True:
+        rows = connection.execute(text("""
+            SELECT id, elements FROM templates
+            WHERE id > :last_id ORDER BY id LIMIT :limit
+        """), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for template_id, elements in rows:
+            if decompress == (not is_compressed(elements)):
+                continue
+            value = decode_elements(elements)
+            if decompress:
+                stored = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+                if not is_sqlite:
+                    stored = stored.encode("utf-8")
+            else:
+                stored = compress_elements(value, config.elements_compression_level)
+            updates.append({"id": template_id, "elements": stored})
+
+        if updates:
+            connection.execute(text(
+                "UPDATE templates SET elements = :elements WHERE id = :id"), updates)
+            connection.commit()
+            changed += len(updates)
+        last_id = rows[-1][0]
+    return changed
+
+
+def elements_is_binary(engine):
+    column = next(c for c in inspect(engine).get_columns("templates")
+                  if c["name"] == "elements")
+    return "BYTEA" in str(column["type"]).upper()
+
+
+def update_database(decompress: bool = False, vacuum: bool = True):
+    """Compress (or decompress) the elements of every template"""
+
+    engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
+    is_sqlite = engine.dialect.name == "sqlite"
+
+    try:
+        with engine.connect() as connection:
+            before = measure(connection)
+
+            if not is_sqlite and not decompress and not elements_is_binary(engine):
+                print("🔄 Converting templates.elements to BYTEA...")
+                connection.execute(text("""
+                    ALTER TABLE templates ALTER COLUMN elements TYPE BYTEA
+                    USING convert_to(elements::text, 'UTF8')
+                """))
+                connection.commit()
+
+            print("🔄 Decompressing template elements..." if decompress
+                  else "🔄 Compressing template elements...")
+            changed = rewrite(connection, decompress)
+
+            if not is_sqlite and decompress and elements_is_binary(engine):
+                print("🔄 Converting templates.elements back to JSON...")
+                connection.execute(text("""
+                    ALTER TABLE templates ALTER COLUMN elements TYPE JSON
+                    USING convert_from(elements, 'UTF8')::json
+                """))
+                connection.commit()
+
+        if vacuum:
+            print("🔄 Reclaiming free space...")
+            with engine.connect().execution_options(
+                    isolation_level="AUTOCOMMIT") as connection:
+                connection.execute(text("VACUUM" if is_sqlite else "VACUUM templates"))
+
+        with engine.connect() as connection:
+            after = measure(connection)
+
+        print(f"✅ {changed} of {after[2]} templates rewritten")
+        print()
+        print(f"{'':<24}{'before':>14}{'after':>14}")
+        print(f"{'database bytes':<24}{before[0]:>14,}{after[0]:>14,}")
+        print(f"{'stored element bytes':<24}{before[1]:>14,}{after[1]:>14,}")
+        print(f"{'read ms per template':<24}{before[3]:>14.3f}{after[3]:>14.3f}")
+
+        if not decompress and not config.compress_elements:
+            print()
+            print("⚠️  compress_elements is off in config.ini; new writes will be stored uncompressed"
+                  + ("." if is_sqlite else " and will fail against the BYTEA column."))
+
+    except Exception as e:
+        print(f"❌ Error updating database: {e}")
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress stored template elements")
+    parser.add_argument("--decompress", action="store_true",
+                        help="rewrite compressed rows back to plain JSON")
+    parser.add_argument("--no-vacuum", action="store_true",
+                        help="skip VACUUM after rewriting")
+    args = parser.parse_args()
+
+    print("🚀 Starting template elements compression update...")
+    print("=" * 50)
+
+    if update_database(decompress=args.decompress, vacuum=not args.no_vacuum):
+        print("\n🎉 Database update completed successfully!")
+    else:
+        print("\n❌ Database update failed!")
+        sys.exit(1)
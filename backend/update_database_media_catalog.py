@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Database update script to add the media catalog.
+Creates the media_assets table and catalogues every file under the media
+root ([media] upload_path). Safe to re-run: files already catalogued and
+unchanged since are skipped.
+"""
+
+from sqlalchemy import create_engine, inspect
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+from app.models.media import MediaAsset  # noqa: E402
+from app.media import media_root  # noqa: E402
+from app.media.catalog import scan_catalog  # noqa: E402
+
+
+def update_database():
+    """Update database to add the media catalog"""
+
+    # Create engine using the same database URL as the main application
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
+                           "check_same_thread": False})
+
+    inspector = inspect(engine)
+
+    try:
+        if 'media_assets' in inspector.get_table_names():
+            print("✅ media_assets table already exists!")
+        else:
+            print("🔄 Creating media_assets table...")
+            MediaAsset.__table__.create(bind=engine)
+
+        print(f"🔄 Cataloguing {media_root()} (hashing and probing new files)...")
+        report = scan_catalog()
+        print(f"✅ Scanned {report['scanned']} files in {report['seconds']:.1f}s: "
+              f"{report['added']} added, {report['updated']} updated, "
+              f"{report['moved']} moved, {report['removed']} removed")
+
+    except Exception as e:
+        print(f"❌ Error updating database: {e}")
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 Starting database update...")
+    print("=" * 50)
+
+    if update_database():
+        print("\n🎉 Database update completed successfully!")
+    else:
+        print("\n❌ Database update failed!")
+        sys.exit(1)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Database update script to add the media reference index.
+Creates the media_references table and fills it from every existing
+template. Safe to re-run: the index is rebuilt from the templates table.
+"""
+
+from sqlalchemy import create_engine, delete, insert, inspect, text
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+from app.models.media import MediaReference  # noqa: E402
+from app.models.types import decode_elements  # noqa: E402
+from app.crud.media import media_paths  # noqa: E402
+
+BATCH_SIZE = 1000
+
+
+def update_database():
+    """Update database to add the media reference index"""
+
+    # Create engine using the same database URL as the main application
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
+                           "check_same_thread": False})
+
+    inspector = inspect(engine)
+
+    try:
+        if 'media_references' in inspector.get_table_names():
+            print("✅ media_references table already exists!")
+        else:
+            print("🔄 Creating media_references table...")
+            MediaReference.__table__.create(bind=engine)
+
+        with engine.connect() as connection:
+            connection.execute(delete(MediaReference))
+
+            print("🔄 Indexing media references...")
+            started = time.perf_counter()
+            indexed = 0
+            references = 0
+            last_id = 0
+            while True:
+                rows = connection.execute(text(
+                    "SELECT id, elements FROM templates "
+                    "WHERE id > :last_id ORDER BY id LIMIT :limit"
+                ), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+                if not rows:
+                    break
+                params = [{"path": path, "template_id": row.id} for row in rows
+                          for path in media_paths(decode_elements(row.elements))]
+                if params:
+                    connection.execute(insert(MediaReference), params)
+                indexed += len(rows)
+                references += len(params)
+                last_id = rows[-1].id
+
+            connection.commit()
+
+        print(f"✅ Indexed {references} media references of {indexed} templates "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    except Exception as e:
+        print(f"❌ Error updating database: {e}")
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 Starting database update...")
+    print("=" * 50)
+
+    if update_database():
+        print("\n🎉 Database update completed successfully!")
+    else:
+        print("\n❌ Database update failed!")
+        sys.exit(1)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Database update script to add the element index.
+Creates the template_elements table and fills it from every existing
+template. Safe to re-run: the index is rebuilt from the templates table.
+"""
+
+from sqlalchemy import create_engine, delete, insert, inspect, text
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+from app.models.template import TemplateElement  # noqa: E402
+from app.models.types import decode_elements  # noqa: E402
+from app.crud.elements import element_rows  # noqa: E402
+
+BATCH_SIZE = 1000
+
+
+def update_database():
+    """Update database to add the template element index"""
+
+    # Create engine using the same database URL as the main application
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
+                           "check_same_thread": False})
+
+    inspector = inspect(engine)
+
+    try:
+        if 'template_elements' in inspector.get_table_names():
+            print("✅ template_elements table already exists!")
+        else:
+            print("🔄 Creating template_elements table...")
+            TemplateElement.__table__.create(bind=engine)
+
+        with engine.connect() as connection:
+            connection.execute(delete(TemplateElement))
+
+            print("🔄 Indexing template elements...")
+            started = time.perf_counter()
+            indexed = 0
+            elements = 0
+            last_id = 0
+            while True:
+                rows = connection.execute(text(
+                    "SELECT id, elements FROM templates "
+                    "WHERE id > :last_id ORDER BY id LIMIT :limit"
+                ), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+                if not rows:
+                    break
+                params = [element for row in rows
+                          for element in element_rows(row.id, decode_elements(row.elements))]
+                if params:
+                    connection.execute(insert(TemplateElement), params)
+                indexed += len(rows)
+                elements += len(params)
+                last_id = rows[-1].id
+
+            connection.commit()
+
+        print(f"✅ Indexed {elements} elements of {indexed} templates "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    except Exception as e:
+        print(f"❌ Error updating database: {e}")
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 Starting database update...")
+    print("=" * 50)
+
+    if update_database():
+        print("\n🎉 Database update completed successfully!")
+    else:
+        print("\n❌ Database update failed!")
+        sys.exit(1)
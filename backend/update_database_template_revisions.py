@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Database update script to add template revision history.
+Adds templates.revision and the template_revisions table. Existing
+templates start at revision 0; their first save stores a full snapshot.
+"""
+
+from sqlalchemy import create_engine, text, inspect
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+from app.models.template import TemplateRevision  # noqa: E402
+
+
+def update_database():
+    """Update database to add template revision history"""
+
+    # Create engine using the same database URL as the main application
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
+                           "check_same_thread": False})
+
+    inspector = inspect(engine)
+
+    try:
+        column_names = [col['name'] for col in inspector.get_columns('templates')]
+
+        with engine.connect() as connection:
+            if 'revision' in column_names:
+                print("✅ revision column already exists!")
+            else:
+                print("🔄 Adding revision column to templates table...")
+                connection.execute(text("""
+                    ALTER TABLE templates
+                    ADD COLUMN revision INTEGER NOT NULL DEFAULT 0
+                """))
+                connection.commit()
+
+        if 'template_revisions' in inspector.get_table_names():
+            print("✅ template_revisions table already exists!")
+        else:
+            print("🔄 Creating template_revisions table...")
+            TemplateRevision.__table__.create(bind=engine)
+
+        print("✅ Template revision history ready!")
+
+    except Exception as e:
+        print(f"❌ Error updating database: {e}")
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 Starting database update...")
+    print("=" * 50)
+
+    if update_database():
+        print("\n🎉 Database update completed successfully!")
+    else:
+        print("\n❌ Database update failed!")
+        sys.exit(1)
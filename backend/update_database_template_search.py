@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Database update script to add full-text template search (SQLite only).
+Creates the template_search FTS5 table and indexes every existing
+template. Safe to re-run: the index is rebuilt from the templates table.
+"""
+
+from sqlalchemy import create_engine, text
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+from app.models.template import TEMPLATE_SEARCH_DDL, TEMPLATE_SEARCH_TABLE  # noqa: E402
+from app.models.types import decode_elements  # noqa: E402
+from app.crud.search import extract_text  # noqa: E402
+
+BATCH_SIZE = 1000
+
+
+def update_database():
+    """Update database to add the template search index"""
+
+    # Create engine using the same database URL as the main application
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
+                           "check_same_thread": False})
+
+    if engine.dialect.name != "sqlite":
+        print("ℹ️  Full-text search uses SQLite FTS5; other databases fall back to substring matching.")
+        return True
+
+    try:
+        with engine.connect() as connection:
+            print(f"🔄 Creating {TEMPLATE_SEARCH_TABLE} table...")
+            connection.execute(text(TEMPLATE_SEARCH_DDL))
+            connection.execute(text(f"DELETE FROM {TEMPLATE_SEARCH_TABLE}"))
+
+            print("🔄 Indexing templates...")
+            started = time.perf_counter()
+            indexed = 0
+            last_id = 0
+            while True:
+                rows = connection.execute(text(
+                    "SELECT id, name, description, elements FROM templates "
+                    "WHERE id > :last_id ORDER BY id LIMIT :limit"
+                ), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+                if not rows:
+                    break
+                connection.execute(text(
+                    f"INSERT INTO {TEMPLATE_SEARCH_TABLE} (rowid, name, description, body) "
+                    "VALUES (:id, :name, :description, :body)"
+                ), [{"id": row.id, "name": row.name, "description": row.description or "",
+                     "body": extract_text(decode_elements(row.elements))} for row in rows])
+                indexed += len(rows)
+                last_id = rows[-1].id
+
+            connection.execute(text(
+                f"INSERT INTO {TEMPLATE_SEARCH_TABLE} ({TEMPLATE_SEARCH_TABLE}) VALUES ('optimize')"))
+            connection.commit()
+
+        print(f"✅ Indexed {indexed} templates in {time.perf_counter() - started:.1f}s")
+
+    except Exception as e:
+        print(f"❌ Error updating database: {e}")
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 Starting database update...")
+    print("=" * 50)
+
+    if update_database():
+        print("\n🎉 Database update completed successfully!")
+    else:
+        print("\n❌ Database update failed!")
+        sys.exit(1)
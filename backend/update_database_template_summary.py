@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Database update script to add element_count and content_hash to templates.
+Both columns are backfilled from the stored elements so template listings
+can be served without loading the elements payload.
+"""
+
+from sqlalchemy import create_engine, text, inspect
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+from app.crud.template import elements_digest  # noqa: E402
+from app.models.types import decode_elements  # noqa: E402
+
+BATCH_SIZE = 500
+
+
+def update_database():
+    """Update database to add and backfill template summary columns"""
+
+    # Create engine using the same database URL as the main application
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
+                           "check_same_thread": False})
+
+    inspector = inspect(engine)
+
+    try:
+        columns = inspector.get_columns('templates')
+        column_names = [col['name'] for col in columns]
+
+        with engine.connect() as connection:
+            if 'element_count' not in column_names:
+                print("🔄 Adding element_count column to templates table...")
+                connection.execute(text("""
+                    ALTER TABLE templates
+                    ADD COLUMN element_count INTEGER NOT NULL DEFAULT 0
+                """))
+
+            if 'content_hash' not in column_names:
+                print("🔄 Adding content_hash column to templates table...")
+                connection.execute(text("""
+                    ALTER TABLE templates
+                    ADD COLUMN content_hash VARCHAR(64)
+                """))
+
+            connection.commit()
+
+            print("🔄 Backfilling template summaries...")
+            updated = 0
+            last_id = 0
+            while True:
+                rows = connection.execute(text("""
+                    SELECT id, elements FROM templates
+                    WHERE id > :last_id AND content_hash IS NULL
+                    ORDER BY id LIMIT :limit
+                """), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+                if not rows:
+                    break
+
+                for template_id, elements in rows:
+                    elements = decode_elements(elements)
+                    connection.execute(text("""
+                        UPDATE templates
+                        SET element_count = :element_count, content_hash = :content_hash
+                        WHERE id = :id
+                    """), {
+                        "id": template_id,
+                        "element_count": len(elements or []),
+                        "content_hash": elements_digest(elements or []),
+                    })
+                connection.commit()
+
+                updated += len(rows)
+                last_id = rows[-1][0]
+
+        print(f"✅ Template summaries ready ({updated} templates backfilled)")
+
+    except Exception as e:
+        print(f"❌ Error updating database: {e}")
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 Starting template summary update...")
+    print("=" * 50)
+
+    if update_database():
+        print("\n🎉 Database update completed successfully!")
+    else:
+        print("\n❌ Database update failed!")
+        sys.exit(1)
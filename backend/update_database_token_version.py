@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Database update script to add the token_version column to existing users.
+Access tokens embed this version; bumping it revokes every token issued
+before the change.
+"""
+
+from sqlalchemy import create_engine, text, inspect
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+
+
+def update_database():
+    """Update database to add token_version column"""
+
+    # Create engine using the same database URL as the main application
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={
+                           "check_same_thread": False})
+
+    inspector = inspect(engine)
+
+    try:
+        columns = inspector.get_columns('users')
+        column_names = [col['name'] for col in columns]
+
+        if 'token_version' in column_names:
+            print("✅ token_version column already exists!")
+            return True
+
+        print("🔄 Adding token_version column to users table...")
+
+        with engine.connect() as connection:
+            connection.execute(text("""
+                ALTER TABLE users
+                ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0
+            """))
+            connection.commit()
+
+        print("✅ Successfully added token_version column!")
+        print("ℹ️  Existing tokens keep working until they expire; tokens issued from now on carry their version.")
+
+    except Exception as e:
+        print(f"❌ Error updating database: {e}")
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 Starting database update...")
+    print("=" * 50)
+
+    if update_database():
+        print("\n🎉 Database update completed successfully!")
+    else:
+        print("\n❌ Database update failed!")
+        sys.exit(1)
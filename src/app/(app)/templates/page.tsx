@@ -30,14 +30,19 @@ import {
     AlertDialogTrigger,
 } from "@/components/ui/alert-dialog";
 
-interface Template {
+interface TemplateSummary {
     id: number;
     name: string;
     description: string | null;
-    elements: any[];
+    element_count: number;
+    content_hash: string | null;
     created_by: number;
     created_at: string;
     updated_at: string | null;
+}
+
+interface Template extends Omit<TemplateSummary, 'element_count' | 'content_hash'> {
+    elements: any[];
     user?: {
         username: string;
     };
@@ -47,7 +52,7 @@ export default function TemplatesPage() {
     const { user } = useAuth();
     const { toast } = useToast();
     const router = useRouter();
-    const [templates, setTemplates] = useState<Template[]>([]);
+    const [templates, setTemplates] = useState<TemplateSummary[]>([]);
     const [loading, setLoading] = useState(true);
     const [loadingTemplate, setLoadingTemplate] = useState<number | null>(null);
 
@@ -58,7 +63,8 @@ export default function TemplatesPage() {
     const fetchTemplates = async () => {
         try {
             const token = localStorage.getItem('auth_token');
-            const response = await fetch(`${apiBaseUrl}/templates/`, {
+            // The summary listing omits elements; they are fetched on load
+            const response = await fetch(`${apiBaseUrl}/templates/summary`, {
                 headers: {
                     'Authorization': `Bearer ${token}`,
                 },
@@ -109,19 +115,38 @@ export default function TemplatesPage() {
         }
     };
 
-    const handleLoadTemplate = (template: Template) => {
-        // Store template elements in localStorage for the dashboard to load
-        // The elements are already serialized from the backend, so we can store them directly
-        console.log('Loading template:', template);
-        console.log('Template elements:', template.elements);
+    const handleLoadTemplate = async (summary: TemplateSummary) => {
+        setLoadingTemplate(summary.id);
 
-        setLoadingTemplate(template.id);
+        try {
+            const token = localStorage.getItem('auth_token');
+            const response = await fetch(`${apiBaseUrl}/templates/${summary.id}`, {
+                headers: {
+                    'Authorization': `Bearer ${token}`,
+                },
+            });
 
-        localStorage.setItem('canvasPreviewElements', JSON.stringify(template.elements));
-        localStorage.setItem('loadTemplate', JSON.stringify(template));
+            if (!response.ok) {
+                throw new Error('Failed to load template');
+            }
+
+            const template: Template = await response.json();
+
+            // Store template elements in localStorage for the dashboard to load
+            // The elements are already serialized from the backend, so we can store them directly
+            localStorage.setItem('canvasPreviewElements', JSON.stringify(template.elements));
+            localStorage.setItem('loadTemplate', JSON.stringify(template));
 
-        // Use router.push for better navigation
-        router.push('/dashboard');
+            // Use router.push for better navigation
+            router.push('/dashboard');
+        } catch (error) {
+            setLoadingTemplate(null);
+            toast({
+                variant: "destructive",
+                title: "Error",
+                description: "Failed to load template",
+            });
+        }
     };
 
     const formatDate = (dateString: string) => {
@@ -178,7 +203,7 @@ export default function TemplatesPage() {
                                                 </CardDescription>
                                             </div>
                                             <Badge variant="secondary" className="ml-2">
-                                                {template.elements.length} elements
+                                                {template.element_count} elements
                                             </Badge>
                                         </div>
                                     </CardHeader>
@@ -188,10 +213,10 @@ export default function TemplatesPage() {
                                                 <Calendar className="mr-2 h-4 w-4" />
                                                 Created {formatDate(template.created_at)}
                                             </div>
-                                            {template.user && (
+                                            {user && (
                                                 <div className="flex items-center text-sm text-muted-foreground">
                                                     <User className="mr-2 h-4 w-4" />
-                                                    {template.user.username}
+                                                    {user.username}
                                                 </div>
                                             )}
                                             <div className="flex items-center gap-2 pt-2">
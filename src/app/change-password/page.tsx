@@ -77,6 +77,11 @@ export default function ChangePasswordPage() {
             });
 
             if (response.ok) {
+                // Changing the password revokes the old token; keep the new one
+                const data = await response.json();
+                if (data.access_token) {
+                    localStorage.setItem('auth_token', data.access_token);
+                }
                 toast({
                     title: 'Success',
                     description: 'Password changed successfully',